@@ -0,0 +1,160 @@
+"""
+Сравнение режимов браузера: время загрузки страниц, объем загруженных
+данных и потребление памяти.
+
+Режимы:
+    default      - обычное окно Chrome (BROWSER_MODE = "default")
+    headless     - без окна и с pageLoadStrategy=eager, без блокировки ресурсов
+    performance  - BROWSER_MODE = "performance" с блокировкой ресурсов
+
+Запуск (по умолчанию открываются выдача hh.ru и первые вакансии из нее):
+    python -m benchmarks.browser_benchmark --pages 5
+    python -m benchmarks.browser_benchmark https://hh.ru/vacancy/<id> ...
+
+Для подсчета памяти всех процессов Chrome нужен пакет psutil,
+без него выводится только размер кучи JS страницы
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from src.utils import chrome_browser_options, block_network_requests
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SEARCH_URL = "https://hh.ru/search/vacancy?text=python"
+MODES = ["default", "headless", "performance"]
+
+# данные о загрузке страницы из Navigation Timing и Resource Timing API
+PAGE_STATS_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0] || {};
+const resources = performance.getEntriesByType('resource');
+return {
+    dom_content_loaded: navigation.domContentLoadedEventEnd || 0,
+    load: navigation.loadEventEnd || 0,
+    requests: resources.length + 1,
+    transferred: resources.reduce((sum, r) => sum + (r.transferSize || 0), navigation.transferSize || 0),
+};
+"""
+
+
+def start_browser(mode: str, profile_dir: str) -> webdriver.Chrome:
+    """Запустить Chrome в заданном режиме с временным профилем"""
+    profile_path = str(Path(profile_dir) / mode / "profile")
+    if mode == "default":
+        options = chrome_browser_options(profile_path, mode="default")
+    elif mode == "headless":
+        # блокируется только то, что блокировалось и раньше (картинки и стили через prefs)
+        options = chrome_browser_options(profile_path, mode="performance", blocked_hosts=[])
+    else:
+        options = chrome_browser_options(profile_path, mode="performance")
+    driver = webdriver.Chrome(options=options)
+    if mode == "performance":
+        block_network_requests(driver)
+    return driver
+
+
+def vacancy_urls(driver: webdriver.Chrome, pages: int) -> List[str]:
+    """Ссылки на первые вакансии из выдачи"""
+    driver.get(SEARCH_URL)
+    WebDriverWait(driver, 15).until(EC.presence_of_element_located(
+        ("xpath", "//*[starts-with(@data-qa, 'serp-item__title-text')]")))
+    urls = driver.execute_script("""
+        return Array.from(document.querySelectorAll("[data-qa^='serp-item__title-text']"))
+            .map(title => (title.closest('a') || title.querySelector('a') || {}).href)
+            .filter(Boolean);
+    """)
+    return [SEARCH_URL] + urls[:max(pages - 1, 0)]
+
+
+def chrome_memory_mb(driver: webdriver.Chrome) -> Optional[float]:
+    """Суммарная память (RSS) всех процессов Chrome, запущенных драйвером"""
+    if psutil is None:
+        return None
+    try:
+        chromedriver = psutil.Process(driver.service.process.pid)
+        processes = chromedriver.children(recursive=True)
+        return sum(process.memory_info().rss for process in processes) / 2 ** 20
+    except psutil.Error:
+        return None
+
+
+def js_heap_mb(driver: webdriver.Chrome) -> float:
+    """Размер кучи JS текущей страницы"""
+    driver.execute_cdp_cmd("Performance.enable", {})
+    metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+    return next((m["value"] for m in metrics if m["name"] == "JSHeapUsedSize"), 0) / 2 ** 20
+
+
+def measure_mode(mode: str, urls: List[str], profile_dir: str) -> Dict[str, float]:
+    """Открыть все страницы в браузере заданного режима и собрать средние показатели"""
+    driver = start_browser(mode, profile_dir)
+    get_times, ready_times, loaded, transferred, requests, heaps = [], [], [], [], [], []
+    try:
+        for url in urls:
+            start = time.perf_counter()
+            driver.get(url)
+            get_times.append(time.perf_counter() - start)
+            # время до появления нужных боту элементов страницы
+            try:
+                WebDriverWait(driver, 15, poll_frequency=0.05).until(EC.presence_of_element_located(
+                    ("xpath", "//*[@data-qa='vacancy-title' or starts-with(@data-qa, 'serp-item__title-text')]")))
+            except TimeoutException:
+                pass
+            ready_times.append(time.perf_counter() - start)
+            stats = driver.execute_script(PAGE_STATS_SCRIPT)
+            loaded.append(stats["load"] / 1000)
+            transferred.append(stats["transferred"] / 2 ** 10)
+            requests.append(stats["requests"])
+            heaps.append(js_heap_mb(driver))
+        memory = chrome_memory_mb(driver)
+    finally:
+        driver.quit()
+    return {
+        "driver.get, с": statistics.mean(get_times),
+        "до элементов, с": statistics.mean(ready_times),
+        "onload, с": statistics.mean(loaded),
+        "запросов": statistics.mean(requests),
+        "загружено, КБ": statistics.mean(transferred),
+        "куча JS, МБ": statistics.mean(heaps),
+        "память Chrome, МБ": memory if memory is not None else float("nan"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="*", help="страницы для загрузки (по умолчанию - выдача и вакансии из нее)")
+    parser.add_argument("--pages", type=int, default=5, help="число страниц, если urls не заданы")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as profile_dir:
+        urls = args.urls
+        if not urls:
+            driver = start_browser("performance", str(Path(profile_dir) / "discovery"))
+            try:
+                urls = vacancy_urls(driver, args.pages)
+            finally:
+                driver.quit()
+        results = {mode: measure_mode(mode, urls, profile_dir) for mode in args.modes}
+
+    print(f"Страниц: {len(urls)}")
+    metrics = list(next(iter(results.values())))
+    print(f"{'':<20}" + "".join(f"{mode:>14}" for mode in results))
+    for metric in metrics:
+        print(f"{metric:<20}" + "".join(f"{results[mode][metric]:>14.2f}" for mode in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Сравнение сбора полей вакансии через отдельные вызовы find_element
+и одним скриптом execute_script: число запросов к браузеру и время.
+
+Запуск на сохраненной странице с имитацией задержки chromedriver:
+    python -m benchmarks.scrape_benchmark --latency-ms 5
+Запуск в настоящем браузере:
+    python -m benchmarks.scrape_benchmark --url https://hh.ru/vacancy/<id>
+"""
+import argparse
+import time
+from pathlib import Path
+from unittest import mock
+
+import lxml.html
+from selenium.common.exceptions import NoSuchElementException
+
+from src.job_manager import JobManager
+from src.vacancy_scraper import VACANCY_FIELDS, parse_vacancy_html
+from src.webdriver_stats import WebDriverCommandCounter
+
+FIXTURE = Path(__file__).parent.parent / "tests" / "fixtures" / "vacancy.html"
+
+
+def scrape_by_elements(driver) -> dict:
+    """Прежний способ: отдельный запрос к браузеру на каждое поле и каждый навык"""
+    job = {}
+    for key, data_qa in VACANCY_FIELDS:
+        if key == "skills":
+            skill_list = driver.find_elements("xpath", f"//*[@data-qa='{data_qa}']")
+            job["skills"] = ', '.join(skill.text for skill in skill_list)
+            continue
+        if key in ["company_address", "description"] and job.get(key) is not None:
+            continue
+        try:
+            job[key] = driver.find_element("xpath", f"//*[@data-qa='{data_qa}']").text
+        except NoSuchElementException:
+            job[key] = None
+    return job
+
+
+class SimulatedElement:
+    """Элемент страницы, каждое обращение к которому стоит одного запроса к браузеру"""
+    def __init__(self, driver, element):
+        self._driver = driver
+        self._element = element
+
+    @property
+    def text(self) -> str:
+        self._driver.execute("getElementText")
+        return " ".join(self._element.text_content().split())
+
+    def is_displayed(self) -> bool:
+        self._driver.execute("isElementDisplayed")
+        return True
+
+
+class SimulatedDriver:
+    """Драйвер поверх сохраненной страницы с фиксированной задержкой каждого запроса"""
+    def __init__(self, html: str, latency_sec: float):
+        self.html = html
+        self.root = lxml.html.fromstring(html)
+        self.latency_sec = latency_sec
+
+    def execute(self, driver_command: str, params: dict = None):
+        time.sleep(self.latency_sec)
+
+    def find_element(self, by: str, value: str):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(value)
+        return elements[0]
+
+    def find_elements(self, by: str, value: str):
+        self.execute("findElements")
+        return [SimulatedElement(self, element) for element in self.root.xpath(value)]
+
+    def execute_script(self, script: str, *args):
+        self.execute("executeScript")
+        return parse_vacancy_html(self.html)
+
+
+def measure(name: str, counter: WebDriverCommandCounter, scrape, repeats: int) -> None:
+    """Выполнить сбор полей repeats раз и вывести число запросов и время на одну вакансию"""
+    snapshot = counter.snapshot()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        scrape()
+    elapsed = (time.perf_counter() - start) / repeats
+    commands = sum(counter.since(snapshot).values()) / repeats
+    print(f"{name:<28} запросов к браузеру: {commands:>5.1f}   время: {elapsed * 1000:>8.1f} мс")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="страница вакансии для запуска в настоящем браузере")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="задержка одного запроса к браузеру в имитации")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.url:
+        from selenium import webdriver
+        from src.utils import chrome_browser_options
+        driver = webdriver.Chrome(options=chrome_browser_options())
+        driver.get(args.url)
+    else:
+        driver = SimulatedDriver(FIXTURE.read_text(encoding="utf-8"), args.latency_ms / 1000)
+
+    counter = WebDriverCommandCounter(driver)
+    job_manager = JobManager(driver, state_store=mock.Mock())
+    try:
+        measure("find_element по полям", counter, lambda: scrape_by_elements(driver), args.repeats)
+        measure("один execute_script", counter, job_manager._scrape_employer_page, args.repeats)
+    finally:
+        counter.uninstall()
+        if args.url:
+            driver.quit()
+
+
+if __name__ == "__main__":
+    main()
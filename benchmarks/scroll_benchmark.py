@@ -0,0 +1,97 @@
+"""
+Сравнение прежнего скролла (шаг window.scrollTo каждые 10 мс) и скролла
+одним execute_async_script: число запросов к браузеру и время.
+Задержка каждого запроса к chromedriver имитируется.
+
+Запуск:
+    python -m benchmarks.scroll_benchmark --latency-ms 3 --scrolls 3
+"""
+import argparse
+import time
+from unittest import mock
+
+from src.job_manager import JobManager
+from src.webdriver_stats import WebDriverCommandCounter
+
+
+def scroll_by_steps(driver, element, current_position: int, time_to_scroll_sec: float = 2) -> int:
+    """Прежний способ: отдельный запрос window.scrollTo на каждый шаг"""
+    element_position = element.location['y']
+    sleep_time = 0.01
+    distance = abs(current_position - element_position)
+    step_num = time_to_scroll_sec // sleep_time + 1
+    step = distance // step_num + 1
+    if current_position < element_position:
+        while current_position < element_position - 30:
+            current_position += step
+            driver.execute_script(f"window.scrollTo(0, {current_position});")
+            time.sleep(sleep_time)
+    else:
+        while current_position > element_position + 30:
+            current_position -= step
+            driver.execute_script(f"window.scrollTo(0, {current_position});")
+            time.sleep(sleep_time)
+    time.sleep(0.5)
+    return current_position
+
+
+class SimulatedElement:
+    def __init__(self, driver, y: int):
+        self._driver = driver
+        self.y = y
+
+    @property
+    def location(self) -> dict:
+        self._driver.execute("getElementRect")
+        return {"x": 0, "y": self.y}
+
+
+class SimulatedDriver:
+    """Драйвер с фиксированной задержкой каждого запроса; анимация скролла длится duration_ms"""
+    def __init__(self, latency_sec: float):
+        self.latency_sec = latency_sec
+
+    def execute(self, driver_command: str, params: dict = None):
+        time.sleep(self.latency_sec)
+
+    def execute_script(self, script: str, *args):
+        self.execute("executeScript")
+
+    def execute_async_script(self, script: str, element, duration_ms: int, margin: int):
+        self.execute("executeAsyncScript")
+        time.sleep(duration_ms / 1000)
+        return element.y - margin
+
+
+def measure(name: str, counter: WebDriverCommandCounter, scroll, scrolls: int) -> None:
+    snapshot = counter.snapshot()
+    start = time.perf_counter()
+    for _ in range(scrolls):
+        scroll()
+    elapsed = time.perf_counter() - start
+    commands = sum(counter.since(snapshot).values())
+    print(f"{name:<24} запросов к браузеру: {commands:>5}   время: {elapsed:>6.2f} с")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=3.0, help="задержка одного запроса к браузеру")
+    parser.add_argument("--scrolls", type=int, default=3, help="число скроллов (примерно столько на одну вакансию)")
+    parser.add_argument("--distance", type=int, default=3000, help="расстояние скролла в пикселях")
+    args = parser.parse_args()
+
+    driver = SimulatedDriver(args.latency_ms / 1000)
+    counter = WebDriverCommandCounter(driver)
+    element = SimulatedElement(driver, args.distance)
+    job_manager = JobManager(driver, state_store=mock.Mock())
+    try:
+        measure("window.scrollTo по шагам", counter,
+                lambda: scroll_by_steps(driver, element, 0), args.scrolls)
+        measure("один execute_async_script", counter,
+                lambda: job_manager._scroll_slow(element, 0), args.scrolls)
+    finally:
+        counter.uninstall()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,17 @@
-import os
 import sys
+import time
+_import_started_at, _modules_before_import = time.perf_counter(), len(sys.modules)
+
+import argparse
+import os
 from pathlib import Path
 import yaml
 import traceback
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import WebDriverException
-from src.utils import chrome_browser_options
-from src.llm.llm_manager import GPTAnswerer
-from src.authenticator import Authenticator
-from src.bot_facade import BotFacade
-from src.job_manager import JobManager
+# selenium, langchain и остальные тяжелые модули импортируются только там, где нужны,
+# чтобы ошибки в настройках выводились сразу, без долгой загрузки
+from src.utils import chromeProfilePath
+from src.app_config import WORKERS_NUM, BROWSER_MODE, LLM_METRICS_FILE
+from src.startup_profiler import StartupProfiler
 from loguru import logger
 
 # TODO: check the whole pipeline 
@@ -23,6 +23,9 @@ from loguru import logger
 log_file = "log/app_log.log"
 logger.add(log_file)
 
+startup_profiler = StartupProfiler()
+startup_profiler.record("импорт main", _import_started_at, _modules_before_import)
+
 # Не выводить stderr
 sys.stderr = open(os.devnull, 'w')
 
@@ -218,52 +221,118 @@ class FileManager:
         return result
 
 
-def init_driver() -> webdriver.Chrome:
+def init_driver(profile_path: str = chromeProfilePath):
     """Инициализировать Selenium driver"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from src.driver_resolver import ChromeDriverResolver
+    from src.utils import chrome_browser_options, block_network_requests
+
     try:
-        options = chrome_browser_options()
-        service = ChromeService(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=options)
+        options = chrome_browser_options(profile_path)
+        driver_path = ChromeDriverResolver(Path(chromeProfilePath).parent / "chromedriver.json").resolve()
+        service = ChromeService(driver_path)
+        driver = webdriver.Chrome(service=service, options=options)
+        if BROWSER_MODE == "performance":
+            block_network_requests(driver)
+        return driver
     except Exception as e:
         raise RuntimeError(f"Failed to initialize browser: {str(e)}")
 
 
-def create_and_run_bot(parameters, llm_api_key):
-    """Запустить бот"""
+def create_and_run_bot(parameters, llm_api_key, profile_startup: bool = False):
+    """
+    Запустить бот. Если profile_startup - только замерить время
+    этапов запуска и завершить работу, не начиная поиск вакансий
+    """
+    from selenium.common.exceptions import WebDriverException
+
     try:
         with open(parameters['uploads']['plainTextResume'], 'r') as stream:
             resume_profile =  yaml.safe_load(stream)
         with open(parameters['uploads']['resume'], "r", encoding='utf-8') as file:
             resume = file.read()
         
-        driver = init_driver()
-        login_component = Authenticator(driver)
-        gpt_answerer_component = GPTAnswerer(parameters, llm_api_key)
-        apply_component = JobManager(driver)
-        bot = BotFacade(login_component, apply_component)
-        bot.set_resume_profile_and_resume(resume_profile, resume)
-        bot.set_gpt_answerer(gpt_answerer_component)
-        bot.set_parameters(parameters)
-        bot.start_login()
+        if WORKERS_NUM > 1:
+            from src.worker_pool import prepare_worker_profile
+            # скопировать профиль до запуска основного браузера, пока он не занят
+            worker_profiles = {worker_id: prepare_worker_profile(worker_id) for worker_id in range(1, WORKERS_NUM)}
+        with startup_profiler.phase("запуск браузера"):
+            driver = init_driver()
+        with startup_profiler.phase("создание клиента LLM"):
+            from src.llm.llm_manager import GPTAnswerer
+            gpt_answerer_component = GPTAnswerer(parameters, llm_api_key)
+        with startup_profiler.phase("создание компонентов бота"):
+            from src.authenticator import Authenticator
+            from src.bot_facade import BotFacade
+            from src.job_manager import JobManager
+            login_component = Authenticator(driver)
+            apply_component = JobManager(driver)
+            bot = BotFacade(login_component, apply_component)
+            bot.set_resume_profile_and_resume(resume_profile, resume)
+            bot.set_gpt_answerer(gpt_answerer_component)
+            bot.set_parameters(parameters)
+        with startup_profiler.phase("проверка входа на сайт"):
+            bot.start_login()
+        if profile_startup:
+            logger.info(f"Время запуска бота:\n{startup_profiler.report()}")
+            driver.quit()
+            return
         bot.set_search_parameters()
-        bot.start_apply()
+        try:
+            if WORKERS_NUM > 1:
+                def create_worker_job_manager(worker_driver, coordinator):
+                    """
+                    Отдельные JobManager и GPTAnswerer для каждого браузера с общим хранилищем
+                    откликов и общими ограничениями запросов к LLM
+                    """
+                    worker_gpt_answerer = GPTAnswerer(parameters, llm_api_key, coordinator.llm_resilience)
+                    worker_gpt_answerer.set_resume_profile(resume_profile)
+                    worker_gpt_answerer.set_resume(resume)
+                    worker_job_manager = JobManager(worker_driver, apply_component.state_store, coordinator)
+                    worker_job_manager.set_parameters(parameters)
+                    worker_job_manager.set_gpt_answerer(worker_gpt_answerer)
+                    return worker_job_manager
+
+                from src.worker_pool import WorkerPool
+                pool = WorkerPool(driver, lambda worker_id: init_driver(worker_profiles[worker_id]),
+                                  create_worker_job_manager, WORKERS_NUM)
+                pool.run()
+            else:
+                bot.start_apply()
+        finally:
+            from src.llm.metrics import llm_metrics
+            logger.info(f"Расход LLM за время работы:\n{llm_metrics.summary()}")
+            if LLM_METRICS_FILE:
+                llm_metrics.write_textfile(Path(LLM_METRICS_FILE))
     except WebDriverException as e:
         logger.error(f"WebDriver ошибка: {e}")
     except Exception as e:
         raise RuntimeError(f"Ошибка в процессе работы бота: {str(e)}")
 
+def parse_args() -> argparse.Namespace:
+    """Разобрать аргументы командной строки"""
+    parser = argparse.ArgumentParser(description="Бот для отправки откликов на вакансии hh.ru")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="замерить время этапов запуска (настройки, браузер, LLM, вход на сайт) "
+                             "и завершить работу, не начиная поиск вакансий")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     try:
-        data_folder = Path("data_folder")
-        secrets_file, config_file, plain_text_resume_file, resume = FileManager.validate_data_folder(data_folder)
-        
-        config_validator = ConfigValidator()
-        parameters = config_validator.validate_config(config_file)
-        llm_api_key = config_validator.validate_secrets(secrets_file)
-        
-        parameters['uploads'] = FileManager.file_paths_to_dict(resume, plain_text_resume_file)
+        with startup_profiler.phase("проверка настроек"):
+            data_folder = Path("data_folder")
+            secrets_file, config_file, plain_text_resume_file, resume = FileManager.validate_data_folder(data_folder)
+            
+            config_validator = ConfigValidator()
+            parameters = config_validator.validate_config(config_file)
+            llm_api_key = config_validator.validate_secrets(secrets_file)
+            
+            parameters['uploads'] = FileManager.file_paths_to_dict(resume, plain_text_resume_file)
         
-        create_and_run_bot(parameters, llm_api_key)
+        create_and_run_bot(parameters, llm_api_key, profile_startup=args.profile_startup)
     except ConfigError as ce:
         logger.error(f"Ошибка конфигурации: {str(ce)}")
         # logger.error(f"Refer to the configuration guide for troubleshooting: https://github.com/feder-cr/AIHawk_AIHawk_automatic_job_application/blob/main/readme.md#configuration {str(ce)}")
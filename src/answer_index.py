@@ -0,0 +1,232 @@
+from typing import List, Dict, Optional, Tuple
+
+import re
+import zlib
+
+import numpy as np
+from Levenshtein import distance
+
+from src.app_config import ANSWER_SIMILARITY_THRESHOLD
+from loguru import logger
+
+
+CONTROL_CHARS_RE = re.compile(r'[\x00-\x1F\x7F]')
+
+# длина символьных n-грамм и размерность векторов вопросов
+NGRAM_SIZE = 3
+VECTOR_DIM = 2048
+
+WORD_RE = re.compile(r"\w+")
+# слова, не влияющие на смысл вопроса работодателя
+STOP_WORDS = {
+    "а", "в", "во", "вам", "вас", "ваш", "ваша", "ваше", "ваши", "вашего", "вашей", "вашем", "ваших",
+    "вы", "для", "же", "за", "и", "из", "или", "к", "как", "какая", "какие", "каким", "каких", "каков",
+    "какова", "каковы", "какой", "ли", "на", "о", "об", "от", "по", "пожалуйста", "с", "со", "у", "укажите",
+    "напишите", "расскажите", "опишите", "это", "есть",
+}
+# длина основы слова: окончания отбрасываются, чтобы формы одного слова совпадали
+STEM_LENGTH = 6
+# начала слов-синонимов в вопросах работодателей и общая основа, которой они заменяются
+SYNONYM_STEMS = {
+    "вилк": "ожидан",
+    "желаем": "ожидан",
+    "ожидаем": "ожидан",
+    "зп": "зарпла",
+    "заработн": "зарпла",
+    "оклад": "зарпла",
+    "доход": "зарпла",
+    "релокац": "переез",
+    "переех": "переез",
+    "удалённ": "удален",
+}
+# основы короче этой длины (и числа) должны совпадать точно, длиннее - с одной опечаткой
+MIN_TYPO_STEM_LENGTH = 5
+
+
+def sanitize_text(text: str) -> str:
+    """Очистить текст вопроса/ответа"""
+    sanitized_text = text.lower().strip().replace('"', '').replace('\\', '')
+    sanitized_text = CONTROL_CHARS_RE.sub('', sanitized_text).replace('\n', ' ').replace('\r', '').rstrip(',')
+    return sanitized_text
+
+
+def question_stems(question: str) -> List[str]:
+    """Основы значимых слов вопроса: без служебных слов, с заменой синонимов на общую основу"""
+    stems = []
+    for word in WORD_RE.findall(question.lower()):
+        if word in STOP_WORDS:
+            continue
+        stem = word if word.isdigit() else word[:STEM_LENGTH]
+        for prefix, common_stem in SYNONYM_STEMS.items():
+            if word.startswith(prefix):
+                stem = common_stem
+                break
+        stems.append(stem)
+    return stems
+
+
+def same_specifics(stems: List[str], other_stems: List[str]) -> bool:
+    """
+    Каждому значимому слову одного вопроса есть пара в другом. Вопросы,
+    отличающиеся числом, городом, компанией или технологией ("переезд
+    в Москву" и "переезд в Казань"), не считаются одинаковыми. Имена
+    собственные нельзя отличить по регистру (сохраненные вопросы хранятся
+    в нижнем регистре), поэтому пару должно иметь любое значимое слово
+    """
+    def has_pair(stem: str, candidates: set) -> bool:
+        if stem in candidates:
+            return True
+        if stem.isdigit() or len(stem) < MIN_TYPO_STEM_LENGTH:
+            return False
+        return any(len(other) >= MIN_TYPO_STEM_LENGTH and not other.isdigit() and distance(stem, other) <= 1
+                   for other in candidates)
+
+    stems_set, other_set = set(stems), set(other_stems)
+    return all(has_pair(stem, other_set) for stem in stems_set - other_set) and \
+        all(has_pair(stem, stems_set) for stem in other_set - stems_set)
+
+
+class NgramVectorIndex:
+    """
+    Векторный индекс текстов по символьным n-граммам с весами TF-IDF.
+    n-граммы хэшируются в вектор фиксированной размерности, поэтому
+    словарь не нужен, а сходство со всеми текстами сразу считается
+    одним умножением матрицы на вектор.
+    """
+    def __init__(self, dim: int = VECTOR_DIM):
+        self.dim = dim
+        self.texts: List[str] = []
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.df = np.zeros(dim, dtype=np.float64)
+        self.idf = np.ones(dim, dtype=np.float64)
+        self.built_size = 0
+
+    def _term_frequencies(self, text: str) -> np.ndarray:
+        """Посчитать частоты хэшированных n-грамм текста"""
+        padded = f" {text} "
+        ngrams = [padded[i:i + NGRAM_SIZE] for i in range(max(len(padded) - NGRAM_SIZE + 1, 1))]
+        indices = [zlib.crc32(ngram.encode('utf-8')) % self.dim for ngram in ngrams]
+        return np.bincount(indices, minlength=self.dim).astype(np.float64)
+
+    def _vectorize(self, tf: np.ndarray) -> np.ndarray:
+        """Перевести частоты n-грамм в нормированный вектор TF-IDF"""
+        vector = tf * self.idf
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.astype(np.float32)
+
+    def _rebuild(self) -> None:
+        """Пересчитать IDF и векторы всех текстов"""
+        tfs = [self._term_frequencies(text) for text in self.texts]
+        self.df = np.zeros(self.dim, dtype=np.float64)
+        for tf in tfs:
+            self.df += tf > 0
+        self.idf = np.log((1 + len(self.texts)) / (1 + self.df)) + 1
+        capacity = max(len(self.texts) * 2, 16)
+        self.matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        for i, tf in enumerate(tfs):
+            self.matrix[i] = self._vectorize(tf)
+        self.built_size = len(self.texts)
+
+    def add(self, text: str) -> None:
+        """Добавить текст в индекс"""
+        self.texts.append(text)
+        # IDF пересчитывается, когда индекс вырос на четверть с прошлого пересчета,
+        # остальные тексты добавляются с текущими весами
+        if len(self.texts) > self.built_size * 1.25 + 8:
+            self._rebuild()
+            return
+        tf = self._term_frequencies(text)
+        if len(self.texts) > self.matrix.shape[0]:
+            grown = np.zeros((max(self.matrix.shape[0] * 2, 16), self.dim), dtype=np.float32)
+            grown[:self.matrix.shape[0]] = self.matrix
+            self.matrix = grown
+        self.matrix[len(self.texts) - 1] = self._vectorize(tf)
+
+    def most_similar(self, text: str) -> Tuple[Optional[int], float]:
+        """Найти номер самого похожего текста и косинусное сходство с ним"""
+        ranked = self.ranked(text, 0.0)
+        return ranked[0] if ranked else (None, 0.0)
+
+    def ranked(self, text: str, min_score: float) -> List[Tuple[int, float]]:
+        """Номера текстов со сходством не ниже min_score и сходство с ними, по убыванию сходства"""
+        if not self.texts:
+            return []
+        vector = self._vectorize(self._term_frequencies(text))
+        scores = self.matrix[:len(self.texts)] @ vector
+        order = np.argsort(-scores, kind="stable")
+        return [(int(i), float(scores[i])) for i in order if scores[i] >= min_score]
+
+
+class AnswerIndex:
+    """
+    Индекс готовых ответов на вопросы работодателей.
+    Ключ - очищенный текст вопроса, поэтому поиск ответа
+    выполняется за O(1), а очистка текста - один раз на вопрос.
+    Если точного совпадения нет, ищется похожий вопрос по
+    символьным n-граммам основ значимых слов со сходством не ниже
+    similarity_threshold, в котором у каждого значимого слова есть пара.
+    """
+    def __init__(self, answers: List[dict] = None,
+                 similarity_threshold: float = ANSWER_SIMILARITY_THRESHOLD):
+        self.answers: Dict[str, str] = {}
+        self.similarity_threshold = similarity_threshold
+        self.vector_index = NgramVectorIndex()
+        # вопросы в порядке добавления в vector_index и основы их значимых слов
+        self.questions: List[str] = []
+        self.stems: List[List[str]] = []
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        for answer in answers or []:
+            if answer.get('question') and answer.get('answer'):
+                self.add(answer['question'], answer['answer'])
+        logger.debug(f"Индекс готовых ответов построен, вопросов: {len(self.answers)}")
+
+    def get(self, question: str) -> Optional[str]:
+        """Найти готовый ответ на точно такой же вопрос"""
+        return self.answers.get(sanitize_text(question))
+
+    def find(self, question: str) -> Optional[str]:
+        """Найти готовый ответ на такой же или похожий вопрос"""
+        question = sanitize_text(question)
+        answer = self.answers.get(question)
+        if answer:
+            self.exact_hits += 1
+            return answer
+        stems = question_stems(question)
+        if self.similarity_threshold and stems:
+            for i, score in self.vector_index.ranked(" ".join(stems), self.similarity_threshold):
+                similar_question = self.questions[i]
+                if not same_specifics(stems, self.stems[i]):
+                    logger.debug(f"Вопрос '{similar_question}' похож ({score:.2f}), но отличается по смыслу")
+                    continue
+                logger.debug(f"Найден похожий вопрос '{similar_question}' со сходством {score:.2f}")
+                self.fuzzy_hits += 1
+                return self.answers[similar_question]
+        self.misses += 1
+        return None
+
+    def add(self, question: str, answer: str) -> None:
+        """Добавить или обновить ответ на вопрос"""
+        question = sanitize_text(question)
+        if question not in self.answers:
+            stems = question_stems(question)
+            self.questions.append(question)
+            self.stems.append(stems)
+            self.vector_index.add(" ".join(stems))
+        self.answers[question] = answer
+
+    def stats(self) -> str:
+        """Статистика использования готовых ответов"""
+        total = self.exact_hits + self.fuzzy_hits + self.misses
+        hit_rate = (self.exact_hits + self.fuzzy_hits) / total if total else 0.0
+        return (f"точных совпадений: {self.exact_hits}, похожих вопросов: {self.fuzzy_hits}, "
+                f"промахов: {self.misses}, доля готовых ответов: {hit_rate:.0%}")
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def __contains__(self, question: str) -> bool:
+        return sanitize_text(question) in self.answers
@@ -26,11 +26,193 @@ MINIMUM_WAIT_TIME_SEC = 60
 LLM_MODEL_TYPE = "openai" 
 
 # Модель LLM
-LLM_MODEL = "gpt-4o-mini"  
+LLM_MODEL = "gpt-4o-mini"
+
+# Ограничения тарифа аккаунта у провайдера LLM: запросов (rpm) и токенов (tpm) в минуту.
+# Ключ - "тип/модель" или только тип (для всех моделей провайдера). Запросы к модели
+# без ограничений (например, локальной ollama) отправляются без ожидания
+LLM_RATE_LIMITS = {
+    "openai/gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+    "openai": {"rpm": 500, "tpm": 30000},
+    "claude": {"rpm": 50, "tpm": 40000},
+    "gemini": {"rpm": 15, "tpm": 1000000},
+}
 
 # Если True - подавать в каждую компанию не более чем одну вакансию
 APPLY_ONCE_AT_COMPANY = True
 
+"""
+Хранилище истории откликов и готовых ответов на вопросы
+Возможные значения:
+    - "json" - файлы companies.json/answers.json (один процесс бота)
+    - "sqlite" - база state.sqlite3 в режиме WAL (несколько процессов бота на одной истории)
+"""
+STATE_STORE = "json"
+
+# Через сколько записей журнал откликов companies.jsonl сворачивается в снимок companies.json
+# (во время пауз; если пауз нет - при записи отклика, когда записей вдвое больше)
+COMPANIES_JOURNAL_COMPACT_EVERY = 500
+
+# Минимальное сходство (от 0 до 1) вопроса работодателя с уже сохраненным вопросом,
+# при котором используется сохраненный ответ вместо запроса к LLM. 0 - только точное совпадение
+ANSWER_SIMILARITY_THRESHOLD = 0.8
+
+# Если True - вопросы с однозначными ключевыми словами относятся к разделу резюме
+# без запроса к LLM (решения LLM в любом случае кэшируются в sections.json)
+LOCAL_SECTION_CLASSIFIER = True
+
+# Число потоков, в которых LLM пишет сопроводительные письма и ответы на вопросы,
+# пока браузер занят откликом
+LLM_MAX_WORKERS = 4
+
+# Сколько следующих вакансий из выдачи заранее открывать в фоновых вкладках,
+# пока обрабатывается текущая. 0 - открывать вакансии по одной кликом по карточке
+PREFETCH_VACANCIES = 0
+
+# Если True - вакансии из выдачи читаются параллельно по HTTP с cookies сессии браузера,
+# а браузер используется только для отклика
+HTTP_VACANCY_SCRAPER = False
+
+# Число одновременных HTTP соединений при чтении вакансий
+HTTP_SCRAPER_MAX_CONNECTIONS = 4
+
+# Путь к chromedriver. Если не задан - chromedriver скачивается при первом запуске
+# и при обновлении Chrome, а путь к нему запоминается в chrome_profile/chromedriver.json
+CHROMEDRIVER_PATH = ""
+
+"""
+Режим работы браузера
+Возможные значения:
+    - "default" - обычное окно Chrome, страницы загружаются полностью
+    - "performance" - Chrome без окна (headless), страница считается загруженной, как только
+      готов DOM, ресурсы по шаблонам BLOCKED_URL_PATTERNS и с сайтов BLOCKED_HOSTS не загружаются.
+      Войти на сайт в этом режиме нельзя - сначала войдите в режиме "default"
+"""
+BROWSER_MODE = "default"
+
+# Шаблоны ссылок (* - любые символы), по которым ресурсы не загружаются в режиме "performance" на всех
+# вкладках бота (вакансии в этом режиме открываются в новых вкладках, в которых блокировка включается
+# до загрузки страницы). Блокировка идет по ссылке, а не по типу ресурса: шрифт или видео по ссылке
+# без такого окончания загрузится. Картинки отключены настройками Chrome во всех режимах
+BLOCKED_URL_PATTERNS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.mp4", "*.webm", "*.mp3", "*.ogg"]
+
+# Сайты (* - любой поддомен), к которым браузер не обращается в режиме "performance" ни на одной вкладке:
+# счетчики посещений, реклама и прочие сторонние скрипты
+BLOCKED_HOSTS = [
+    "mc.yandex.ru",
+    "an.yandex.ru",
+    "*.google-analytics.com",
+    "*.googletagmanager.com",
+    "*.doubleclick.net",
+    "top-fwz1.mail.ru",
+]
+
+# Если True - выдача открывается по ссылке, построенной из настроек поиска (ссылка кэшируется
+# в search_url.json), а форма расширенного поиска заполняется, только если ссылку построить не удалось
+SEARCH_URL_BUILDER = True
+
+# Если True - считать команды, которые бот отправляет браузеру, и выводить в лог их число на каждую
+# вакансию (для отладки). Для подсчета подменяется метод отправки команд драйвера
+WEBDRIVER_COMMAND_STATS = False
+
+# Фоновая работа (письма для следующих вакансий, открытие вкладок, сохранение истории)
+# выполняется только в паузах, от которых осталось не меньше этого числа секунд
+PACING_MIN_IDLE_SLICE_SEC = 0.5
+
+# Число браузеров, параллельно откликающихся на вакансии с разных страниц выдачи.
+# У каждого браузера своя копия профиля chrome_profile/worker_<номер>. 1 - один браузер
+WORKERS_NUM = 1
+
+# Минимальный интервал между откликами всех браузеров вместе (при WORKERS_NUM > 1)
+WORKERS_MIN_INTERVAL_SEC = 20
+
+# Цепочки LLM, ответы которых сохраняются в кэше data_folder/output/llm_cache.sqlite3:
+# повторный такой же запрос к той же модели не отправляется провайдеру, а берется готовый ответ.
+# Для повторно опубликованной вакансии будет использовано то же сопроводительное письмо и те же
+# ответы на вопросы, поэтому по умолчанию кэш выключен. Возможные значения: названия разделов резюме
+# (как в GPTAnswerer.chains), "cover_letter", "questions" (пакетные ответы на вопросы),
+# "summarize_job_description". Например: ["summarize_job_description", "personal_information"].
+# Определение раздела резюме для вопроса здесь не указывается: оно кэшируется в sections.json
+LLM_CACHE_CHAINS = []
+
+# Максимальное число ответов в кэше LLM (давно не использованные удаляются)
+LLM_CACHE_MAX_ENTRIES = 5000
+
+# Сколько секунд ответ LLM хранится в кэше
+LLM_CACHE_TTL_SEC = 30 * 24 * 3600
+
+# Размер файла журнала запросов к LLM data_folder/output/open_ai_calls.jsonl, после которого
+# он переименовывается и сжимается в gzip
+LLM_CALL_LOG_MAX_BYTES = 10 * 2 ** 20
+
+# Файл, в который после каждой страницы выдачи выгружаются метрики расхода токенов, денег и времени
+# на запросы к LLM в формате Prometheus (для node_exporter textfile collector). "" - не выгружать
+LLM_METRICS_FILE = "data_folder/output/llm_metrics.prom"
+
+# Бюджет токенов одного запроса к LLM по цепочкам. Перед запросом из описания вакансии удаляются
+# шаблонные абзацы и лишние пробелы, а если запрос все равно больше бюджета - из резюме остаются
+# разделы, ближе всего относящиеся к вакансии, затем описание и резюме обрезаются
+PROMPT_TOKEN_BUDGETS = {
+    "cover_letter": 3000,
+    "summarize_job_description": 3000,
+    "questions": 3000,
+}
+
+# Бюджет токенов для цепочек, не указанных в PROMPT_TOKEN_BUDGETS
+PROMPT_TOKEN_BUDGET_DEFAULT = 1500
+
+# Сколько примеров сопроводительных писем (от 0 до 3) добавлять в запрос к LLM
+COVER_LETTER_EXAMPLES = 1
+
+# Если True - несколько новых вопросов работодателя к одной вакансии отправляются в LLM одним запросом,
+# а вопросы, на которые в ответе LLM не нашлось подходящего ответа, задаются по одному
+BATCH_QUESTIONS = True
+
+# Если True - сопроводительное письмо вводится в форму отклика по абзацам, пока LLM его еще пишет
+# (для моделей openai, claude и ollama; остальные модели отдают письмо целиком)
+STREAM_COVER_LETTER = True
+
+# Повторы запросов к LLM при перегрузке и сбоях провайдера, ошибках сети и таймаутах:
+# максимальное число повторов и пауза перед повтором в секундах (растет вдвое с каждой попыткой,
+# со случайной составляющей, не больше максимальной; если провайдер прислал retry-after - по нему)
+LLM_MAX_RETRIES = 5
+LLM_RETRY_BASE_DELAY_SEC = 1
+LLM_RETRY_MAX_DELAY_SEC = 60
+
+# Максимальное число одновременных запросов к LLM
+LLM_MAX_CONCURRENCY = 4
+
+# После скольких сбоев провайдера LLM подряд запросы перестают отправляться
+# и на сколько секунд (затем отправляется один пробный запрос)
+LLM_CIRCUIT_FAILURE_THRESHOLD = 5
+LLM_CIRCUIT_RESET_SEC = 60
+
+# Маршруты запросов цепочек к моделям: для цепочки - список моделей "тип/модель" в порядке использования.
+# Следующая модель получает запрос, если предыдущая вернула ошибку или не ответила за допустимое время
+# (модели с сработавшим выключателем пропускаются). Цепочки без маршрута используют LLM_MODEL_TYPE/LLM_MODEL.
+# Ключ API провайдера LLM_MODEL_TYPE берется из secrets.yaml, остальных провайдеров - из переменных
+# окружения (файла .env): OPENAI_API_KEY, ANTHROPIC_API_KEY, GOOGLE_API_KEY, HUGGINGFACEHUB_API_TOKEN.
+# Например, определение темы вопроса и короткие ответы - локальной модели, письма - сильной:
+# LLM_ROUTES = {
+#     "section": ["ollama/llama3.1", "openai/gpt-4o-mini"],
+#     "personal_information": ["ollama/llama3.1", "openai/gpt-4o-mini"],
+#     "cover_letter": ["openai/gpt-4o", "claude/claude-3-5-sonnet-20240620", "openai/gpt-4o-mini"],
+# }
+LLM_ROUTES = {}
+
+# Допустимое время ответа модели маршрута в секундах по цепочкам (для последней модели маршрута не действует)
+LLM_ROUTE_LATENCY_SLO_SEC = {
+    "section": 10,
+    "cover_letter": 60,
+    "questions": 60,
+}
+LLM_ROUTE_LATENCY_SLO_DEFAULT_SEC = 20
+
+# Число потоков для запросов к моделям маршрутов с допустимым временем ответа. Запрос, не уложившийся
+# во время, дорабатывает в своем потоке (он оплачивается и учитывается в ограничении частоты),
+# поэтому при медленном провайдере новые запросы ждут свободного потока
+LLM_ROUTE_MAX_THREADS = 8
+
 
 # словарь для подсчета стоимости запроса к модели
 PRICE_DICT = {
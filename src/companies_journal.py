@@ -0,0 +1,115 @@
+from typing import Dict, List
+
+import os
+import json
+import traceback
+from pathlib import Path
+
+from src.app_config import COMPANIES_JOURNAL_COMPACT_EVERY
+from loguru import logger
+
+
+class CompaniesJournal:
+    """
+    Хранилище уже просмотренных компаний и их вакансий.
+    Состоит из снимка (companies.json) и журнала (companies.jsonl),
+    в который каждый отклик дописывается одной строкой. Журнал
+    сворачивается в снимок во время пауз (flush хранилища), когда в нем
+    накопилось compact_every записей, поэтому стоимость записи одного
+    отклика не зависит от размера истории. Если пауз нет, журнал
+    сворачивается при записи, когда в нем вдвое больше записей.
+    """
+    def __init__(self, snapshot_file: Path, journal_file: Path,
+                 compact_every: int = COMPANIES_JOURNAL_COMPACT_EVERY):
+        self.snapshot_file = Path(snapshot_file)
+        self.journal_file = Path(journal_file)
+        self.compact_every = compact_every
+        self.journal_records = 0
+
+    def load(self) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+        """Загрузить снимок и применить к нему все записи из журнала"""
+        data = self._load_snapshot()
+        self.journal_records = 0
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line_num, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                        self._apply(data, record['login'], record['job_title'],
+                                    record['company'], record['title'])
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        # недописанная строка после аварийного завершения
+                        logger.warning(f"Пропускаем поврежденную строку {line_num} в журнале {self.journal_file}")
+                        continue
+                    self.journal_records += 1
+        except FileNotFoundError:
+            logger.debug(f"Журнал {self.journal_file} не найден, используем только снимок")
+        logger.debug(f"Из журнала применено записей: {self.journal_records}")
+        return data
+
+    def append(self, data: Dict[str, Dict[str, Dict[str, List[str]]]], login: str,
+               job_title: str, company_name: str, company_job_title: str) -> None:
+        """Дописать отклик в журнал и свернуть журнал в снимок, если он не сворачивался во время пауз"""
+        record = {"login": login, "job_title": job_title,
+                  "company": company_name, "title": company_job_title}
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.journal_records += 1
+        if self.journal_records >= 2 * self.compact_every:
+            self.compact(data)
+
+    def should_compact(self) -> bool:
+        """Пора ли свернуть журнал в снимок"""
+        return self.journal_records >= self.compact_every
+
+    def sync(self) -> None:
+        """Сбросить журнал на диск"""
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.error(f"Не удалось сбросить журнал {self.journal_file} на диск: {str(e)}")
+
+    def compact(self, data: Dict[str, Dict[str, Dict[str, List[str]]]]) -> None:
+        """Записать актуальное состояние в снимок и очистить журнал"""
+        logger.debug(f"Сворачиваем журнал ({self.journal_records} записей) в снимок {self.snapshot_file}")
+        tmp_file = self.snapshot_file.with_suffix(self.snapshot_file.suffix + ".tmp")
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4)
+            # замена файла атомарна: снимок либо старый, либо новый целиком
+            os.replace(tmp_file, self.snapshot_file)
+            open(self.journal_file, 'w').close()
+            self.journal_records = 0
+        except Exception:
+            tb_str = traceback.format_exc()
+            logger.error("Ошибка при сворачивании журнала откликов в снимок")
+            raise Exception(f"Ошибка при сворачивании журнала откликов в снимок: \nTraceback:\n{tb_str}")
+
+    def _load_snapshot(self) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+        """Загрузить снимок companies.json"""
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                try:
+                    data = json.load(f)
+                    if not isinstance(data, dict):
+                        raise ValueError("Формат файла JSON неверный, ожидаем словарь")
+                except json.JSONDecodeError:
+                    logger.error("Декодирование JSON файла завершено с ошибкой")
+                    data = {}
+        except FileNotFoundError:
+            logger.warning("JSON файл не найден, возвращаем пустой словарь")
+            data = {}
+        return data
+
+    @staticmethod
+    def _apply(data: Dict[str, Dict[str, Dict[str, List[str]]]], login: str,
+               job_title: str, company_name: str, company_job_title: str) -> None:
+        """Добавить отклик в словарь компаний"""
+        my_company = data.setdefault(login, {}).setdefault(job_title, {})
+        titles = my_company.setdefault(company_name, [])
+        if company_job_title not in titles:
+            titles.append(company_job_title)
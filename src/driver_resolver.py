@@ -0,0 +1,82 @@
+from typing import Dict, Optional
+
+import json
+import os
+from pathlib import Path
+
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import ChromeType, OperationSystemManager
+
+from src.app_config import CHROMEDRIVER_PATH
+from loguru import logger
+
+
+class ChromeDriverResolver:
+    """
+    Поиск chromedriver без обращения к сети. Путь к скачанному драйверу
+    запоминается для старшей версии установленного Chrome, поэтому
+    webdriver_manager обращается к сети, только когда Chrome обновился
+    """
+    def __init__(self, cache_file: Path, pinned_path: str = CHROMEDRIVER_PATH):
+        self.cache_file = Path(cache_file)
+        self.pinned_path = pinned_path
+
+    def resolve(self) -> str:
+        """Путь к chromedriver, подходящему к установленному Chrome"""
+        if self.pinned_path:
+            if not os.path.isfile(self.pinned_path):
+                raise FileNotFoundError(f"chromedriver не найден по пути CHROMEDRIVER_PATH: {self.pinned_path}")
+            logger.debug(f"Используем chromedriver из CHROMEDRIVER_PATH: {self.pinned_path}")
+            return self.pinned_path
+        major_version = self.chrome_major_version()
+        cache = self._load_cache()
+        driver_path = cache.get(major_version) if major_version is not None else None
+        if driver_path is not None and os.path.isfile(driver_path):
+            logger.debug(f"Используем сохраненный chromedriver для Chrome {major_version}: {driver_path}")
+            return driver_path
+        driver_path = self._install()
+        if major_version is not None:
+            cache[major_version] = driver_path
+            self._save_cache(cache)
+        return driver_path
+
+    @staticmethod
+    def chrome_major_version() -> Optional[str]:
+        """Старшая версия установленного Chrome (определяется локально, без сети)"""
+        os_manager = OperationSystemManager()
+        for browser_type in (ChromeType.GOOGLE, ChromeType.CHROMIUM):
+            try:
+                version = os_manager.get_browser_version_from_os(browser_type)
+            except Exception as e:
+                logger.debug(f"Не удалось определить версию {browser_type}: {str(e)}")
+                continue
+            if version:
+                return version.split(".")[0]
+        logger.warning("Не удалось определить версию Chrome, chromedriver не будет сохранен")
+        return None
+
+    @staticmethod
+    def _install() -> str:
+        """Скачать chromedriver через webdriver_manager (обращается к сети)"""
+        logger.info("Загружаем chromedriver для установленной версии Chrome")
+        return ChromeDriverManager().install()
+
+    def _load_cache(self) -> Dict[str, str]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            logger.error(f"Файл {self.cache_file} поврежден, chromedriver будет найден заново")
+            return {}
+
+    def _save_cache(self, cache: Dict[str, str]) -> None:
+        tmp_file = self.cache_file.with_suffix(self.cache_file.suffix + ".tmp")
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.error(f"Не удалось сохранить путь к chromedriver: {str(e)}")
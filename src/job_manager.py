@@ -1,40 +1,116 @@
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional, Union
 
-import os
-import re
-import json
 import random
+import re
 import time
 import traceback
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 from inputimeout import inputimeout, TimeoutOccurred
 
 from selenium import webdriver
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException
+from selenium.common.exceptions import (
+    NoSuchElementException, TimeoutException, StaleElementReferenceException, WebDriverException,
+)
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
-from src.app_config import MINIMUM_WAIT_TIME_SEC, APPLY_ONCE_AT_COMPANY
+from src.app_config import (
+    MINIMUM_WAIT_TIME_SEC, APPLY_ONCE_AT_COMPANY, LLM_MAX_WORKERS, PREFETCH_VACANCIES,
+    HTTP_VACANCY_SCRAPER, SEARCH_URL_BUILDER, LLM_METRICS_FILE, BATCH_QUESTIONS, STREAM_COVER_LETTER,
+    BROWSER_MODE, BLOCKED_URL_PATTERNS, WEBDRIVER_COMMAND_STATS,
+)
+from src.state_store import StateStore, create_state_store
+from src.answer_index import AnswerIndex, sanitize_text
+from src.prefetcher import VacancyPrefetcher
+from src.search_url import SearchUrlBuilder, search_page_url
+from src.pacing import PacingScheduler
+from src.webdriver_stats import WebDriverCommandCounter
+from src.vacancy_scraper import VACANCY_FIELDS, VACANCY_EXTRACT_SCRIPT, HttpVacancyScraper
+from src.llm.metrics import llm_metrics, vacancy_label
+from src.llm.streaming import TextStream
 from loguru import logger
 
 
+# идентификатор резюме в ссылке на него
+RESUME_ID_RE = re.compile(r"/resume/([0-9a-f]+)")
+
+# плавный скролл до элемента внутри страницы за один запрос к браузеру.
+# Аргументы: элемент, длительность в мс, допустимое расстояние до элемента в пикселях.
+# Возвращает итоговую позицию страницы
+SMOOTH_SCROLL_SCRIPT = """
+const [element, durationMs, margin] = arguments;
+const done = arguments[arguments.length - 1];
+const startY = window.scrollY;
+const elementY = element.getBoundingClientRect().top + startY;
+const distance = elementY - startY;
+if (Math.abs(distance) <= margin) {
+    done(Math.round(startY));
+    return;
+}
+const targetY = elementY - Math.sign(distance) * margin;
+// в фоновой вкладке requestAnimationFrame не вызывается, там шаги идут по таймеру
+const nextFrame = (callback) => document.hidden
+    ? setTimeout(() => callback(performance.now()), 16)
+    : requestAnimationFrame(callback);
+const easeInOut = (t) => t < 0.5 ? 2 * t * t : 1 - Math.pow(-2 * t + 2, 2) / 2;
+let startTime = null;
+const step = (now) => {
+    if (startTime === null) {
+        startTime = now;
+    }
+    const progress = Math.min((now - startTime) / durationMs, 1);
+    window.scrollTo(0, startY + (targetY - startY) * easeInOut(progress));
+    if (progress < 1) {
+        nextFrame(step);
+    } else {
+        done(Math.round(window.scrollY));
+    }
+};
+nextFrame(step);
+"""
+
+
 class JobManager:
     """Класс для поиска и рассылки откликов работодателям"""
-    def __init__(self, driver: webdriver.Chrome):
+    def __init__(self, driver: webdriver.Chrome, state_store: StateStore = None, coordinator: Any = None):
         logger.debug("Инициализация JobManager")
         self.driver = driver
+        self.state_store = state_store
+        # WorkerCoordinator, если браузеров несколько (см. src/worker_pool.py)
+        self.coordinator = coordinator
         self.gpt_answerer = None
         self.wait = WebDriverWait(driver, 4, poll_frequency=1)
         self.page_num = 1
         self.current_position = 0
+        # потоки для генерации текстов LLM параллельно с работой браузера
+        self.llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS)
+        # все паузы идут через планировщик, который заполняет их фоновой работой
+        self.pacing = PacingScheduler()
+        # сопроводительные письма, заранее начатые во время пауз, по описанию вакансии
+        self.pending_cover_letters: Dict[str, Union[Future, TextStream]] = {}
+        # число команд браузеру на каждую вакансию текущей страницы (только при WEBDRIVER_COMMAND_STATS)
+        self.command_counter = WebDriverCommandCounter(driver) if WEBDRIVER_COMMAND_STATS else None
+        self.vacancy_commands: List[int] = []
+        # вакансии, на которые уже пытались откликнуться за время работы (в том числе неудачно),
+        # чтобы после ошибки не повторять отклик на них при повторном открытии страницы
+        self.attempted_vacancies: Dict[str, List[str]] = {}
+        # HTTP клиент для чтения вакансий текущей страницы, закрывается после нее
+        self.http_scraper = None
+        # ссылка на выдачу, если поиск задан ссылкой, а не через форму расширенного поиска
+        self.search_url = None
+        # первая страница выдачи уже открыта по ссылке, второй раз ее не загружаем
+        self.first_page_opened = False
         logger.debug("JobManager успешно инициализирован")
 
     def set_parameters(self, parameters: Dict[str, Any]):
         """Установка параметрок поиска"""
         logger.debug("Установка параметров JobManager")
+        self.parameters = parameters
         # загрузка обязательных параметров
         self.job_title = parameters['job_title']
         self.login = parameters['login']
@@ -60,13 +136,34 @@ class JobManager:
         # загрузить черный список компаний
         self.job_blacklist = parameters.get('job_blacklist', [])
         self.job_blacklist = [self._sanitize_text(j_b) for j_b in self.job_blacklist]
-        # загрузить компании, в которые уже были отправлены заявки
-        self.companies = self._load_companies_from_json()
-        self.seen_answers = self._load_questions_from_json()
+        # хранилище компаний, в которые уже были отправлены заявки
+        if self.state_store is None:
+            self.state_store = create_state_store(Path("data_folder/output"))
+        self.answer_index = AnswerIndex(self._load_questions_from_json())
         logger.debug("Параметры успешно установлены")
     
     def set_advanced_search_params(self) -> None:
-        """Задать дополнительные параметры поиска в hh.ru"""
+        """
+        Задать дополнительные параметры поиска в hh.ru. Если это возможно -
+        сразу открыть выдачу по ссылке, построенной из настроек, иначе
+        заполнить форму расширенного поиска
+        """
+        search_url_builder = SearchUrlBuilder(self.parameters, Path("data_folder/output") / "search_url.json")
+        if SEARCH_URL_BUILDER:
+            search_url = search_url_builder.load_cached()
+            if search_url is None:
+                search_url = search_url_builder.build(self._find_resume_id())
+                if search_url is not None:
+                    search_url_builder.save(search_url)
+            else:
+                logger.debug("Ссылка на выдачу взята из кэша")
+            if search_url is not None:
+                self.search_url = search_url
+                self.driver.get(search_url)
+                self.first_page_opened = True
+                logger.debug(f"Переходим к выдаче по ссылке {search_url}")
+                return
+
         self._enter_advanced_search_menu()
         keywords_element = ("xpath", "//*[@data-qa='vacancysearch__keywords-input']")
         self.wait.until(EC.visibility_of_element_located(keywords_element))
@@ -98,6 +195,13 @@ class JobManager:
         except TimeoutOccurred:
             pass
         self._start_search()
+        if SEARCH_URL_BUILDER:
+            # запомнить ссылку на выдачу, чтобы в следующий раз не заполнять форму
+            try:
+                self.wait.until(EC.url_contains("/search/vacancy"))
+                search_url_builder.save(self.driver.current_url)
+            except TimeoutException:
+                logger.warning("Не дождались перехода к выдаче, ссылка на нее не сохранена")
 
         
     def set_gpt_answerer(self, gpt_answerer: Any):
@@ -109,6 +213,9 @@ class JobManager:
     
     def start_applying(self) -> None:
         """Разослать отклики всем работодателям на всех страницах"""
+        if self.search_url is not None:
+            self._apply_on_search_pages()
+            return
         while True:
             try:
                 # идем по всем страницам пока они не закончатся
@@ -130,6 +237,39 @@ class JobManager:
                 logger.error(f"Неизвестная ошибка: {tb_str}")
                 continue
     
+    def _apply_on_search_pages(self) -> None:
+        """Переходить по страницам выдачи по ссылке с номером страницы, пока они не закончатся"""
+        while True:
+            try:
+                logger.debug(f"Переходим на страницу {self.page_num}")
+                is_opened = self.page_num == 1 and self.first_page_opened
+                self.first_page_opened = False
+                if not self.apply_on_search_page(search_page_url(self.search_url, self.page_num - 1), is_opened):
+                    break
+            except Exception:
+                tb_str = traceback.format_exc()
+                logger.error(f"Неизвестная ошибка: {tb_str}")
+            self.page_num += 1
+
+    def apply_on_search_page(self, page_url: str, is_opened: bool = False) -> bool:
+        """
+        Открыть страницу выдачи и разослать отклики всем работодателям на ней.
+        Если is_opened, страница уже загружена в браузере и не открывается заново.
+        Возвращает False, если на странице нет вакансий
+        """
+        if not is_opened:
+            self.driver.get(page_url)
+        try:
+            self.wait.until(EC.visibility_of_element_located(
+                ("xpath", "//*[starts-with(@data-qa, 'serp-item__title-text')]")))
+        except TimeoutException:
+            logger.debug(f"На странице {page_url} нет вакансий")
+            return False
+        self._send_repsonses()
+        # делать случайную паузу на каждой странице
+        self._sleep((20, 40))
+        return True
+
     def apply_job(self, job: Dict[str, str]) -> None:
         """Откликнусться на вакансию"""
         self.gpt_answerer.set_job(job)
@@ -138,228 +278,317 @@ class JobManager:
         if len(respnose_buttons) == 0:
             logger.debug(f"Не нашли кнопку отклика, видимо вы уже откликались на вакансию {job["company_name"]}")
         else:
+            # начать писать сопроводительное письмо сразу, пока браузер занят откликом,
+            # если оно не было начато заранее во время паузы
+            cover_letter_future = self.pending_cover_letters.pop(job["description"], None)
+            if cover_letter_future is None:
+                cover_letter_future = self._submit_cover_letter(job)
+            if self.coordinator is not None:
+                self.pacing.wait_until(self.coordinator.reserve_turn())
             respnose_buttons[0].click()
             self._find_and_handle_questions()
-            self._write_and_send_cover_letter()
+            self._write_and_send_cover_letter(cover_letter_future)
         self._pause()
 
     def _scroll_slow(self, element: WebElement, current_position: int, time_to_scroll_sec: float = 2) -> int:
-        """Медленно скроллить страницу, пока не дойдем до элемента"""
-        # Get the element's position on the page
-        element_position = element.location['y']
-
-        # определить размер шага, необходимый для того, чтобы
-        # доскроллить до элемента за время time_to_scroll_sec
-        sleep_time = 0.01
-        distance = abs(current_position - element_position)
-        step_num = time_to_scroll_sec // sleep_time + 1
-        step = distance // step_num + 1
-        
-        # медленно скроллим до нужного нам элемента
-        if current_position < element_position:
-            while current_position < element_position - 30:
-                current_position += step
-                self.driver.execute_script(f"window.scrollTo(0, {current_position});")
-                time.sleep(sleep_time)
-        else:
-            while current_position > element_position + 30:
-                current_position -= step
-                self.driver.execute_script(f"window.scrollTo(0, {current_position});")
-                time.sleep(sleep_time) 
-        
-        time.sleep(0.5)
-        return current_position
+        """
+        Медленно скроллить страницу, пока не дойдем до элемента. Вся анимация
+        выполняется внутри страницы за один запрос к браузеру, поэтому начальная
+        позиция берется со страницы, а current_position нужен только для лога
+        """
+        position = self.driver.execute_async_script(
+            SMOOTH_SCROLL_SCRIPT, element, int(time_to_scroll_sec * 1000), 30)
+        logger.debug(f"Проскроллили страницу с позиции {current_position} до {position}")
+        self.pacing.pause(0.5)
+        return position if position is not None else current_position
     
     def _send_repsonses(self) -> None:
         """Разослать отклики всем работодателям на странице"""
         self.current_position = 0
-        minimum_page_time = time.time() + MINIMUM_WAIT_TIME_SEC
-        employers = self.driver.find_elements("xpath", "//*[starts-with(@data-qa, 'serp-item__title-text')]")
-        for employer in employers:
-            # зайти на страницу к работодателю
-            self.current_position = self._scroll_slow(employer, self.current_position)
-            employer.click()
-            self._pause()
-            window_handles = self.driver.window_handles
-            self.driver.switch_to.window(window_handles[-1])
-            # собрать описание вакансии
-            job = self._scrape_employer_page()
-            company_name = job["company_name"]
-            company_name = self._sanitize_text(company_name)
-            company_job_title = job["title"]
-            company_job_title = self._sanitize_text(company_job_title)
-            logger.debug(f"Найдена вакансия {company_job_title}")
-            # если вакансия еще не встречалась и компания не в черном списке 
-            # - начать процесс отклика на вакансию
-            if not self._is_blacklisted(company_name) and \
-                not self._is_already_applied_to_job_or_company(company_name, company_job_title):
-                # добавить информацию об отклике для последующей записи в JSON файл
-                my_company = self.companies[self.login][self.job_title]
-                if company_name in my_company:
-                    my_company[company_name].append(company_job_title)
-                else:
-                    my_company[company_name] = [company_job_title]
-                # откликнуться на вакансию
-                self.apply_job(job)
-                # записать информацию об отклике в JSON файл
-                self._save_company_to_json()
-            # вернуться обратно на страницу поиска
-            self.driver.close()
-            self._pause()
-            self.driver.switch_to.window(window_handles[0])
+        minimum_page_time = time.monotonic() + MINIMUM_WAIT_TIME_SEC
+        # в режиме "performance" вакансии открываются в новых вкладках, чтобы блокировка ресурсов
+        # включалась в них до загрузки страницы (вкладка, открытая кликом, начинает загрузку сразу)
+        if PREFETCH_VACANCIES > 0 or HTTP_VACANCY_SCRAPER or BROWSER_MODE == "performance":
+            self._send_responses_with_prefetch()
+        else:
+            employers = self.driver.find_elements("xpath", "//*[starts-with(@data-qa, 'serp-item__title-text')]")
+            for employer in employers:
+                commands_snapshot = self._commands_snapshot()
+                # зайти на страницу к работодателю
+                self.current_position = self._scroll_slow(employer, self.current_position)
+                employer.click()
+                self._pause()
+                window_handles = self.driver.window_handles
+                self.driver.switch_to.window(window_handles[-1])
+                # собрать описание вакансии и откликнуться на нее
+                job = self._scrape_employer_page()
+                self._process_vacancy(job)
+                # вернуться обратно на страницу поиска
+                self.driver.close()
+                self._pause()
+                self.driver.switch_to.window(window_handles[0])
+                self._log_vacancy_commands(commands_snapshot)
         # если страница была обработана быстрее, чем за минимальное время - 
         # подождать, пока это время не закончится       
-        time_left = int(minimum_page_time - time.time())
+        logger.info(f"Готовые ответы: {self.answer_index.stats()}")
+        logger.info(f"Паузы: {self.pacing.stats()}")
+        logger.info(f"Кэш ответов LLM: {self.gpt_answerer.cache_stats()}")
+        if self.vacancy_commands:
+            logger.info(f"Команд WebDriver на вакансию в среднем: "
+                        f"{round(sum(self.vacancy_commands) / len(self.vacancy_commands), 1)}")
+            self.vacancy_commands = []
+        # сохранить историю откликов во время паузы между страницами
+        self.pacing.submit_idle("сохранение истории откликов", self.state_store.flush)
+        if LLM_METRICS_FILE:
+            self.pacing.submit_idle("выгрузка метрик LLM", lambda: llm_metrics.write_textfile(Path(LLM_METRICS_FILE)))
+        time_left = int(minimum_page_time - time.monotonic())
         if time_left > 0:
             self._sleep((time_left, time_left + 5))
+
+    def _send_responses_with_prefetch(self) -> None:
+        """
+        Разослать отклики всем работодателям на странице, заранее открывая
+        следующие вакансии из выдачи в фоновых вкладках. Если включено чтение
+        вакансий по HTTP - вакансии читаются параллельно без браузера, а вкладки
+        открываются только для тех, на которые нужно откликнуться
+        """
+        search_window = self.driver.current_window_handle
+        vacancy_cards = self._read_vacancy_cards()
+        # вакансии, на которые уже откликались, отсеять еще по карточкам в выдаче
+        vacancy_cards = [card for card in vacancy_cards
+                         if self._is_new_vacancy(card["company_name"], card["title"])]
+        logger.debug(f"Найдено новых вакансий на странице: {len(vacancy_cards)}")
+        scraped_jobs = self._scrape_vacancies_over_http(vacancy_cards) if HTTP_VACANCY_SCRAPER else {}
+        urls = []
+        for card in vacancy_cards:
+            job = scraped_jobs.get(card["url"])
+            # прочитанные по HTTP вакансии проверить еще раз по данным со страницы вакансии
+            if job is None or self._is_new_vacancy(job["company_name"], job["title"]):
+                urls.append(card["url"])
+        blocked_url_patterns = BLOCKED_URL_PATTERNS if BROWSER_MODE == "performance" else []
+        prefetcher = VacancyPrefetcher(self.driver, urls, PREFETCH_VACANCIES, blocked_url_patterns)
+        # вкладка обрабатываемой вакансии (ее уже нет среди вкладок prefetcher)
+        vacancy_window = None
+        try:
+            for url, handle in prefetcher:
+                commands_snapshot = self._commands_snapshot()
+                vacancy_window = handle
+                self.driver.switch_to.window(handle)
+                logger.debug(f"Переходим к заранее открытой вакансии {url}")
+                job = scraped_jobs.get(url)
+                if job is None:
+                    job = self._scrape_employer_page()
+                self._process_vacancy(job)
+                # закрыть вкладку и вернуться обратно на страницу поиска
+                self.driver.close()
+                vacancy_window = None
+                self.driver.switch_to.window(search_window)
+                # во время паузы открыть следующую вкладку и начать письмо для следующей вакансии
+                self.pacing.submit_idle("открытие следующей вакансии", prefetcher.fill)
+                next_urls = urls[urls.index(url) + 1:]
+                if next_urls and scraped_jobs.get(next_urls[0]) is not None:
+                    next_job = scraped_jobs[next_urls[0]]
+                    self.pacing.submit_idle("сопроводительное письмо для следующей вакансии",
+                                            lambda job=next_job: self._start_cover_letter(job))
+                self._pause()
+                self._log_vacancy_commands(commands_snapshot)
+        finally:
+            if vacancy_window is not None:
+                # обработка вакансии прервалась ошибкой - закрыть ее вкладку
+                try:
+                    self.driver.switch_to.window(vacancy_window)
+                    self.driver.close()
+                except WebDriverException:
+                    pass
+            self.driver.switch_to.window(search_window)
+            prefetcher.close()
+            self._cancel_pending_cover_letters()
+            if self.http_scraper is not None:
+                self.http_scraper.close()
+                self.http_scraper = None
+
+    def _commands_snapshot(self) -> Optional[Counter]:
+        """Текущие значения счетчика команд браузеру (None, если команды не считаются)"""
+        return self.command_counter.snapshot() if self.command_counter is not None else None
+
+    def _log_vacancy_commands(self, snapshot: Optional[Counter]) -> None:
+        """Записать, сколько команд браузеру потребовала обработка вакансии"""
+        if self.command_counter is None:
+            return
+        commands = self.command_counter.since(snapshot)
+        total = sum(commands.values())
+        self.vacancy_commands.append(total)
+        logger.debug(f"Команд WebDriver на вакансию: {total} {commands}")
+
+    def _start_cover_letter(self, job: Dict[str, str]) -> None:
+        """
+        Заранее начать писать сопроводительное письмо для вакансии. Письмо
+        оплачивается, поэтому оно не пишется для вакансии, которая будет
+        пропущена: компания в черном списке, отклик уже был (в том числе
+        на только что обработанную вакансию той же компании) или на нее
+        откликается другой браузер
+        """
+        if not job["description"] or job["description"] in self.pending_cover_letters:
+            return
+        if not self._is_new_vacancy(job.get("company_name"), job.get("title")):
+            return
+        if self.coordinator is not None and self.coordinator.is_claimed(
+                self._sanitize_text(job.get("company_name") or ""), self._sanitize_text(job.get("title") or "")):
+            return
+        self.pending_cover_letters[job["description"]] = self._submit_cover_letter(job)
+
+    def _cancel_pending_cover_letters(self) -> None:
+        """Отменить заранее начатые письма, которые уже не понадобятся"""
+        for cover_letter in self.pending_cover_letters.values():
+            # письмо, которое уже пишется обычным запросом, дописывается, но не используется
+            cover_letter.cancel()
+        self.pending_cover_letters.clear()
+
+    def _submit_cover_letter(self, job: Dict[str, str]) -> Union[Future, TextStream]:
+        """
+        Запустить генерацию сопроводительного письма в фоне. При STREAM_COVER_LETTER
+        письмо можно вводить по абзацам, не дожидаясь окончания генерации
+        """
+        if not STREAM_COVER_LETTER:
+            return self.llm_executor.submit(
+                self.gpt_answerer.write_cover_letter, job["description"], vacancy_label(job))
+        stream = TextStream()
+        self.llm_executor.submit(self._stream_cover_letter, job, stream)
+        return stream
+
+    def _stream_cover_letter(self, job: Dict[str, str], stream: TextStream) -> None:
+        """Писать сопроводительное письмо в поток по абзацам"""
+        if stream.cancelled:
+            return
+        streamed = False
+        try:
+            for paragraph in self.gpt_answerer.stream_cover_letter(job["description"], vacancy_label(job)):
+                if stream.cancelled:
+                    logger.debug("Сопроводительное письмо больше не нужно, прекращаем его писать")
+                    return
+                stream.put(paragraph)
+                streamed = True
+        except Exception as e:
+            if streamed or stream.cancelled:
+                stream.finish(e)
+                return
+            # пока ничего не получено - написать письмо обычным запросом с повторами при ошибках
+            logger.warning(f"Не удалось получить сопроводительное письмо по частям, пишем целиком: {str(e)}")
+            try:
+                stream.put(self.gpt_answerer.write_cover_letter(job["description"], vacancy_label(job)))
+            except Exception as e:
+                stream.finish(e)
+                return
+        stream.finish()
+
+    def _scrape_vacancies_over_http(self, vacancy_cards: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        """Параллельно прочитать вакансии по HTTP с cookies текущей сессии браузера"""
+        self.http_scraper = HttpVacancyScraper.from_driver(self.driver)
+        futures = [(card["url"], self.http_scraper.submit(card["url"])) for card in vacancy_cards]
+        scraped_jobs = {}
+        for url, future in futures:
+            try:
+                scraped_jobs[url] = future.result()
+            except Exception as e:
+                logger.warning(f"Не удалось прочитать вакансию {url} по HTTP, читаем ее через браузер: {str(e)}")
+                scraped_jobs[url] = None
+        return scraped_jobs
+
+    def _read_vacancy_cards(self) -> List[Dict[str, str]]:
+        """Прочитать ссылки, названия и компании всех вакансий со страницы выдачи"""
+        cards = self.driver.execute_script("""
+            return Array.from(document.querySelectorAll("[data-qa^='serp-item__title-text']")).map(title => {
+                const link = title.closest('a') || title.querySelector('a');
+                const card = title.closest("[data-qa^='vacancy-serp__vacancy']") || title.parentElement;
+                const company = card && card.querySelector("[data-qa='vacancy-serp__vacancy-employer']");
+                return {
+                    url: link ? link.href : '',
+                    title: title.innerText || '',
+                    company_name: company ? company.innerText : '',
+                };
+            });
+        """) or []
+        return [card for card in cards if card.get("url")]
+
+    def _is_new_vacancy(self, company_name: str, company_job_title: str) -> bool:
+        """Проверить, что вакансия еще не встречалась и компания не в черном списке"""
+        company_name = self._sanitize_text(company_name or "")
+        company_job_title = self._sanitize_text(company_job_title or "")
+        return not self._is_blacklisted(company_name) and \
+            not self._is_already_applied_to_job_or_company(company_name, company_job_title)
+
+    def _process_vacancy(self, job: Dict[str, str]) -> None:
+        """Откликнуться на вакансию, если она еще не встречалась и компания не в черном списке"""
+        company_name = job["company_name"]
+        company_name = self._sanitize_text(company_name)
+        company_job_title = job["title"]
+        company_job_title = self._sanitize_text(company_job_title)
+        logger.debug(f"Найдена вакансия {company_job_title}")
+        # если вакансия еще не встречалась и компания не в черном списке 
+        # - начать процесс отклика на вакансию
+        if not self._is_blacklisted(company_name) and \
+            not self._is_already_applied_to_job_or_company(company_name, company_job_title):
+            # на эту же вакансию может одновременно откликаться другой браузер
+            if self.coordinator is not None and \
+                    not self.coordinator.claim_vacancy(company_name, company_job_title):
+                logger.debug("На вакансию уже откликается другой браузер, пропускаем")
+                return
+            self.attempted_vacancies.setdefault(company_name, []).append(company_job_title)
+            try:
+                # откликнуться на вакансию
+                self.apply_job(job)
+                # записать информацию об отклике в хранилище
+                self._save_company_to_json(company_name, company_job_title)
+            except Exception:
+                if self.coordinator is not None:
+                    self.coordinator.release_vacancy(company_name, company_job_title)
+                raise
                 
     def _scrape_employer_page(self) -> Dict[str, str]:
         """
         Собрать всю информацию о работодателе со страницы
-        для дальнейшей передачи в LLM
+        для дальнейшей передачи в LLM. Все поля собираются
+        одним скриптом, т.е. за один запрос к браузеру
         """
-        job = {}
-
-        description_keys = [
-            "title", "salary", "experience", "job_type", "company_name", 
-            "company_address", "company_address", "description",
-            "description", "skills"
-            ]
-        data_qas = [
-            "vacancy-title", "vacancy-salary-compensation-type-net", "vacancy-experience",
-            "vacancy-view-employment-mode", "vacancy-company-name",
-            "vacancy-view-raw-address", "vacancy-view-location", "vacancy-branded", 
-            "vacancy-description", "skills-element"
-            ]
         self.wait.until(EC.visibility_of_element_located(("xpath", "//*[@data-qa='vacancy-title']")))
-        for key, data_qa in zip(description_keys, data_qas):
-            if key == "skills":
-                skill_list = self.driver.find_elements("xpath", f"//*[@data-qa='{data_qa}']")
-                skill_list = [skill.text for skill in skill_list]
-                job["skills"] = ', '.join(skill_list)
-                continue
-            if key in ["company_address", "description"] and job.get(key) is not None:
-                continue
-            try:
-                job[key] = self.driver.find_element("xpath", f"//*[@data-qa='{data_qa}']").text
-            except NoSuchElementException:
-                job[key] = None
-            logger.debug("Информация со страницы работодателя успешно собрана")
+        job = self.driver.execute_script(VACANCY_EXTRACT_SCRIPT, VACANCY_FIELDS)
+        logger.debug("Информация со страницы работодателя успешно собрана")
         return job
 
-    @staticmethod
-    def _define_answers_output_file(filename: str) -> Path:
-        """Определить путь к выходному файлу"""
-        try:
-            output_file = os.path.join(
-                Path("data_folder/output"), filename)
-            logger.debug(f"Определен путь к выходному файлу: {output_file}")
-        except Exception as e:
-            logger.error(f"Ошибка в определении расположения лог-файла: {str(e)}")
-            raise
-        return output_file
-    
-    def _save_company_to_json(self) -> None:
-        """Сохранить уже просмотренные компании и их вакансии в файл"""
-        output_file = self._define_answers_output_file("companies.json")
-        logger.debug(f"Сохраняем данные о вакансии в JSON")
+    def _save_company_to_json(self, company_name: str, company_job_title: str) -> None:
+        """Сохранить отклик на вакансию компании в хранилище"""
+        logger.debug(f"Сохраняем данные о вакансии в хранилище")
         try:
-            try:
-                with open(output_file, 'r') as f:
-                    try:
-                        data = json.load(f)
-                        if not isinstance(data, dict):
-                            raise ValueError("Формат файла JSON неверный, ожидаем словарь")
-                    except json.JSONDecodeError:
-                        logger.error("Декодирование JSON файла завершено с ошибкой")
-            except FileNotFoundError:
-                logger.warning("JSON файл не найден, создаем новый словарь")
-            with open(output_file, 'w') as f:
-                json.dump(self.companies, f, indent=4)
-            logger.debug("Данные о компании и ее вакансии успешно сохранены в JSON файл")
+            self.state_store.save_company(self.login, self.job_title, company_name, company_job_title)
+            logger.debug("Данные о компании и ее вакансии успешно сохранены в хранилище")
         except Exception:
             tb_str = traceback.format_exc()
-            logger.error(f"Ошибка при сохранении информации о просмотренных компаниях в JSON файл")
-            raise Exception(f"Ошибка при сохранении информации о просмотренных компаниях в JSON: \nTraceback:\n{tb_str}")
+            logger.error(f"Ошибка при сохранении информации о просмотренных компаниях в хранилище")
+            raise Exception(f"Ошибка при сохранении информации о просмотренных компаниях в хранилище: \nTraceback:\n{tb_str}")
         
-    def _load_companies_from_json(self) -> List[dict]:
-        """Загрузить файл c уже просмотренными компаниями и их вакансиями"""
-        output_file = self._define_answers_output_file("companies.json")
-        logger.debug(f"Loading companies from JSON file: {output_file}")
-        try:
-            with open(output_file, 'r') as f:
-                try:
-                    data = json.load(f)
-                    if not isinstance(data, dict):
-                        raise ValueError("Формат файла JSON неверный, ожидаем словарь")
-                except json.JSONDecodeError:
-                    logger.error("Декодирование JSON файла завершено с ошибкой")
-                    data = {self.login: {self.job_title: {}}}
-            logger.debug("Данные о компаниях и ее вакансиях успешно загружены из JSON")
-            if self.login not in data:
-                data[self.login] = {}
-            if self.job_title not in data[self.login]:
-                data[self.login][self.job_title] = {}
-            logger.debug("Информация о компаниях загружена успешно из JSON файла")
-            return data
-        except FileNotFoundError:
-            data = {self.login: {self.job_title: {}}}
-            logger.warning("JSON файл не найден, возвращаем пустой словарь")
-            return data
-        except Exception:
-            tb_str = traceback.format_exc()
-            logger.error(f"Ошибка при загрузке информации о просмотренных компаниях в JSON")
-            raise Exception(f"Ошибка при загрузке информации о просмотренных компаниях в JSON: \nTraceback:\n{tb_str}")
-    
     def _save_questions_to_json(self, question_data: dict) -> None:
-        """Сохранить вопрос в файл"""
-        output_file = self._define_answers_output_file("answers.json")
+        """Сохранить вопрос в хранилище"""
         question_data['question'] = self._sanitize_text(question_data['question'])
-        logger.debug(f"Saving question data to JSON: {question_data}")
+        logger.debug(f"Saving question data to store: {question_data}")
         try:
-            try:
-                with open(output_file, 'r') as f:
-                    try:
-                        data = json.load(f)
-                        if not isinstance(data, list):
-                            raise ValueError("Формат файла JSON неверный, ожидаем список вопросов")
-                    except json.JSONDecodeError:
-                        logger.error("Декодирование JSON файла завершено с ошибкой")
-                        data = []
-            except FileNotFoundError:
-                logger.warning("JSON файл не найден, возвращаем пустой словарь")
-                data = []
-            data.append(question_data)
-            with open(output_file, 'w') as f:
-                json.dump(data, f, indent=4)
-            logger.debug("Новый вопрос успешно сохранен в JSON файл")
+            self.state_store.save_question(question_data)
+            logger.debug("Новый вопрос успешно сохранен в хранилище")
         except Exception:
             tb_str = traceback.format_exc()
-            logger.error(f"Ошибка при сохранении списка вопросов в JSON файл")
-            raise Exception(f"Ошибка при сохранении списка вопросов в JSON файл: \nTraceback:\n{tb_str}")
+            logger.error(f"Ошибка при сохранении списка вопросов в хранилище")
+            raise Exception(f"Ошибка при сохранении списка вопросов в хранилище: \nTraceback:\n{tb_str}")
         
     def _load_questions_from_json(self) -> List[dict]:
-        """Загрузить файл с уже готовыми ответами на вопросы"""
-        output_file = self._define_answers_output_file("answers.json")
-        logger.debug(f"Loading questions from JSON file: {output_file}")
+        """Загрузить из хранилища уже готовые ответы на вопросы"""
+        logger.debug(f"Загружаем готовые ответы из хранилища")
         try:
-            with open(output_file, 'r') as f:
-                try:
-                    data = json.load(f)
-                    if not isinstance(data, list):
-                        raise ValueError("Формат файла JSON неверный, ожидаем список вопросов")
-                except json.JSONDecodeError:
-                    logger.error("Декодирование JSON файла завершено с ошибкой")
-                    data = []
-            logger.debug("Список вопросов успешно загружен из JSON файла")
+            data = self.state_store.load_questions()
+            logger.debug("Список вопросов успешно загружен из хранилища")
             return data
-        except FileNotFoundError:
-            logger.warning("JSON файл не найден, возвращаем пустой список")
-            return []
         except Exception:
             tb_str = traceback.format_exc()
-            logger.error(f"Ошибка при загрузке списка вопросов из JSON файла")
-            raise Exception(f"Ошибка при загрузке списка вопросов из JSON файла: \nTraceback:\n{tb_str}")
+            logger.error(f"Ошибка при загрузке списка вопросов из хранилища")
+            raise Exception(f"Ошибка при загрузке списка вопросов из хранилища: \nTraceback:\n{tb_str}")
         
     def _find_and_handle_questions(self) -> None:
         """Если на странице есть вопросы - использовать LLM для ответа на них"""
@@ -371,21 +600,35 @@ class JobManager:
         questions = self.driver.find_elements(*question_element)
         if questions:
             logger.debug("Нашли вопрос(ы).")
+            # сразу запустить генерацию ответов на все вопросы,
+            # а вводить ответы по мере их готовности
+            pending_questions = []
             for question in questions:
-                self._find_and_handle_textbox_question(question)
+                text_question_fields = question.find_elements("tag name", 'textarea')
+                if not text_question_fields:
+                    logger.debug("Не найдено текстовое поле для ответа на вопрос")
+                    continue
+                question_text = question.text.lower().strip()
+                logger.debug(f"Нашли текстовый вопрос: {question_text}")
+                pending_questions.append((question_text, text_question_fields[0]))
+            answer_futures = self._request_answers([question_text for question_text, _ in pending_questions])
+            for (question_text, text_field), answer_future in zip(pending_questions, answer_futures):
+                self._handle_textbox_question(question_text, text_field, answer_future)
         else:
             logger.debug("Вопросы не найдены.")
 
-    def _write_and_send_cover_letter(self) -> None:
-        """Написать и отправить работодателю сопроводительное письмо"""
-        cover_letter_text = self.gpt_answerer.write_cover_letter()
+    def _write_and_send_cover_letter(self, cover_letter_future: Union[Future, TextStream]) -> None:
+        """
+        Отправить работодателю сопроводительное письмо. Письмо генерируется
+        в фоне, его готовности ждем только перед вводом текста
+        """
         cover_letter_field = self.driver.find_elements("xpath", "//*[@data-qa='vacancy-response-popup-form-letter-input']")
         # если удалось найти форму для ввода сопроводительного письма - отправить его туда 
         if cover_letter_field:
             logger.debug("Найдена форма для ввода сопроводительного письма")
             cover_letter_field = cover_letter_field[0]
             position = self._scroll_slow(cover_letter_field, 0)
-            self._enter_text(cover_letter_field, cover_letter_text)
+            self._enter_cover_letter(cover_letter_field, cover_letter_future)
             # нажать на кнопку отклика
             response_button = self.driver.find_element("xpath", "//*[@data-qa='vacancy-response-submit-popup']")
             self._scroll_slow(response_button, position)
@@ -403,7 +646,7 @@ class JobManager:
                 # записать в поле текст сопроводительного письма
                 cover_letter_field = self.driver.find_element("xpath", f"//*[@data-qa='vacancy-response-letter-informer']")
                 cover_letter_text_field = cover_letter_field.find_element("tag name", 'textarea')
-                self._enter_text(cover_letter_text_field, cover_letter_text)
+                self._enter_cover_letter(cover_letter_text_field, cover_letter_future)
                 logger.debug("Сопроводительное письмо успешно отправлено")
             else:
                 logger.debug("Ищем чат с работодателем")
@@ -421,47 +664,96 @@ class JobManager:
                         # послать в чат сопроводительное письмо
                         logger.debug("Отправляем сопроводительное письмо в чат")
                         text_field = self.driver.find_element("xpath", f"//*[@data-qa='chatik-new-message-text']")
-                        self._enter_text(text_field, cover_letter_text)
+                        self._enter_text(text_field, cover_letter_future.result())
                         self._pause()
                         text_field.send_keys(Keys.ENTER)
                         logger.debug("Сопроводительное письмо успешно отправлено")
                         break
                 self.driver.switch_to.default_content()
                 
-    def _find_and_handle_textbox_question(self, question: WebElement) -> bool:
-        """Функция для поиска в резюме ответа и собственно ответа на вопросы работодателя"""
-        text_question_fields = question.find_elements("tag name", 'textarea')
-        if text_question_fields:
-            question_text = question.text.lower().strip()
-            logger.debug(f"Нашли текстовый вопрос: {question_text}")
-            text_field = text_question_fields[0]
-
-            # Look for existing answer if it's not a cover letter field
-            existing_answer = None
-            for answer in self.seen_answers:
-                if self._sanitize_text(answer['question']) == self._sanitize_text(question_text):
-                    existing_answer = answer['answer']
-                    logger.debug(f"Найден готовый ответ: {existing_answer}")
-                    break
+    def _enter_cover_letter(self, element: WebElement, cover_letter: Union[Future, TextStream]) -> None:
+        """Ввести сопроводительное письмо; письмо из потока вводится по абзацам по мере генерации"""
+        if not isinstance(cover_letter, TextStream):
+            self._enter_text(element, cover_letter.result())
+            return
+        element.clear()
+        for paragraph in cover_letter:
+            logger.debug(f"Вводим абзац письма: {paragraph}")
+            element.send_keys(paragraph)
+
+    def _request_answer(self, question_text: str) -> Future:
+        """
+        Найти готовый ответ на вопрос или запустить его генерацию в фоне.
+        Результат - пара (ответ, сгенерирован ли ответ LLM)
+        """
+        existing_answer = self.answer_index.find(question_text)
+        if existing_answer:
+            logger.debug(f"Используем готовый ответ: {existing_answer}")
+            answer_future = Future()
+            answer_future.set_result((existing_answer, False))
+            return answer_future
+        return self.llm_executor.submit(
+            lambda: (self.gpt_answerer.answer_question_textual_wide_range(question_text), True))
 
+    def _request_answers(self, question_texts: List[str]) -> List[Future]:
+        """
+        Запустить генерацию ответов на вопросы вакансии. Если новых вопросов
+        несколько, они отправляются в LLM одним запросом (BATCH_QUESTIONS)
+        """
+        answer_futures = {}
+        new_questions = []
+        for question_text in question_texts:
+            existing_answer = self.answer_index.find(question_text)
             if existing_answer:
-                answer = existing_answer
-                logger.debug(f"Используем готовый ответ: {answer}")
-            else:
-                answer = self.gpt_answerer.answer_question_textual_wide_range(question_text)
-                logger.debug(f"Сгенерирован ответ: {answer}")
+                logger.debug(f"Используем готовый ответ: {existing_answer}")
+                answer_futures[question_text] = Future()
+                answer_futures[question_text].set_result((existing_answer, False))
+            elif question_text not in new_questions:
+                new_questions.append(question_text)
+        if BATCH_QUESTIONS and len(new_questions) > 1:
+            batch_futures = {question_text: Future() for question_text in new_questions}
+            batch = self.llm_executor.submit(self.gpt_answerer.answer_questions_batch, new_questions)
+            batch.add_done_callback(lambda future: self._resolve_batch_answers(future, batch_futures))
+            answer_futures.update(batch_futures)
+        else:
+            for question_text in new_questions:
+                answer_futures[question_text] = self._request_answer(question_text)
+        return [answer_futures[question_text] for question_text in question_texts]
 
-            # Save non-cover letter answers
-            self._save_questions_to_json({'question': question_text, 'answer': answer})
-            logger.debug("Тестовый вопрос сохранен в JSON.")
+    def _resolve_batch_answers(self, batch: Future, answer_futures: Dict[str, Future]) -> None:
+        """Передать ответы из пакетного запроса, а на вопросы без ответа запустить генерацию по одному"""
+        try:
+            answers = batch.result()
+        except Exception:
+            tb_str = traceback.format_exc()
+            logger.error(f"Ошибка пакетного запроса ответов на вопросы: {tb_str}")
+            answers = {}
+        for question_text, answer_future in answer_futures.items():
+            answer = answers.get(question_text)
+            if answer:
+                answer_future.set_result((answer, True))
+                continue
+            logger.debug(f"Нет ответа в пакетном запросе, спрашиваем отдельно: {question_text}")
+            fallback = self.llm_executor.submit(
+                lambda question_text=question_text: (
+                    self.gpt_answerer.answer_question_textual_wide_range(question_text), True))
+            fallback.add_done_callback(lambda future, answer_future=answer_future: (
+                answer_future.set_exception(future.exception()) if future.exception()
+                else answer_future.set_result(future.result())))
 
-            time.sleep(1)
-            self._enter_text(text_field, answer)
-            logger.debug("Ответ введен в textbox")
-            return True
+    def _handle_textbox_question(self, question_text: str, text_field: WebElement, answer_future: Future) -> None:
+        """Дождаться ответа на вопрос работодателя и ввести его в текстовое поле"""
+        answer, is_generated = answer_future.result()
+        if is_generated:
+            logger.debug(f"Сгенерирован ответ: {answer}")
+            # сохранить новый ответ в хранилище и в индекс
+            self._save_questions_to_json({'question': question_text, 'answer': answer})
+            self.answer_index.add(question_text, answer)
+            logger.debug("Тестовый вопрос сохранен в хранилище.")
 
-        logger.debug("Не найдено вопросов от работодателя")
-        return False
+        self.pacing.pause(1)
+        self._enter_text(text_field, answer)
+        logger.debug("Ответ введен в textbox")
     
     def _is_blacklisted(self, company: str) -> bool:
         """Проверить, не находится ли компания в черном списке"""
@@ -471,16 +763,17 @@ class JobManager:
         return False
     
     def _is_already_applied_to_job_or_company(self, company: str, job: str) -> bool:
-        """Проверить, откликались ли мы уже на эту вакансию"""
-        my_companies = self.companies[self.login][self.job_title]
-        if company in my_companies:
-            if APPLY_ONCE_AT_COMPANY:
+        """Проверить, откликались ли мы уже на эту вакансию (или пытались за время работы)"""
+        if APPLY_ONCE_AT_COMPANY:
+            if company in self.attempted_vacancies or \
+                    self.state_store.is_company_seen(self.login, self.job_title, company):
                 logger.debug("Компания уже встречалась и задана настройка не подаваться "
                              "повторно в ту же компанию, пропускаем")
                 return True
-            if job in my_companies[company]:
-                logger.debug("Вакансия уже встречалась, пропускаем")
-                return True
+        elif job in self.attempted_vacancies.get(company, []) or \
+                self.state_store.is_job_seen(self.login, self.job_title, company, job):
+            logger.debug("Вакансия уже встречалась, пропускаем")
+            return True
         return False
     
     def _enter_text(self, element: WebElement, text: str) -> None:
@@ -488,25 +781,35 @@ class JobManager:
         element.clear()
         element.send_keys(text)
     
-    @staticmethod
-    def _pause(low: int = 1, high: int = 2) -> None:
+    def _pause(self, low: int = 1, high: int = 2) -> None:
         """
         Выдержать случайную паузу в диапазоне от 
         low секунд до high секунд. 
         Используется для имитации пользовательского поведения.
         """
         pause = round(random.uniform(low, high), 1)
-        time.sleep(pause)
+        self.pacing.pause(pause)
 
-    @staticmethod
-    def _sleep(sleep_interval: Tuple[int, int]) -> None:
+    def _sleep(self, sleep_interval: Tuple[int, int]) -> None:
         """Аналог _pause, но ожидание можно прервать"""
         low, high = sleep_interval
         sleep_time = random.randint(low, high)
+        deadline = time.monotonic() + sleep_time
+        if self.coordinator is not None:
+            # несколько браузеров не могут ждать ввода с одной консоли
+            self.pacing.wait_until(deadline)
+            logger.debug(f"Ожидание продлилось {sleep_time} секунд.")
+            return
+        # сначала выполнить накопившуюся фоновую работу, а оставшееся время ждать ввода
+        self.pacing.run_idle_tasks(deadline)
+        time_left = deadline - time.monotonic()
+        if time_left <= 0:
+            logger.debug(f"Ожидание продлилось {sleep_time} секунд.")
+            return
         try:
             user_input = inputimeout(
-                prompt=f"Делаем паузу на {round(sleep_time / 60, 2)} минут(ы). Нажмите Enter, чтобы прекратить ожидание.",
-                timeout=sleep_time).strip().lower()
+                prompt=f"Делаем паузу на {round(time_left / 60, 2)} минут(ы). Нажмите Enter, чтобы прекратить ожидание.",
+                timeout=time_left).strip().lower()
         except TimeoutOccurred:
             user_input = ''  # No input after timeout
         if user_input != '':
@@ -526,6 +829,23 @@ class JobManager:
         self.current_position = self._scroll_slow(element, self.current_position)
         element.click()
     
+    def _find_resume_id(self) -> str:
+        """Найти идентификатор резюме с названием из настроек, по нему hh.ru подбирает вакансии"""
+        self.driver.get("https://hh.ru/applicant/resumes")
+        resume_title_element = ("xpath", "//*[starts-with(@data-qa, 'resume-title-link')]")
+        try:
+            self.wait.until(EC.visibility_of_element_located(resume_title_element))
+        except TimeoutException:
+            logger.warning("Не дождались загрузки списка резюме")
+            return None
+        for resume_title in self.driver.find_elements(*resume_title_element):
+            if resume_title.text == self.job_title:
+                match = RESUME_ID_RE.search(resume_title.get_attribute("href") or "")
+                if match:
+                    return match.group(1)
+        logger.warning(f"Не смогли найти идентификатор резюме с именем {self.job_title}, ищем без резюме")
+        return None
+
     def _enter_advanced_search_menu(self) -> None:
         """Зайти на страницу с резюме, выбрать нужное и перейти через него к поиску вакансий"""
         self.driver.get("https://hh.ru/applicant/resumes")
@@ -808,7 +1128,6 @@ class JobManager:
 
     def _sanitize_text(self, text: str) -> str:
         """Очистить текст вопроса/ответа"""
-        sanitized_text = text.lower().strip().replace('"', '').replace('\\', '')
-        sanitized_text = re.sub(r'[\x00-\x1F\x7F]', '', sanitized_text).replace('\n', ' ').replace('\r', '').rstrip(',')
+        sanitized_text = sanitize_text(text)
         logger.debug(f"Очищенный текст: {sanitized_text}")
         return sanitized_text
\ No newline at end of file
@@ -0,0 +1,95 @@
+from typing import List
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from src.app_config import LLM_CALL_LOG_MAX_BYTES
+from loguru import logger
+
+# признак завершения работы для потока записи
+_STOP = object()
+
+
+class CallLogWriter:
+    """
+    Журнал запросов к LLM в формате JSONL (одна запись на строку).
+    Записи ставятся в очередь и пишутся в файл фоновым потоком пачками,
+    поэтому запрос к LLM не ждет диска. Когда файл становится больше
+    max_bytes, он переименовывается и сжимается в gzip. Очередь
+    дописывается в файл при завершении программы
+    """
+    def __init__(self, log_file: Path, max_bytes: int = LLM_CALL_LOG_MAX_BYTES, max_batch: int = 100):
+        self.log_file = Path(log_file)
+        self.max_bytes = max_bytes
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="llm-call-log", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, entry: dict) -> None:
+        """Поставить запись в очередь на запись в журнал"""
+        if self.closed:
+            self._write_batch([entry])
+            return
+        self.queue.put(entry)
+
+    def flush(self) -> None:
+        """Дождаться записи всех записей из очереди"""
+        self.queue.join()
+
+    def close(self) -> None:
+        """Дописать очередь и остановить поток записи"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_STOP)
+        self.thread.join(timeout=10)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            # забрать все, что накопилось, пока писалась предыдущая пачка
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            entries = [entry for entry in batch if entry is not _STOP]
+            try:
+                self._write_batch(entries)
+            except Exception as e:
+                logger.error(f"Не удалось записать журнал запросов к LLM: {str(e)}")
+            for _ in batch:
+                self.queue.task_done()
+            if len(entries) < len(batch):
+                return
+
+    def _write_batch(self, entries: List[dict]) -> None:
+        if not entries:
+            return
+        lines = "".join(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+                        for entry in entries)
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            f.write(lines)
+            size = f.tell()
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        """Переименовать заполненный файл журнала и сжать его"""
+        suffix = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = self.log_file.with_name(f"{self.log_file.stem}.{suffix}{self.log_file.suffix}")
+        os.replace(self.log_file, rotated)
+        with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+        logger.debug(f"Журнал запросов к LLM сохранен в {rotated}.gz")
@@ -1,15 +1,16 @@
+import asyncio
 import json
 import os
 import re
 import textwrap
+import threading
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
 from typing import Union
 
-import httpx
 from Levenshtein import distance
 from dotenv import load_dotenv
 from langchain_core.messages import BaseMessage
@@ -17,33 +18,76 @@ from langchain_core.messages.ai import AIMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompt_values import StringPromptValue
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
 import src.strings as strings
 from loguru import logger
 
-from src.app_config import LLM_MODEL_TYPE, LLM_MODEL, PRICE_DICT
+from src.app_config import (
+    LLM_MODEL_TYPE, LLM_MODEL, PRICE_DICT, LLM_CACHE_CHAINS, COVER_LETTER_EXAMPLES, LLM_ROUTES,
+    LLM_ROUTE_LATENCY_SLO_SEC, LLM_ROUTE_LATENCY_SLO_DEFAULT_SEC,
+)
+from src.llm.call_log import CallLogWriter
+from src.llm.metrics import llm_metrics, vacancy_label
+from src.llm.prompt_compactor import PromptCompactor, TokenCounter
+from src.llm.rate_limiter import get_rate_limiter
+from src.llm.resilience import ResilientCaller, is_retryable
+from src.llm.router import ChainRouter
+from src.llm.response_cache import LLMResponseCache, cache_key, render_prompt
+from src.llm.streaming import split_paragraphs
+from src.llm.section_classifier import SectionClassifier
 
 load_dotenv()
 
+# названия разделов резюме в ответе LLM
+SECTION_RE = re.compile(
+    r"(Personal information|Legal Authorization|Work Preferences|Education "
+    r"Details|Experience Details|Projects|Availability|Salary "
+    r"Expectations|Certifications|Languages|Interests|Cover letter)",
+    re.IGNORECASE)
+# максимальная длина ответа на вопрос работодателя из пакетного запроса
+MAX_BATCH_ANSWER_LENGTH = 1000
+# переменные окружения с ключами API провайдеров для моделей маршрутов (кроме провайдера LLM_MODEL_TYPE)
+LLM_API_KEY_ENV = {
+    "openai": "OPENAI_API_KEY",
+    "claude": "ANTHROPIC_API_KEY",
+    "gemini": "GOOGLE_API_KEY",
+    "huggingface": "HUGGINGFACEHUB_API_TOKEN",
+}
+
 
 class AIModel(ABC):
     @abstractmethod
     def invoke(self, prompt: str) -> str:
         pass
 
+    def stream(self, prompt: str) -> Iterator[BaseMessage]:
+        """Ответ модели по частям. Модели без потоковой передачи отдают ответ одной частью"""
+        yield self.invoke(prompt)
+
+    async def ainvoke(self, prompt: str) -> BaseMessage:
+        """Асинхронный запрос. Модели без асинхронного клиента выполняют invoke в отдельном потоке"""
+        return await asyncio.to_thread(self.invoke, prompt)
+
 
 class OpenAIModel(AIModel):
     """Получить доступ к модели OpenAI"""
     def __init__(self, api_key: str, llm_model: str):
         from langchain_openai import ChatOpenAI
         self.model = ChatOpenAI(model_name=llm_model, openai_api_key=api_key,
-                                temperature=0.4)
+                                temperature=0.4, stream_usage=True)
 
     def invoke(self, prompt: str) -> BaseMessage:
         logger.debug("Успешно получен доступ к модели через OpenAI API")
         response = self.model.invoke(prompt)
         return response
 
+    def stream(self, prompt: str) -> Iterator[BaseMessage]:
+        yield from self.model.stream(prompt)
+
+    async def ainvoke(self, prompt: str) -> BaseMessage:
+        return await self.model.ainvoke(prompt)
+
 
 class ClaudeModel(AIModel):
     """Получить доступ к модели Claude"""
@@ -57,6 +101,12 @@ class ClaudeModel(AIModel):
         logger.debug("Успешно получен доступ к модели через Claude API")
         return response
 
+    def stream(self, prompt: str) -> Iterator[BaseMessage]:
+        yield from self.model.stream(prompt)
+
+    async def ainvoke(self, prompt: str) -> BaseMessage:
+        return await self.model.ainvoke(prompt)
+
 
 class OllamaModel(AIModel):
     """Получить доступ к модели Ollama"""
@@ -74,6 +124,12 @@ class OllamaModel(AIModel):
         logger.debug("Успешно получен доступ к модели через Ollama API")
         return response
 
+    def stream(self, prompt: str) -> Iterator[BaseMessage]:
+        yield from self.model.stream(prompt)
+
+    async def ainvoke(self, prompt: str) -> BaseMessage:
+        return await self.model.ainvoke(prompt)
+
 #gemini doesn't seem to work because API doesn't rstitute answers for questions that involve answers that are too short
 class GeminiModel(AIModel):
     """Получить доступ к модели Gemini"""
@@ -114,196 +170,303 @@ class HuggingFaceModel(AIModel):
 
 class AIAdapter:
     """Класс для получения доступа к LLM моделям разных фирм через API"""
-    def __init__(self, config: dict, api_key: str):
+    def __init__(self, config: dict, api_key: str, model_type: str = LLM_MODEL_TYPE, llm_model: str = LLM_MODEL):
+        self.model_type = model_type
+        self.llm_model = llm_model
         self.model = self._create_model(config, api_key)
+        self.model_name = f"{model_type}/{llm_model}"
+
+    @property
+    def temperature(self):
+        """Температура модели (None, если у модели она не задана)"""
+        return getattr(getattr(self.model, "model", None), "temperature", None)
 
     def _create_model(self, config: dict, api_key: str) -> AIModel:
         llm_api_url = config.get('llm_api_url', "")
 
-        logger.debug(f"Using {LLM_MODEL_TYPE} with {LLM_MODEL}")
-
-        if LLM_MODEL_TYPE == "openai":
-            return OpenAIModel(api_key, LLM_MODEL)
-        elif LLM_MODEL_TYPE == "claude":
-            return ClaudeModel(api_key, LLM_MODEL)
-        elif LLM_MODEL_TYPE == "ollama":
-            return OllamaModel(LLM_MODEL, llm_api_url)
-        elif LLM_MODEL_TYPE == "gemini":
-            return GeminiModel(api_key, LLM_MODEL)
-        elif LLM_MODEL_TYPE == "huggingface":
-            return HuggingFaceModel(api_key, LLM_MODEL)        
+        logger.debug(f"Using {self.model_type} with {self.llm_model}")
+
+        if self.model_type == "openai":
+            return OpenAIModel(api_key, self.llm_model)
+        elif self.model_type == "claude":
+            return ClaudeModel(api_key, self.llm_model)
+        elif self.model_type == "ollama":
+            return OllamaModel(self.llm_model, llm_api_url)
+        elif self.model_type == "gemini":
+            return GeminiModel(api_key, self.llm_model)
+        elif self.model_type == "huggingface":
+            return HuggingFaceModel(api_key, self.llm_model)
         else:
-            raise ValueError(f"Неподдерживаемый тип модели: {LLM_MODEL_TYPE}")
+            raise ValueError(f"Неподдерживаемый тип модели: {self.model_type}")
 
     def invoke(self, prompt: str) -> str:
         return self.model.invoke(prompt)
 
+    def stream(self, prompt: str) -> Iterator[BaseMessage]:
+        return self.model.stream(prompt)
+
+    async def ainvoke(self, prompt: str) -> BaseMessage:
+        return await self.model.ainvoke(prompt)
+
 
 class LLMLogger:
     """Класс для логирования всех событий, происходящих при работе с LLM"""
+    # журнал запросов, создается при первом запросе
+    call_log: CallLogWriter = None
+    call_log_lock = threading.Lock()
+
     def __init__(self, llm: Union[OpenAIModel, OllamaModel, ClaudeModel, GeminiModel]):
         self.llm = llm
         logger.debug(f"LLMLogger успешно инициализирован, используем LLM: {llm}")
 
-    @staticmethod
-    def log_request(prompts, parsed_reply: Dict[str, Dict]) -> None:
-        logger.debug("Starting log_request method")
-        logger.debug(f"Prompts received: {prompts}")
-        logger.debug(f"Parsed reply received: {parsed_reply}")
-
-        try:
-            calls_log = os.path.join(
-                Path("data_folder/output"), "open_ai_calls.json")
-            logger.debug(f"Logging path determined: {calls_log}")
-        except Exception as e:
-            logger.error(f"Error determining the log path: {str(e)}")
-            raise
+    @classmethod
+    def get_call_log(cls) -> CallLogWriter:
+        with cls.call_log_lock:
+            if cls.call_log is None:
+                cls.call_log = CallLogWriter(Path("data_folder/output") / "open_ai_calls.jsonl")
+            return cls.call_log
 
+    @classmethod
+    def log_request(cls, prompts, parsed_reply: Dict[str, Dict], model: str = LLM_MODEL) -> float:
+        """Записать запрос в журнал и вернуть его стоимость (model - модель из PRICE_DICT, None - бесплатная)"""
         if isinstance(prompts, StringPromptValue):
-            logger.debug("Prompts are of type StringPromptValue")
             prompts = prompts.text
-            logger.debug(f"Prompts converted to text: {prompts}")
-        elif isinstance(prompts, Dict):
-            logger.debug("Prompts are of type Dict")
-            try:
-                prompts = {
-                    f"prompt_{i + 1}": prompt.content
-                    for i, prompt in enumerate(prompts.messages)
-                }
-                logger.debug(f"Prompts converted to dictionary: {prompts}")
-            except Exception as e:
-                logger.error(f"Error converting prompts to dictionary: {str(e)}")
-                raise
         else:
-            logger.debug("Prompts are of unknown type, attempting default conversion")
             try:
                 prompts = {
                     f"prompt_{i + 1}": prompt.content
                     for i, prompt in enumerate(prompts.messages)
                 }
-                logger.debug(f"Prompts converted to dictionary using default method: {prompts}")
             except Exception as e:
-                logger.error(f"Error converting prompts using default method: {str(e)}")
+                logger.error(f"Error converting prompts to dictionary: {str(e)}")
                 raise
 
-        try:
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            logger.debug(f"Current time obtained: {current_time}")
-        except Exception as e:
-            logger.error(f"Error obtaining current time: {str(e)}")
-            raise
-
         try:
             token_usage = parsed_reply["usage_metadata"]
             output_tokens = token_usage["output_tokens"]
             input_tokens = token_usage["input_tokens"]
             total_tokens = token_usage["total_tokens"]
-            logger.debug(f"Token usage - Input: {input_tokens}, Output: {output_tokens}, Total: {total_tokens}")
-        except KeyError as e:
-            logger.error(f"KeyError in parsed_reply structure: {str(e)}")
-            raise
-
-        try:
             model_name = parsed_reply["response_metadata"]["model_name"]
-            logger.debug(f"Model name: {model_name}")
         except KeyError as e:
-            logger.error(f"KeyError in response_metadata: {str(e)}")
-            raise
-
-        try:
-            # рассчитать общую стоимость запроса
-            prices = PRICE_DICT.get(LLM_MODEL, {"price_per_input_token": 1.5e-7, 
-                                                "price_per_output_token": 6e-7})
-            price_per_input_token = prices["price_per_input_token"]
-            price_per_output_token = prices["price_per_output_token"]
-            total_cost = (input_tokens * price_per_input_token) + \
-                (output_tokens * price_per_output_token)
-            logger.debug(f"Total cost calculated: {total_cost}")
-        except Exception as e:
-            logger.error(f"Error calculating total cost: {str(e)}")
-            raise
-
-        try:
-            log_entry = {
-                "model": model_name,
-                "time": current_time,
-                "prompts": prompts,
-                "replies": parsed_reply["content"],
-                "total_tokens": total_tokens,
-                "input_tokens": input_tokens,
-                "output_tokens": output_tokens,
-                "total_cost": total_cost,
-            }
-            logger.debug(f"Log entry created: {log_entry}")
-        except KeyError as e:
-            logger.error(f"Error creating log entry: missing key {str(e)} in parsed_reply")
+            logger.error(f"KeyError in parsed_reply structure: {str(e)}")
             raise
 
-        try:
-            with open(calls_log, "a", encoding="utf-8") as f:
-                json_string = json.dumps(
-                    log_entry, ensure_ascii=False, indent=4)
-                f.write(json_string + "\n")
-                logger.debug(f"Log entry written to file: {calls_log}")
-        except Exception as e:
-            logger.error(f"Error writing log entry to file: {str(e)}")
-            raise
+        # рассчитать общую стоимость запроса
+        if model is None:
+            prices = {"price_per_input_token": 0, "price_per_output_token": 0}
+        else:
+            prices = PRICE_DICT.get(model, {"price_per_input_token": 1.5e-7,
+                                            "price_per_output_token": 6e-7})
+        total_cost = (input_tokens * prices["price_per_input_token"]) + \
+            (output_tokens * prices["price_per_output_token"])
+
+        log_entry = {
+            "model": model_name,
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "prompts": prompts,
+            "replies": parsed_reply["content"],
+            "total_tokens": total_tokens,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_cost": total_cost,
+        }
+        logger.debug(f"Запрос к {model_name}: токенов {total_tokens}, стоимость {total_cost}")
+        # запись в файл выполняется в фоновом потоке
+        cls.get_call_log().write(log_entry)
+        return total_cost
 
 
 class LoggerChatModel:
-    def __init__(self, llm: Union[OpenAIModel, OllamaModel, ClaudeModel, GeminiModel]):
+    def __init__(self, llm: Union[OpenAIModel, OllamaModel, ClaudeModel, GeminiModel],
+                 chain_name: str = "default", cache: LLMResponseCache = None,
+                 resilience: ResilientCaller = None, token_counter: TokenCounter = None):
         self.llm = llm
+        self.chain_name = chain_name
+        # кэш ответов, None - запросы этой цепочки всегда отправляются провайдеру
+        self.cache = cache
+        # повторы, ограничение одновременных запросов и выключатель, общие для всех цепочек GPTAnswerer
+        self.resilience = resilience or ResilientCaller()
+        # ограничитель частоты запросов к модели, общий для всех цепочек процесса
+        model_name = getattr(llm, "model_name", None)
+        self.rate_limiter = get_rate_limiter(model_name) if isinstance(model_name, str) else None
+        self.token_counter = token_counter or TokenCounter()
         logger.debug(f"LoggerChatModel successfully initialized with LLM: {llm}")
 
-    def __call__(self, messages: List[Dict[str, str]]) -> str:
+    def __call__(self, messages: List[Dict[str, str]], config: RunnableConfig = None) -> BaseMessage:
         logger.debug(f"Entering __call__ method with messages: {messages}")
-        while True:
+        vacancy = self._vacancy(config)
+        key, reply = self._cached(messages, vacancy)
+        if reply is not None:
+            return reply
+        reply = self._invoke(messages, vacancy)
+        if key is not None:
+            self.cache.put(key, self.chain_name, reply)
+        return reply
+
+    async def acall(self, messages: List[Dict[str, str]], config: RunnableConfig = None) -> BaseMessage:
+        """Асинхронный вариант __call__: не занимает поток на время ожидания ответа провайдера"""
+        logger.debug(f"Entering acall method with messages: {messages}")
+        vacancy = self._vacancy(config)
+        key, reply = self._cached(messages, vacancy)
+        if reply is not None:
+            return reply
+        reply = await self._ainvoke(messages, vacancy)
+        if key is not None:
+            self.cache.put(key, self.chain_name, reply)
+        return reply
+
+    def as_runnable(self) -> RunnableLambda:
+        """Звено цепочки с синхронным и асинхронным (ainvoke) вызовом"""
+        return RunnableLambda(self, afunc=self.acall, name=f"LoggerChatModel[{self.chain_name}]")
+
+    @staticmethod
+    def _vacancy(config: RunnableConfig = None) -> str:
+        """Вакансия, для которой выполняется запрос (передается в метаданных цепочки)"""
+        return (config or {}).get("metadata", {}).get("vacancy", "")
+
+    def _cached(self, messages: List[Dict[str, str]], vacancy: str):
+        """Ключ кэша и ответ из кэша (None, если цепочка не кэшируется или ответа в кэше нет)"""
+        if self.cache is None:
+            return None, None
+        key = cache_key(getattr(self.llm, "model_name", LLM_MODEL),
+                        messages, getattr(self.llm, "temperature", None))
+        reply = self.cache.get(key, self.chain_name)
+        if reply is not None:
+            logger.debug(f"Ответ цепочки '{self.chain_name}' взят из кэша")
+            llm_metrics.record_cache_hit(self.chain_name, vacancy)
+        return key, reply
+
+    def stream(self, messages: List[Dict[str, str]], vacancy: str = "") -> Iterator[str]:
+        """
+        Ответ LLM по частям текста, по мере генерации. Запрос записывается
+        в журнал и в метрики, когда ответ получен полностью
+        """
+        key, reply = self._cached(messages, vacancy)
+        if reply is not None:
+            yield reply.content
+            return
+        # часть ответа уже может быть выведена, поэтому запрос не повторяется, а только учитывается выключателем
+        breaker = self.resilience.breaker
+        trial = breaker.before_call()
+        try:
+            estimated_tokens = self._estimate_tokens(messages)
+            self._acquire(estimated_tokens)
+            reply = None
             try:
-                logger.debug("Attempting to call the LLM with messages")
-
-                reply = self.llm.invoke(messages)
-                logger.debug(f"LLM response received: {reply}")
-
-                parsed_reply = self.parse_llmresult(reply)
-                logger.debug(f"Parsed LLM reply: {parsed_reply}")
-
-                LLMLogger.log_request(
-                    prompts=messages, parsed_reply=parsed_reply)
-                logger.debug("Request successfully logged")
-
-                return reply
-
-            except httpx.HTTPStatusError as e:
-                logger.error(f"HTTPStatusError encountered: {str(e)}")
-                if e.response.status_code == 429:
-                    retry_after = e.response.headers.get('retry-after')
-                    retry_after_ms = e.response.headers.get('retry-after-ms')
-
-                    if retry_after:
-                        wait_time = int(retry_after)
-                        logger.warning(
-                            f"Rate limit exceeded. Waiting for {wait_time} seconds before retrying (extracted from 'retry-after' header)...")
-                        time.sleep(wait_time)
-                    elif retry_after_ms:
-                        wait_time = int(retry_after_ms) / 1000.0
-                        logger.warning(
-                            f"Rate limit exceeded. Waiting for {wait_time} seconds before retrying (extracted from 'retry-after-ms' header)...")
-                        time.sleep(wait_time)
-                    else:
-                        wait_time = 30
-                        logger.warning(
-                            f"'retry-after' header not found. Waiting for {wait_time} seconds before retrying (default)...")
-                        time.sleep(wait_time)
+                with self.resilience.slot():
+                    started_at = time.monotonic()
+                    for chunk in self.llm.stream(messages):
+                        reply = chunk if reply is None else reply + chunk
+                        text = self._chunk_text(chunk)
+                        if text:
+                            yield text
+            except Exception as e:
+                if is_retryable(e):
+                    breaker.record_failure()
                 else:
-                    logger.error(f"HTTP error occurred with status code: {e.response.status_code}, waiting 30 seconds before retrying")
-                    time.sleep(30)
+                    # провайдер ответил, значит он доступен
+                    breaker.record_success()
+                raise
+            breaker.record_success()
+        finally:
+            # поток ответа закрыт читателем раньше времени (GeneratorExit) или запрос не был отправлен
+            if trial:
+                breaker.release_trial()
+        latency = time.monotonic() - started_at
+        if reply is None:
+            reply = AIMessage(content="")
+        # собрать из частей полный ответ, как при обычном запросе
+        reply = AIMessage(
+            content=self._chunk_text(reply), id=reply.id, response_metadata=reply.response_metadata,
+            usage_metadata=getattr(reply, "usage_metadata", None)
+            or {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0})
+        parsed_reply = self.parse_llmresult(reply)
+        cost = LLMLogger.log_request(prompts=messages, parsed_reply=parsed_reply, model=self._price_model())
+        usage = parsed_reply["usage_metadata"]
+        self._reconcile(estimated_tokens, usage["total_tokens"])
+        llm_metrics.record_request(self.chain_name, vacancy, latency,
+                                   usage["input_tokens"], usage["output_tokens"], cost)
+        if key is not None:
+            self.cache.put(key, self.chain_name, reply)
 
-            except Exception as e:
-                logger.error(f"Unexpected error occurred: {str(e)}")
-                logger.info(
-                    "Waiting for 30 seconds before retrying due to an unexpected error.")
-                time.sleep(30)
-                continue
+    @staticmethod
+    def _chunk_text(chunk: BaseMessage) -> str:
+        """Текст части ответа (у некоторых моделей содержимое - список блоков)"""
+        if isinstance(chunk.content, str):
+            return chunk.content
+        return "".join(block if isinstance(block, str) else block.get("text", "") for block in chunk.content)
+
+    def _invoke(self, messages: List[Dict[str, str]], vacancy: str = "") -> BaseMessage:
+        """Запрос к LLM с повторами при сбоях провайдера"""
+        logger.debug("Attempting to call the LLM with messages")
+
+        estimated_tokens = self._estimate_tokens(messages)
+
+        def request():
+            started_at = time.monotonic()
+            return self.llm.invoke(messages), time.monotonic() - started_at
+
+        # каждая попытка - отдельный запрос в счет ограничения частоты
+        reply, latency = self.resilience.call(request, lambda: self._acquire(estimated_tokens))
+        return self._record(messages, vacancy, reply, latency, estimated_tokens)
+
+    async def _ainvoke(self, messages: List[Dict[str, str]], vacancy: str = "") -> BaseMessage:
+        """Асинхронный запрос к LLM с повторами при сбоях провайдера"""
+        logger.debug("Attempting to call the LLM with messages (async)")
+
+        estimated_tokens = self._estimate_tokens(messages)
+
+        async def request():
+            started_at = time.monotonic()
+            return await self.llm.ainvoke(messages), time.monotonic() - started_at
+
+        reply, latency = await self.resilience.acall(request, lambda: self._aacquire(estimated_tokens))
+        return self._record(messages, vacancy, reply, latency, estimated_tokens)
+
+    def _estimate_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """Оценка токенов запроса для ограничителя частоты (0, если ограничений нет)"""
+        if self.rate_limiter is None:
+            return 0
+        return self.token_counter.count(render_prompt(messages))
+
+    def _acquire(self, tokens: int) -> None:
+        """
+        Дождаться разрешения ограничителя частоты. Вызывается до занятия места
+        среди одновременных запросов, чтобы ожидание не задерживало другие запросы
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(tokens)
+
+    async def _aacquire(self, tokens: int) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire(tokens)
+
+    def _price_model(self) -> Optional[str]:
+        """Модель для расчета стоимости запроса (локальные модели ollama бесплатны)"""
+        if getattr(self.llm, "model_type", None) == "ollama":
+            return None
+        llm_model = getattr(self.llm, "llm_model", LLM_MODEL)
+        return llm_model if isinstance(llm_model, str) else LLM_MODEL
+
+    def _reconcile(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Уточнить расход токенов в ограничителе частоты по ответу провайдера"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.reconcile(estimated_tokens, actual_tokens)
+
+    def _record(self, messages: List[Dict[str, str]], vacancy: str, reply: BaseMessage,
+                latency: float, estimated_tokens: int = 0) -> BaseMessage:
+        """Записать полученный ответ в журнал и в метрики"""
+        logger.debug(f"LLM response received: {reply}")
+        parsed_reply = self.parse_llmresult(reply)
+        logger.debug(f"Parsed LLM reply: {parsed_reply}")
+
+        cost = LLMLogger.log_request(prompts=messages, parsed_reply=parsed_reply, model=self._price_model())
+        logger.debug("Request successfully logged")
+        usage = parsed_reply["usage_metadata"]
+        self._reconcile(estimated_tokens, usage["total_tokens"])
+        llm_metrics.record_request(self.chain_name, vacancy, latency,
+                                   usage["input_tokens"], usage["output_tokens"], cost)
+        return reply
 
     def parse_llmresult(self, llmresult: AIMessage) -> Dict[str, Dict]:
         logger.debug(f"Parsing LLM result: {llmresult}")
@@ -364,24 +527,38 @@ class LoggerChatModel:
 
 
 class GPTAnswerer:
-    def __init__(self, config, llm_api_key):
+    def __init__(self, config, llm_api_key, resilience: Dict[str, ResilientCaller] = None):
         self.job = None
+        self.config = config
+        self.llm_api_key = llm_api_key
         self.ai_adapter = AIAdapter(config, llm_api_key)
-        self.llm_cheap = LoggerChatModel(self.ai_adapter)
+        # модели маршрутов цепочек ("тип/модель" -> модель, None - модель недоступна)
+        self.backends: Dict[str, AIAdapter] = {self.ai_adapter.model_name: self.ai_adapter}
+        self.response_cache = LLMResponseCache(Path("data_folder/output") / "llm_cache.sqlite3") \
+            if LLM_CACHE_CHAINS else None
+        self.prompt_compactor = PromptCompactor()
+        # повторы и выключатель для каждой модели, общие для всех цепочек
+        # (и для всех браузеров, если передан общий словарь WorkerCoordinator.llm_resilience)
+        self.resilience: Dict[str, ResilientCaller] = resilience if resilience is not None else {}
+        # модель сопроводительных писем общая для цепочки и потоковой генерации
+        self.cover_letter_model = self._chat_model("cover_letter")
         self.chains = {
-            "personal_information": self._create_chain(strings.personal_information_template),
-            "legal_authorization": self._create_chain(strings.legal_authorization_template),
-            "work_preferences": self._create_chain(strings.work_preferences_template),
-            "education_details": self._create_chain(strings.education_details_template),
-            "experience_details": self._create_chain(strings.experience_details_template),
-            "projects": self._create_chain(strings.projects_template),
-            "availability": self._create_chain(strings.availability_template),
-            "salary_expectations": self._create_chain(strings.salary_expectations_template),
-            "certifications": self._create_chain(strings.certifications_template),
-            "languages": self._create_chain(strings.languages_template),
-            "interests": self._create_chain(strings.interests_template),
-            "cover_letter": self._create_chain(strings.coverletter_template),
+            "personal_information": self._create_chain(strings.personal_information_template, "personal_information"),
+            "legal_authorization": self._create_chain(strings.legal_authorization_template, "legal_authorization"),
+            "work_preferences": self._create_chain(strings.work_preferences_template, "work_preferences"),
+            "education_details": self._create_chain(strings.education_details_template, "education_details"),
+            "experience_details": self._create_chain(strings.experience_details_template, "experience_details"),
+            "projects": self._create_chain(strings.projects_template, "projects"),
+            "availability": self._create_chain(strings.availability_template, "availability"),
+            "salary_expectations": self._create_chain(strings.salary_expectations_template, "salary_expectations"),
+            "certifications": self._create_chain(strings.certifications_template, "certifications"),
+            "languages": self._create_chain(strings.languages_template, "languages"),
+            "interests": self._create_chain(strings.interests_template, "interests"),
+            "cover_letter": self._create_chain(strings.coverletter_template, "cover_letter", self.cover_letter_model),
         }
+        self.section_chain = self._create_chain(strings.section_template, "section")
+        self.questions_chain = self._create_chain(strings.questions_batch_template, "questions")
+        self.section_classifier = SectionClassifier(Path("data_folder/output") / "sections.json")
 
     @property
     def job_description(self) -> Dict[str, str]:
@@ -426,111 +603,82 @@ class GPTAnswerer:
         strings.summarize_prompt_template = self._preprocess_template_string(
             strings.summarize_prompt_template
         )
-        prompt = ChatPromptTemplate.from_template(
-            strings.summarize_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
+        chain = self._create_chain(strings.summarize_prompt_template, "summarize_job_description")
         output = chain.invoke({"text": text})
         logger.debug(f"Summary generated: {output}")
         return output
 
-    def _create_chain(self, template: str) -> ChatPromptTemplate:
+    def _create_chain(self, template: str, chain_name: str = "default",
+                      chat_model: Union[LoggerChatModel, ChainRouter] = None) -> ChatPromptTemplate:
         logger.debug(f"Creating chain with template: {template}")
         prompt = ChatPromptTemplate.from_template(template)
-        return prompt | self.llm_cheap | StrOutputParser()
+        # сжать переменные запроса до бюджета токенов цепочки
+        compact = RunnableLambda(lambda inputs: self.prompt_compactor.compact(chain_name, template, inputs))
+        chat_model = chat_model or self._chat_model(chain_name)
+        return compact | prompt | chat_model.as_runnable() | StrOutputParser()
+
+    def _chat_model(self, chain_name: str) -> Union[LoggerChatModel, ChainRouter]:
+        """
+        Модель для цепочки chain_name, с кэшем ответов, если цепочка указана в LLM_CACHE_CHAINS
+        (кроме цепочки "section": ее решения хранит SectionClassifier). Для цепочки с маршрутом из LLM_ROUTES - маршрутизатор по доступным моделям маршрута
+        """
+        cache = self.response_cache if chain_name in LLM_CACHE_CHAINS and chain_name != "section" else None
+        models = [
+            LoggerChatModel(backend, chain_name, cache, self.resilience.setdefault(backend.model_name, ResilientCaller()),
+                            self.prompt_compactor.counter)
+            for backend in self._route(chain_name)
+        ]
+        if len(models) == 1:
+            return models[0]
+        return ChainRouter(chain_name, models,
+                           LLM_ROUTE_LATENCY_SLO_SEC.get(chain_name, LLM_ROUTE_LATENCY_SLO_DEFAULT_SEC))
+
+    def _route(self, chain_name: str) -> List[AIAdapter]:
+        """Доступные модели маршрута цепочки в порядке использования"""
+        route = [backend for backend in map(self._backend, LLM_ROUTES.get(chain_name, [])) if backend is not None]
+        if chain_name in LLM_ROUTES and not route:
+            logger.warning(f"Ни одна модель маршрута цепочки '{chain_name}' недоступна, используется {LLM_MODEL}")
+        return route or [self.ai_adapter]
+
+    def _backend(self, model_name: str) -> Optional[AIAdapter]:
+        """Модель "тип/модель" маршрута (None, если для нее нет ключа API или ее не удалось создать)"""
+        if model_name in self.backends:
+            return self.backends[model_name]
+        model_type, _, llm_model = model_name.partition("/")
+        if model_type == LLM_MODEL_TYPE:
+            api_key = self.llm_api_key
+        else:
+            api_key = os.getenv(LLM_API_KEY_ENV.get(model_type, ""), "")
+        backend = None
+        if not api_key and model_type != "ollama":
+            logger.warning(f"Модель {model_name} не используется: нет ключа API в переменной "
+                           f"окружения {LLM_API_KEY_ENV.get(model_type)}")
+        else:
+            try:
+                backend = AIAdapter(self.config, api_key, model_type, llm_model)
+            except Exception as e:
+                logger.error(f"Не удалось подключить модель {model_name}: {str(e)}")
+        self.backends[model_name] = backend
+        return backend
+
+    @staticmethod
+    def _run_config(vacancy: str = None) -> RunnableConfig:
+        """Настройки запуска цепочки: название вакансии для метрик расхода"""
+        return {"metadata": {"vacancy": vacancy or ""}}
+
+    def cache_stats(self) -> str:
+        """Статистика кэша ответов LLM"""
+        if self.response_cache is None:
+            return "выключен"
+        return self.response_cache.stats()
 
     def answer_question_textual_wide_range(self, question: str) -> str:
         """Определить тему заданного вопроса и ответить на него"""
         logger.debug(f"Отвечаем на текстовый вопрос: {question}")
-        # промпт модели для определение темы вопроса и ответа на него
-        section_prompt = """You are assisting a bot designed to automatically apply for jobs on AIHawk. The bot receives various questions about job applications and needs to determine the most relevant section of the resume to provide an accurate response.
-
-        For the following question: '{question}', determine which section of the resume is most relevant. 
-        Respond with exactly one of the following options:
-        - Personal information
-        - Legal Authorization
-        - Work Preferences
-        - Education Details
-        - Experience Details
-        - Projects
-        - Availability
-        - Salary Expectations
-        - Certifications
-        - Languages
-        - Interests
-
-        Here are detailed guidelines to help you choose the correct section:
-
-        1. **Personal Information**:
-        - **Purpose**: Contains your basic contact details and online profiles.
-        - **Use When**: The question is about how to contact you or requests links to your professional online presence.
-        - **Examples**: Email address, phone number, AIHawk profile, GitHub repository, personal website.
-
-        2. **Legal Authorization**:
-        - **Purpose**: Details your work authorization status and visa requirements.
-        - **Use When**: The question asks about your ability to work in specific countries or if you need sponsorship or visas.
-        - **Examples**: Work authorization in EU and US, visa requirements, legally allowed to work.
-
-        3. **Work Preferences**:
-        - **Purpose**: Specifies your preferences regarding work conditions and job roles.
-        - **Use When**: The question is about your preferences for remote work, relocation, and willingness to undergo assessments or background checks.
-        - **Examples**: Remote work, in-person work, open to relocation.
-
-        4. **Education Details**:
-        - **Purpose**: Contains information about your academic qualifications and courses.
-        - **Use When**: The question concerns your degrees, universities attended, and relevant coursework.
-        - **Examples**: Degree, university, field of study.
-
-        5. **Experience Details**:
-        - **Purpose**: Details your professional work history and key responsibilities.
-        - **Use When**: The question pertains to your job roles, responsibilities, achievements and technoligies that you used in previous positions.
-        - **Examples**: Job positions, company names, key responsibilities, skills acquired.
-
-        6. **Projects**:
-        - **Purpose**: Highlights specific projects you have worked on.
-        - **Use When**: The question asks about particular projects, their descriptions, or links to project repositories.
-        - **Examples**: Project names, descriptions, links to project repositories.
-
-        7. **Availability**:
-        - **Purpose**: Provides information on your availability for new roles.
-        - **Use When**: The question is about how soon you can start a new job or your notice period.
-        - **Examples**: Notice period, availability to start.
-
-        8. **Salary Expectations**:
-        - **Purpose**: Covers your expected salary range.
-        - **Use When**: The question pertains to your salary expectations or compensation requirements.
-        - **Examples**: Desired salary range.
-
-        9. **Certifications**:
-            - **Purpose**: Lists your professional certifications or licenses.
-            - **Use When**: The question involves your certifications or qualifications from recognized organizations.
-            - **Examples**: Certification names, issuing bodies, dates of validity.
-
-        10. **Languages**:
-            - **Purpose**: Describes the languages you can speak and your proficiency levels.
-            - **Use When**: The question asks about your language skills or proficiency in specific languages.
-            - **Examples**: Languages spoken, proficiency levels.
-
-        11. **Interests**:
-            - **Purpose**: Details your personal or professional interests.
-            - **Use When**: The question is about your hobbies, interests, or activities outside of work.
-            - **Examples**: Personal hobbies, professional interests.
-
-        Provide only the exact name of the section from the list above with no additional text.
-        """
-        prompt = ChatPromptTemplate.from_template(section_prompt)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output = chain.invoke({"question": question})
-
-        match = re.search(
-            r"(Personal information|Legal Authorization|Work Preferences|Education "
-            r"Details|Experience Details|Projects|Availability|Salary "
-            r"Expectations|Certifications|Languages|Interests|Cover letter)",
-            output, re.IGNORECASE)
-        if not match:
-            raise ValueError(
-                "Не смогли определить тему вопроса.")
-
-        section_name = match.group(1).lower().replace(" ", "_")
+        config = self._run_config(vacancy_label(self.job))
+        # определить тему вопроса: из кэша, по ключевым словам или с помощью LLM
+        section_name = self.section_classifier.classify(
+            question, lambda text: self._classify_question_section(text, config))
         resume_section = getattr(self.resume, section_name, None) or self.resume_profile.get(section_name)
         if resume_section is None:
             logger.error(
@@ -541,14 +689,110 @@ class GPTAnswerer:
             logger.error(f"Chain not defined for section '{section_name}'")
             raise ValueError(f"Chain not defined for section '{section_name}'")
         output = chain.invoke(
-            {"resume_section": resume_section, "question": question})
+            {"resume_section": resume_section, "question": question}, config)
         logger.debug(f"Question answered: {output}")
         return output
     
-    def write_cover_letter(self) -> str:
-        """Написать сопроводительное письмо"""
+    def answer_questions_batch(self, questions: List[str]) -> Dict[str, str]:
+        """
+        Ответить на несколько вопросов работодателя одним запросом к LLM.
+        Возвращает только ответы, прошедшие проверку; на остальные вопросы
+        нужно ответить по одному через answer_question_textual_wide_range
+        """
+        logger.debug(f"Отвечаем на вопросы одним запросом: {questions}")
+        # разделы резюме, к которым относятся вопросы, без обращения к LLM
+        sections = {}
+        use_full_resume = False
+        for question in questions:
+            section_name = self.section_classifier.find_section(question)
+            resume_section = None
+            if section_name is not None:
+                resume_section = getattr(self.resume, section_name, None) or self.resume_profile.get(section_name)
+            if resume_section is None:
+                use_full_resume = True
+            else:
+                sections[section_name] = resume_section
+        resume_blocks = [f"{name}: {json.dumps(value, ensure_ascii=False, default=str)}"
+                         for name, value in sections.items()]
+        if use_full_resume:
+            resume_blocks.append(self.resume)
+        numbered_questions = "\n".join(f"{i + 1}. {question}" for i, question in enumerate(questions))
+        output = self.questions_chain.invoke(
+            {"resume": "\n\n".join(resume_blocks), "questions": numbered_questions},
+            self._run_config(vacancy_label(self.job)))
+        answers = self.parse_batch_answers(output, questions)
+        logger.debug(f"Получено ответов из пакетного запроса: {len(answers)} из {len(questions)}")
+        return answers
+
+    @staticmethod
+    def parse_batch_answers(output: str, questions: List[str]) -> Dict[str, str]:
+        """Разобрать ответ LLM в формате JSON {"номер вопроса": "ответ"} и оставить только корректные ответы"""
+        start, end = output.find("{"), output.rfind("}")
+        try:
+            if start == -1 or end < start:
+                raise ValueError("в ответе нет объекта JSON")
+            data = json.loads(output[start:end + 1])
+            if not isinstance(data, dict):
+                raise ValueError("ответ не является объектом JSON")
+        except ValueError as e:
+            logger.warning(f"Не удалось разобрать ответы на вопросы: {str(e)}")
+            return {}
+        answers = {}
+        for i, question in enumerate(questions):
+            answer = data.get(str(i + 1))
+            if not isinstance(answer, (str, int, float)) or isinstance(answer, bool):
+                logger.debug(f"Нет ответа на вопрос {i + 1} в пакетном ответе")
+                continue
+            answer = GPTAnswerer._remove_placeholders(str(answer))
+            if not answer or len(answer) > MAX_BATCH_ANSWER_LENGTH or "[[" in answer:
+                logger.debug(f"Некорректный ответ на вопрос {i + 1} в пакетном ответе: {answer}")
+                continue
+            answers[question] = answer
+        return answers
+
+    def _classify_question_section(self, question: str, config: RunnableConfig = None) -> str:
+        """Определить с помощью LLM раздел резюме, к которому относится вопрос"""
+        output = self.section_chain.invoke({"question": question}, config)
+        match = SECTION_RE.search(output)
+        if not match:
+            raise ValueError(
+                "Не смогли определить тему вопроса.")
+        return match.group(1).lower().replace(" ", "_")
+
+    def write_cover_letter(self, job_description: str = None, vacancy: str = None) -> str:
+        """
+        Написать сопроводительное письмо. Описание и название вакансии можно передать явно,
+        чтобы генерация в фоновом потоке не зависела от последующих вызовов set_job
+        """
+        if job_description is None:
+            job_description = self.job_description
+            if vacancy is None:
+                vacancy = vacancy_label(self.job)
         chain = self.chains.get("cover_letter")
-        output = chain.invoke(
-            {"resume": self.resume, "job_description": self.job_description})
+        output = chain.invoke(self._cover_letter_inputs(job_description), self._run_config(vacancy))
         logger.debug(f"Cover letter generated: {output}")
         return output
+
+    def stream_cover_letter(self, job_description: str = None, vacancy: str = None) -> Iterator[str]:
+        """Написать сопроводительное письмо, отдавая его по абзацам по мере генерации"""
+        if job_description is None:
+            job_description = self.job_description
+            if vacancy is None:
+                vacancy = vacancy_label(self.job)
+        inputs = self.prompt_compactor.compact(
+            "cover_letter", strings.coverletter_template, self._cover_letter_inputs(job_description))
+        prompt = ChatPromptTemplate.from_template(strings.coverletter_template).invoke(inputs)
+        yield from split_paragraphs(self.cover_letter_model.stream(prompt, vacancy or ""))
+
+    def _cover_letter_inputs(self, job_description: str) -> Dict[str, str]:
+        return {"resume": self.resume, "job_description": job_description,
+                "examples": self._cover_letter_examples()}
+
+    @staticmethod
+    def _cover_letter_examples() -> str:
+        """Примеры сопроводительных писем для запроса (не больше COVER_LETTER_EXAMPLES)"""
+        examples = strings.coverletter_examples[:COVER_LETTER_EXAMPLES]
+        if not examples:
+            return ""
+        return "Примеры сопроводительных писем:\n" + "\n".join(
+            f"## Пример {i + 1}:\n```\n{example}```" for i, example in enumerate(examples))
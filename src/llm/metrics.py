@@ -0,0 +1,256 @@
+from typing import Dict, List, Optional, Tuple
+
+import os
+import threading
+from pathlib import Path
+
+from loguru import logger
+
+# границы корзин гистограмм (время запроса в секундах и число токенов в запросе)
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000)
+
+
+def vacancy_label(job: Optional[dict]) -> str:
+    """Название вакансии для метрик: компания и должность"""
+    if not job:
+        return ""
+    return f"{job.get('company_name', '')} - {job.get('title', '')}".strip(" -")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus: число значений не больше каждой границы, сумма и количество"""
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля сверху: граница первой корзины, в которую попала доля q значений"""
+        if not self.count:
+            return 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= q * self.count:
+                return bound
+        return self.max
+
+
+class ChainStats:
+    """Накопленные показатели запросов одной цепочки или одной вакансии"""
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        # токены запросов до и после сжатия
+        self.prompt_tokens_raw = 0
+        self.prompt_tokens_compacted = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.tokens = Histogram(TOKEN_BUCKETS)
+
+    def add(self, latency_sec: float, input_tokens: int, output_tokens: int, cost: float) -> None:
+        self.requests += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.cost += cost
+        self.latency.observe(latency_sec)
+        self.tokens.observe(input_tokens + output_tokens)
+
+
+class RouteStats:
+    """Показатели одной модели в маршруте цепочки"""
+    # исходы запроса: ответ получен, ошибка, превышено допустимое время ответа
+    OUTCOMES = ("ok", "error", "timeout")
+
+    def __init__(self):
+        self.outcomes = {outcome: 0 for outcome in self.OUTCOMES}
+        # ответы, полученные после превышения времени: оплачены, но не использованы
+        self.discarded = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+
+
+class LLMMetrics:
+    """
+    Расход токенов, денег и времени на запросы к LLM в разрезе цепочек
+    (сопроводительное письмо, определение темы вопроса, разделы резюме)
+    и вакансий. Метрики цепочек выгружаются в текстовый файл Prometheus
+    (для node_exporter textfile collector), а сводка по цепочкам и самым
+    дорогим вакансиям выводится в конце работы
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chains: Dict[str, ChainStats] = {}
+        self.vacancies: Dict[str, ChainStats] = {}
+        # маршруты: (цепочка, модель) -> показатели
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+
+    def record_request(self, chain_name: str, vacancy: str, latency_sec: float,
+                       input_tokens: int, output_tokens: int, cost: float) -> None:
+        """Учесть запрос к провайдеру"""
+        with self.lock:
+            for stats in self._stats(chain_name, vacancy):
+                stats.add(latency_sec, input_tokens, output_tokens, cost)
+
+    def record_cache_hit(self, chain_name: str, vacancy: str) -> None:
+        """Учесть ответ, взятый из кэша без запроса к провайдеру"""
+        with self.lock:
+            for stats in self._stats(chain_name, vacancy):
+                stats.cache_hits += 1
+
+    def record_compaction(self, chain_name: str, tokens_before: int, tokens_after: int) -> None:
+        """Учесть сжатие запроса цепочки"""
+        with self.lock:
+            stats = self.chains.setdefault(chain_name, ChainStats())
+            stats.prompt_tokens_raw += tokens_before
+            stats.prompt_tokens_compacted += tokens_after
+
+    def record_route(self, chain_name: str, model_name: str, latency_sec: float, outcome: str) -> None:
+        """Учесть запрос цепочки к модели маршрута и его исход (ok, error, timeout)"""
+        with self.lock:
+            stats = self.routes.setdefault((chain_name, model_name), RouteStats())
+            stats.outcomes[outcome] += 1
+            if outcome == "ok":
+                stats.latency.observe(latency_sec)
+
+    def record_route_discarded(self, chain_name: str, model_name: str) -> None:
+        """Учесть ответ модели маршрута, пришедший после перехода к следующей модели"""
+        with self.lock:
+            self.routes.setdefault((chain_name, model_name), RouteStats()).discarded += 1
+
+    def _stats(self, chain_name: str, vacancy: str) -> List[ChainStats]:
+        stats = [self.chains.setdefault(chain_name, ChainStats())]
+        if vacancy:
+            stats.append(self.vacancies.setdefault(vacancy, ChainStats()))
+        return stats
+
+    def to_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = []
+        with self.lock:
+            # только цепочки: число вакансий за долгую работу не ограничено, расход по ним есть в сводке
+            counters = [
+                ("requests_total", "Запросы к провайдеру LLM", lambda s: s.requests),
+                ("cache_hits_total", "Ответы LLM из кэша", lambda s: s.cache_hits),
+                ("input_tokens_total", "Токены запросов", lambda s: s.input_tokens),
+                ("output_tokens_total", "Токены ответов", lambda s: s.output_tokens),
+                ("cost_usd_total", "Стоимость запросов в долларах", lambda s: s.cost),
+                ("prompt_tokens_saved_total", "Токены, убранные из запросов при сжатии",
+                 lambda s: s.prompt_tokens_raw - s.prompt_tokens_compacted),
+            ]
+            for name, help_text, value in counters:
+                lines.append(f"# HELP llm_{name} {help_text}")
+                lines.append(f"# TYPE llm_{name} counter")
+                for chain_name, stats in sorted(self.chains.items()):
+                    lines.append(f"llm_{name}{{chain=\"{_escape(chain_name)}\"}} {value(stats)}")
+            histograms = [
+                ("request_duration_seconds", "Время запроса к провайдеру LLM", lambda s: s.latency),
+                ("request_tokens", "Токены в одном запросе", lambda s: s.tokens),
+            ]
+            for name, help_text, histogram in histograms:
+                lines.append(f"# HELP llm_{name} {help_text}")
+                lines.append(f"# TYPE llm_{name} histogram")
+                for chain_name, stats in sorted(self.chains.items()):
+                    h = histogram(stats)
+                    labels = f"chain=\"{_escape(chain_name)}\""
+                    for bound, count in zip(h.buckets, h.counts):
+                        lines.append(f"llm_{name}_bucket{{{labels},le=\"{bound}\"}} {count}")
+                    lines.append(f"llm_{name}_bucket{{{labels},le=\"+Inf\"}} {h.count}")
+                    lines.append(f"llm_{name}_sum{{{labels}}} {h.sum}")
+                    lines.append(f"llm_{name}_count{{{labels}}} {h.count}")
+            if self.routes:
+                lines.append("# HELP llm_route_requests_total Запросы цепочек к моделям маршрута по исходам")
+                lines.append("# TYPE llm_route_requests_total counter")
+                for (chain_name, model_name), stats in sorted(self.routes.items()):
+                    for outcome, count in stats.outcomes.items():
+                        lines.append(f"llm_route_requests_total{{chain=\"{_escape(chain_name)}\","
+                                     f"model=\"{_escape(model_name)}\",outcome=\"{outcome}\"}} {count}")
+                lines.append("# HELP llm_route_discarded_total Оплаченные, но не использованные ответы "
+                             "моделей маршрута (пришли после превышения допустимого времени)")
+                lines.append("# TYPE llm_route_discarded_total counter")
+                for (chain_name, model_name), stats in sorted(self.routes.items()):
+                    lines.append(f"llm_route_discarded_total{{chain=\"{_escape(chain_name)}\","
+                                 f"model=\"{_escape(model_name)}\"}} {stats.discarded}")
+                lines.append("# HELP llm_route_duration_seconds Время успешного ответа модели маршрута")
+                lines.append("# TYPE llm_route_duration_seconds histogram")
+                for (chain_name, model_name), stats in sorted(self.routes.items()):
+                    h = stats.latency
+                    labels = f"chain=\"{_escape(chain_name)}\",model=\"{_escape(model_name)}\""
+                    for bound, count in zip(h.buckets, h.counts):
+                        lines.append(f"llm_route_duration_seconds_bucket{{{labels},le=\"{bound}\"}} {count}")
+                    lines.append(f"llm_route_duration_seconds_bucket{{{labels},le=\"+Inf\"}} {h.count}")
+                    lines.append(f"llm_route_duration_seconds_sum{{{labels}}} {h.sum}")
+                    lines.append(f"llm_route_duration_seconds_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path) -> None:
+        """Атомарно записать метрики в файл (textfile collector не должен видеть файл недописанным)"""
+        path = Path(path)
+        tmp_file = path.with_suffix(path.suffix + ".tmp")
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_file, path)
+        except OSError as e:
+            logger.error(f"Не удалось сохранить метрики LLM: {str(e)}")
+
+    def summary(self, top_vacancies: int = 5) -> str:
+        """Сводка расхода по цепочкам и самым дорогим вакансиям"""
+        with self.lock:
+            lines = [f"{'Цепочка':<24}{'Запросов':>10}{'Из кэша':>10}{'Токенов':>10}{'Сэкономлено':>13}"
+                     f"{'Стоимость, $':>14}{'Среднее, с':>12}{'Макс., с':>10}"]
+            total = ChainStats()
+            for chain_name, stats in sorted(self.chains.items(), key=lambda item: -item[1].cost):
+                lines.append(self._summary_line(chain_name, stats))
+                total.requests += stats.requests
+                total.cache_hits += stats.cache_hits
+                total.input_tokens += stats.input_tokens
+                total.output_tokens += stats.output_tokens
+                total.cost += stats.cost
+                total.prompt_tokens_raw += stats.prompt_tokens_raw
+                total.prompt_tokens_compacted += stats.prompt_tokens_compacted
+                total.latency.sum += stats.latency.sum
+                total.latency.count += stats.latency.count
+                total.latency.max = max(total.latency.max, stats.latency.max)
+            lines.append(self._summary_line("Всего", total))
+            vacancies = sorted(self.vacancies.items(), key=lambda item: -item[1].cost)[:top_vacancies]
+            if vacancies:
+                lines.append("Самые дорогие вакансии:")
+                lines.extend(f"    {round(stats.cost, 4)} $, токенов {stats.input_tokens + stats.output_tokens}: {vacancy}"
+                             for vacancy, stats in vacancies)
+            if self.routes:
+                lines.append("Маршруты (ответов / ошибок / превышений времени, среднее, p95 и макс. время, с, "
+                             "оплаченных неиспользованных ответов):")
+                for (chain_name, model_name), stats in sorted(self.routes.items()):
+                    h = stats.latency
+                    average = h.sum / h.count if h.count else 0
+                    lines.append(f"    {chain_name} -> {model_name}: {stats.outcomes['ok']} / {stats.outcomes['error']} / "
+                                 f"{stats.outcomes['timeout']}, {average:.2f}, {h.quantile(0.95)}, {h.max:.2f}, "
+                                 f"{stats.discarded}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _summary_line(name: str, stats: ChainStats) -> str:
+        average = stats.latency.sum / stats.latency.count if stats.latency.count else 0
+        return (f"{name:<24}{stats.requests:>10}{stats.cache_hits:>10}"
+                f"{stats.input_tokens + stats.output_tokens:>10}"
+                f"{stats.prompt_tokens_raw - stats.prompt_tokens_compacted:>13}{stats.cost:>14.4f}"
+                f"{average:>12.2f}{stats.latency.max:>10.2f}")
+
+
+# общие метрики всех GPTAnswerer процесса
+llm_metrics = LLMMetrics()
@@ -0,0 +1,172 @@
+from typing import Dict, List, Optional
+
+import math
+import re
+import threading
+
+from src.app_config import LLM_MODEL, PROMPT_TOKEN_BUDGETS, PROMPT_TOKEN_BUDGET_DEFAULT
+from src.llm.metrics import llm_metrics
+from loguru import logger
+
+# абзацы описания вакансии, не влияющие на сопроводительное письмо и ответы на вопросы
+BOILERPLATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r"^(ждем|ждём|будем рады|с нетерпением ждем)\b.*(отклик|резюме|вас|тебя)",
+    r"^(откликайтесь|откликайся|присылайте|присылай|отправляйте) .*(резюме|отклик)",
+    r"персональн\w+ данн",
+    r"политик\w+ конфиденциальност",
+    r"^(нажимая|откликаясь)\b",
+    r"^(подробнее|узнать больше) (о нас|о компании) на сайте",
+    r"^(наш|мы в) (сайт|telegram|телеграм|вконтакте|vk|хабр)",
+    r"^#\w+( #\w+)*$",
+    r"^https?://\S+$",
+]]
+WORD_RE = re.compile(r"\w{3,}")
+# среднее число символов на токен, если токенизатор недоступен (для русского текста токены короче)
+CHARS_PER_TOKEN = 3
+
+
+def normalize_whitespace(text: str) -> str:
+    """Убрать лишние пробелы и пустые строки"""
+    text = text.replace("\r\n", "\n").replace("\xa0", " ")
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def strip_boilerplate(description: str) -> str:
+    """Удалить из описания вакансии шаблонные абзацы и повторяющиеся строки"""
+    lines, seen = [], set()
+    for line in normalize_whitespace(description).split("\n"):
+        key = line.strip().lower()
+        if key and (key in seen or any(pattern.search(key) for pattern in BOILERPLATE_PATTERNS)):
+            continue
+        if key:
+            seen.add(key)
+        lines.append(line)
+    return normalize_whitespace("\n".join(lines))
+
+
+class TokenCounter:
+    """
+    Подсчет токенов локальным токенизатором tiktoken. Если словарь
+    токенизатора не удалось загрузить (он скачивается при первом
+    использовании), число токенов оценивается по длине текста
+    """
+    def __init__(self, model: str = LLM_MODEL):
+        self.model = model
+        self.encoding = None
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    def _load(self) -> None:
+        try:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"Токенизатор недоступен, число токенов оценивается по длине текста: {str(e)}")
+        self.loaded = True
+
+    def count(self, text: str) -> int:
+        with self.lock:
+            if not self.loaded:
+                self._load()
+        if self.encoding is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Обрезать текст до max_tokens токенов"""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        if self.encoding is None:
+            return text[:max_tokens * CHARS_PER_TOKEN]
+        return self.encoding.decode(self.encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+class PromptCompactor:
+    """
+    Сжатие переменных запроса перед подстановкой в шаблон цепочки:
+    удаление шаблонных абзацев из описания вакансии, лишних пробелов,
+    выбор разделов резюме, относящихся к вакансии, и ограничение
+    размера всего запроса бюджетом токенов цепочки
+    """
+    # переменные шаблонов, которые можно сокращать, в порядке сокращения
+    SHRINKABLE = ["resume", "job_description", "text", "resume_section"]
+
+    def __init__(self, budgets: Dict[str, int] = PROMPT_TOKEN_BUDGETS,
+                 default_budget: int = PROMPT_TOKEN_BUDGET_DEFAULT,
+                 counter: Optional[TokenCounter] = None):
+        self.budgets = budgets
+        self.default_budget = default_budget
+        self.counter = counter or TokenCounter()
+
+    def budget(self, chain_name: str) -> int:
+        return self.budgets.get(chain_name, self.default_budget)
+
+    def compact(self, chain_name: str, template: str, inputs: dict) -> dict:
+        """Сжатые переменные запроса цепочки chain_name с шаблоном template"""
+        compacted = dict(inputs)
+        for name, value in inputs.items():
+            if not isinstance(value, str):
+                continue
+            if name in ("job_description", "text"):
+                compacted[name] = strip_boilerplate(value)
+            else:
+                compacted[name] = normalize_whitespace(value)
+
+        template_tokens = self.counter.count(template)
+        before = template_tokens + self._inputs_tokens(inputs)
+        over_budget = template_tokens + self._inputs_tokens(compacted) - self.budget(chain_name)
+        if over_budget > 0 and isinstance(compacted.get("resume"), str):
+            query = compacted.get("job_description") or compacted.get("question") or compacted.get("questions") or ""
+            resume_tokens = self.counter.count(compacted["resume"])
+            compacted["resume"] = self.select_resume_sections(
+                compacted["resume"], query, resume_tokens - over_budget)
+            over_budget = template_tokens + self._inputs_tokens(compacted) - self.budget(chain_name)
+        for name in self.SHRINKABLE:
+            if over_budget <= 0:
+                break
+            if not isinstance(compacted.get(name), str):
+                continue
+            tokens = self.counter.count(compacted[name])
+            # переменную нельзя сократить меньше, чем до четверти ее размера
+            compacted[name] = self.counter.truncate(compacted[name], max(tokens - over_budget, tokens // 4))
+            over_budget = template_tokens + self._inputs_tokens(compacted) - self.budget(chain_name)
+
+        after = template_tokens + self._inputs_tokens(compacted)
+        if after > self.budget(chain_name):
+            logger.warning(f"Запрос цепочки '{chain_name}' больше бюджета: {after} > {self.budget(chain_name)} токенов")
+        logger.debug(f"Запрос цепочки '{chain_name}': {before} -> {after} токенов, сэкономлено {before - after}")
+        llm_metrics.record_compaction(chain_name, before, after)
+        return compacted
+
+    def select_resume_sections(self, resume: str, query: str, max_tokens: int) -> str:
+        """
+        Оставить разделы резюме (блоки, разделенные пустой строкой), в которых больше
+        всего слов из query, не превышая max_tokens. Первый раздел (имя, контакты,
+        должность) остается всегда, порядок разделов сохраняется
+        """
+        sections = resume.split("\n\n")
+        if len(sections) <= 1:
+            return resume
+        query_words = set(WORD_RE.findall(query.lower()))
+        scores = [len(query_words & set(WORD_RE.findall(section.lower()))) for section in sections]
+        order = [0] + sorted(range(1, len(sections)), key=lambda i: -scores[i])
+        selected: List[int] = []
+        used = 0
+        for i in order:
+            tokens = self.counter.count(sections[i])
+            if i != 0 and used + tokens > max_tokens:
+                continue
+            selected.append(i)
+            used += tokens
+        return "\n\n".join(sections[i] for i in sorted(selected))
+
+    def _inputs_tokens(self, inputs: dict) -> int:
+        return sum(self.counter.count(value if isinstance(value, str) else str(value)) for value in inputs.values())
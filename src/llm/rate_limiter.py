@@ -0,0 +1,119 @@
+from typing import Dict, Optional
+
+import asyncio
+import threading
+import time
+
+from src.app_config import LLM_RATE_LIMITS
+from loguru import logger
+
+
+class TokenBucket:
+    """
+    Корзина маркеров с пополнением per_minute маркеров в минуту. Уровень
+    может уходить в минус, если фактический расход оказался больше
+    оценки: следующие запросы подождут, пока долг не восполнится
+    """
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Через сколько секунд в корзине будет amount маркеров (запрос больше емкости ждет полную корзину)"""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        """Вернуть маркеры (отрицательное amount - списать дополнительно)"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Ограничение частоты запросов к одной модели провайдера: не больше
+    rpm запросов и tpm токенов в минуту. Перед запросом списывается
+    оценка токенов запроса, после ответа она уточняется по usage_metadata
+    """
+    def __init__(self, name: str, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Списать запрос и токены, если их хватает, иначе вернуть время ожидания"""
+        with self.lock:
+            wait_time = max(self.requests.wait_time(1) if self.requests else 0,
+                            self.tokens.wait_time(tokens) if self.tokens else 0)
+            if wait_time > 0:
+                return wait_time
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens:
+                self.tokens.consume(tokens)
+            return 0
+
+    def acquire(self, tokens: int) -> float:
+        """Дождаться возможности отправить запрос на tokens токенов, вернуть время ожидания"""
+        waited = 0.0
+        while True:
+            wait_time = self._reserve(tokens)
+            if wait_time <= 0:
+                self._log_wait(waited)
+                return waited
+            time.sleep(wait_time)
+            waited += wait_time
+
+    async def aacquire(self, tokens: int) -> float:
+        """Асинхронный вариант acquire"""
+        waited = 0.0
+        while True:
+            wait_time = self._reserve(tokens)
+            if wait_time <= 0:
+                self._log_wait(waited)
+                return waited
+            await asyncio.sleep(wait_time)
+            waited += wait_time
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Уточнить расход токенов по фактическому usage_metadata ответа"""
+        if self.tokens is None or not actual_tokens:
+            return
+        with self.lock:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def _log_wait(self, waited: float) -> None:
+        if waited > 0:
+            logger.debug(f"Запрос к {self.name} отложен на {round(waited, 1)} секунд из-за ограничения частоты")
+
+
+# ограничители частоты процесса, общие для всех цепочек, работающих с одной моделью
+_rate_limiters: Dict[str, Optional[RateLimiter]] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_name: str) -> Optional[RateLimiter]:
+    """
+    Ограничитель частоты модели model_name ("тип/модель") по LLM_RATE_LIMITS:
+    сначала ищутся ограничения модели, затем провайдера. None - ограничений нет
+    """
+    with _rate_limiters_lock:
+        if model_name not in _rate_limiters:
+            provider = model_name.split("/", 1)[0]
+            limits = LLM_RATE_LIMITS.get(model_name) or LLM_RATE_LIMITS.get(provider)
+            _rate_limiters[model_name] = RateLimiter(model_name, limits.get("rpm"), limits.get("tpm")) \
+                if limits else None
+        return _rate_limiters[model_name]
@@ -0,0 +1,245 @@
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, TypeVar
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from src.app_config import (
+    LLM_MAX_RETRIES, LLM_RETRY_BASE_DELAY_SEC, LLM_RETRY_MAX_DELAY_SEC, LLM_MAX_CONCURRENCY,
+    LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SEC,
+)
+from loguru import logger
+
+T = TypeVar("T")
+
+# коды ответа провайдера, после которых запрос имеет смысл повторить
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+
+class CircuitOpenError(Exception):
+    """Провайдер LLM недоступен, запросы не отправляются до истечения паузы"""
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """Код ответа HTTP из исключения клиента провайдера (httpx, openai, anthropic)"""
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Можно ли повторить запрос после ошибки: перегрузка и сбои провайдера,
+    ошибки сети и таймауты. Ошибки в запросе, авторизации и разборе
+    ответа повторять бесполезно
+    """
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError)):
+        return True
+    # ошибки сети клиентов провайдеров, не наследующие ошибки httpx (openai.APIConnectionError и т.п.)
+    name = type(error).__name__
+    return any(marker in name for marker in ("Connect", "Timeout", "Transport", "Network"))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Пауза перед повтором из заголовков retry-after-ms и retry-after ответа провайдера"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            # retry-after может быть задан датой
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель: после failure_threshold сбоев провайдера
+    подряд запросы сразу завершаются ошибкой CircuitOpenError, пока не
+    пройдет reset_timeout_sec. Затем пропускается один пробный запрос
+    """
+    def __init__(self, failure_threshold: int = LLM_CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout_sec: float = LLM_CIRCUIT_RESET_SEC):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_sec = reset_timeout_sec
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_progress = False
+
+    def before_call(self) -> bool:
+        """
+        Проверить, можно ли отправить запрос. Возвращает True, если это пробный
+        запрос: его нужно завершить record_success, record_failure или release_trial
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_timeout_sec or self.trial_in_progress:
+                raise CircuitOpenError(
+                    f"Провайдер LLM недоступен ({self.failures} сбоев подряд), запрос не отправлен")
+            self.trial_in_progress = True
+            return True
+
+    def is_open(self) -> bool:
+        """Запросы сейчас завершатся ошибкой CircuitOpenError (пробный запрос еще не разрешен)"""
+        with self.lock:
+            return self.opened_at is not None and \
+                (time.monotonic() - self.opened_at < self.reset_timeout_sec or self.trial_in_progress)
+
+    def record_success(self) -> None:
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info("Провайдер LLM снова отвечает")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def release_trial(self) -> None:
+        """
+        Освободить пробный запрос, прерванный без ответа провайдера (отмена,
+        закрытый поток ответа): следующий запрос снова будет пробным
+        """
+        with self.lock:
+            self.trial_in_progress = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            self.trial_in_progress = False
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.error(f"Провайдер LLM не отвечает: {self.failures} сбоев подряд, "
+                                 f"запросы приостановлены на {self.reset_timeout_sec} секунд")
+                self.opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """
+    Вызов провайдера LLM с ограничением числа одновременных запросов
+    (одним на синхронные, асинхронные и потоковые запросы), повторами с экспоненциальной паузой со случайной составляющей
+    (или паузой из retry-after), ограничением числа повторов и
+    автоматическим выключателем. Ошибки, которые не исправить повтором,
+    передаются вызывающему сразу
+    """
+    def __init__(self, max_retries: int = LLM_MAX_RETRIES, base_delay_sec: float = LLM_RETRY_BASE_DELAY_SEC,
+                 max_delay_sec: float = LLM_RETRY_MAX_DELAY_SEC, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.max_retries = max_retries
+        self.base_delay_sec = base_delay_sec
+        self.max_delay_sec = max_delay_sec
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        # общий для всех потоков и циклов событий (asyncio.Semaphore привязан к одному циклу)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """Пауза перед повтором номер attempt (с нуля)"""
+        server_delay = retry_after(error)
+        if server_delay is not None:
+            # не раньше, чем просит провайдер, и с разбросом, чтобы потоки не повторяли запрос одновременно
+            return min(server_delay, self.max_delay_sec) + random.uniform(0, self.base_delay_sec)
+        return random.uniform(0, min(self.max_delay_sec, self.base_delay_sec * 2 ** attempt))
+
+    def call(self, func: Callable[[], T], acquire: Callable[[], Any] = None) -> T:
+        """
+        Выполнить запрос func с повторами. acquire (ожидание ограничителя частоты)
+        вызывается перед каждой попыткой до занятия места среди одновременных запросов
+        """
+        attempt = 0
+        while True:
+            trial = self.breaker.before_call()
+            try:
+                try:
+                    if acquire is not None:
+                        acquire()
+                    with self.slot():
+                        result = func()
+                except Exception as e:
+                    wait_time = self._on_failure(e, attempt)
+                else:
+                    self.breaker.record_success()
+                    return result
+            finally:
+                if trial:
+                    self.breaker.release_trial()
+            time.sleep(wait_time)
+            attempt += 1
+
+    async def acall(self, func: Callable[[], Awaitable[T]], acquire: Callable[[], Awaitable[Any]] = None) -> T:
+        """Выполнить асинхронный запрос func с повторами (acquire - как в call)"""
+        attempt = 0
+        while True:
+            trial = self.breaker.before_call()
+            try:
+                try:
+                    if acquire is not None:
+                        await acquire()
+                    async with self.aslot():
+                        result = await func()
+                except Exception as e:
+                    wait_time = self._on_failure(e, attempt)
+                else:
+                    self.breaker.record_success()
+                    return result
+            finally:
+                # в том числе при отмене (asyncio.CancelledError), например по таймауту маршрута
+                if trial:
+                    self.breaker.release_trial()
+            await asyncio.sleep(wait_time)
+            attempt += 1
+
+    def _on_failure(self, error: Exception, attempt: int) -> float:
+        """Учесть ошибку и вернуть паузу перед повтором или передать ошибку дальше"""
+        if not is_retryable(error):
+            # провайдер ответил, значит он доступен
+            self.breaker.record_success()
+            logger.error(f"Ошибка запроса к LLM, повтор не поможет: {type(error).__name__}: {str(error)}")
+            raise error
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            logger.error(f"Запрос к LLM не удался после {attempt + 1} попыток: {str(error)}")
+            raise error
+        wait_time = self.delay(attempt, error)
+        logger.warning(f"Ошибка запроса к LLM ({type(error).__name__}: {str(error)}), "
+                       f"повтор {attempt + 1} из {self.max_retries} через {round(wait_time, 1)} секунд")
+        return wait_time
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Занять место среди одновременных запросов на время запроса (в том числе потокового)"""
+        with self.semaphore:
+            yield
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """Занять место среди одновременных запросов, ожидая его в отдельном потоке, а не в цикле событий"""
+        if not self.semaphore.acquire(blocking=False):
+            acquiring = asyncio.ensure_future(asyncio.to_thread(self.semaphore.acquire))
+            try:
+                await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                # поток все равно получит место - вернуть его сразу после этого
+                acquiring.add_done_callback(lambda _: self.semaphore.release())
+                raise
+        try:
+            yield
+        finally:
+            self.semaphore.release()
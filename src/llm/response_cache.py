@@ -0,0 +1,115 @@
+from typing import Dict, List, Optional, Union
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.prompt_values import PromptValue
+
+from src.app_config import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SEC
+from loguru import logger
+
+
+def render_prompt(prompt: Union[PromptValue, str, List[BaseMessage]]) -> str:
+    """Текст запроса к LLM в виде, не зависящем от способа его передачи"""
+    if isinstance(prompt, str):
+        return prompt
+    if isinstance(prompt, PromptValue):
+        prompt = prompt.to_messages()
+    return json.dumps([[message.type, message.content] for message in prompt], ensure_ascii=False)
+
+
+def cache_key(model: str, prompt: Union[PromptValue, str, List[BaseMessage]], temperature: Optional[float]) -> str:
+    """Ключ ответа в кэше: хэш модели, полного текста запроса и температуры"""
+    data = json.dumps([model, render_prompt(prompt), temperature], ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Кэш ответов LLM в базе SQLite. Одинаковый запрос к той же модели
+    с той же температурой (повторный запуск после сбоя, повторно
+    опубликованная вакансия, одинаковые вопросы работодателей) не
+    отправляется провайдеру. Ответы старше ttl_sec не используются,
+    а при превышении max_entries удаляются давно не использованные
+    """
+    def __init__(self, db_file: Path, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 ttl_sec: float = LLM_CACHE_TTL_SEC):
+        self.db_file = Path(db_file)
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.lock = threading.Lock()
+        # число попаданий и промахов по цепочкам
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.connection = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA busy_timeout=30000")
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    chain TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )""")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used_at ON responses (last_used_at)")
+        self.purge_expired()
+        logger.debug(f"Кэш ответов LLM открыт: {self.db_file}")
+
+    def get(self, key: str, chain_name: str) -> Optional[BaseMessage]:
+        """Сохраненный ответ на запрос с ключом key или None"""
+        now = time.time()
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT message FROM responses WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl_sec)).fetchone()
+            if row is not None:
+                self.connection.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key))
+        counter = self.hits if row is not None else self.misses
+        counter[chain_name] = counter.get(chain_name, 0) + 1
+        if row is None:
+            return None
+        return messages_from_dict([json.loads(row[0])])[0]
+
+    def put(self, key: str, chain_name: str, message: BaseMessage) -> None:
+        """Сохранить ответ и удалить давно не использованные, если ответов больше max_entries"""
+        now = time.time()
+        data = json.dumps(message_to_dict(message), ensure_ascii=False, default=str)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, chain, message, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?)", (key, chain_name, data, now, now))
+            count = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self.connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used_at LIMIT ?)",
+                    (count - self.max_entries,))
+
+    def purge_expired(self) -> None:
+        """Удалить ответы старше ttl_sec"""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM responses WHERE created_at <= ?", (time.time() - self.ttl_sec,))
+
+    def stats(self) -> str:
+        """Статистика попаданий в кэш по цепочкам"""
+        chains = sorted(set(self.hits) | set(self.misses))
+        if not chains:
+            return "запросов не было"
+        total_hits = sum(self.hits.values())
+        total = total_hits + sum(self.misses.values())
+        by_chain = ", ".join(f"{chain} {self.hits.get(chain, 0)}/{self.hits.get(chain, 0) + self.misses.get(chain, 0)}"
+                             for chain in chains)
+        return f"из кэша {total_hits} из {total} ({by_chain})"
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
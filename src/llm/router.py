@@ -0,0 +1,136 @@
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Iterator, List, Optional, TypeVar
+
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+
+from src.app_config import LLM_ROUTE_MAX_THREADS
+from src.llm.metrics import llm_metrics
+from loguru import logger
+
+T = TypeVar("T")
+
+# потоки для запросов с ограничением времени, общие для всех маршрутов процесса
+_executor = ThreadPoolExecutor(max_workers=LLM_ROUTE_MAX_THREADS, thread_name_prefix="llm-route")
+
+
+class RouteTimeoutError(Exception):
+    """Модель маршрута не ответила за допустимое время"""
+
+
+def call_with_timeout(func: Callable[[], T], timeout: Optional[float],
+                      on_abandoned: Callable[[Future], None] = None) -> T:
+    """
+    Выполнить func в общем пуле потоков, ожидая результат не дольше timeout
+    секунд. Запрос, который еще не начался, отменяется. Начатый запрос
+    дорабатывает в своем потоке, его результат не используется, а по
+    окончании вызывается on_abandoned
+    """
+    if timeout is None:
+        return func()
+    future = _executor.submit(func)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        if future.done():
+            raise
+        if not future.cancel() and on_abandoned is not None:
+            future.add_done_callback(on_abandoned)
+        raise RouteTimeoutError(f"нет ответа за {timeout} секунд")
+
+
+class ChainRouter:
+    """
+    Маршрут цепочки по нескольким моделям: запрос отправляется первой
+    доступной модели, а если она вернула ошибку или не ответила за
+    latency_slo_sec, то следующей. Модели, у которых сработал
+    автоматический выключатель, пропускаются. Время ответа и исход
+    запроса к каждой модели учитываются в метриках маршрутов
+    """
+    def __init__(self, chain_name: str, models: list, latency_slo_sec: Optional[float] = None):
+        # модели маршрута (LoggerChatModel) в порядке использования
+        self.chain_name = chain_name
+        self.models = models
+        self.latency_slo_sec = latency_slo_sec
+
+    def __call__(self, messages, config: RunnableConfig = None):
+        routes = self._available()
+        for i, model in enumerate(routes):
+            # последняя модель маршрута ждет ответа без ограничения времени
+            timeout = self.latency_slo_sec if i < len(routes) - 1 else None
+            started_at = time.monotonic()
+            try:
+                reply = call_with_timeout(lambda: model(messages, config), timeout,
+                                          lambda future, model=model: self._on_abandoned(model, future))
+            except Exception as e:
+                self._on_failure(model, e, started_at, is_last=i == len(routes) - 1)
+                continue
+            self._record(model, started_at, "ok")
+            return reply
+
+    async def acall(self, messages, config: RunnableConfig = None):
+        routes = self._available()
+        for i, model in enumerate(routes):
+            timeout = self.latency_slo_sec if i < len(routes) - 1 else None
+            started_at = time.monotonic()
+            try:
+                reply = await asyncio.wait_for(model.acall(messages, config), timeout)
+            except asyncio.TimeoutError:
+                error = RouteTimeoutError(f"нет ответа за {timeout} секунд")
+                self._on_failure(model, error, started_at, is_last=i == len(routes) - 1)
+                continue
+            except Exception as e:
+                self._on_failure(model, e, started_at, is_last=i == len(routes) - 1)
+                continue
+            self._record(model, started_at, "ok")
+            return reply
+
+    def stream(self, messages, vacancy: str = "") -> Iterator[str]:
+        """
+        Ответ по частям от первой доступной модели. Переход к следующей
+        модели возможен только до получения первой части ответа
+        """
+        routes = self._available()
+        for i, model in enumerate(routes):
+            started_at = time.monotonic()
+            received = False
+            try:
+                for text in model.stream(messages, vacancy):
+                    received = True
+                    yield text
+            except Exception as e:
+                self._on_failure(model, e, started_at, is_last=received or i == len(routes) - 1)
+                continue
+            self._record(model, started_at, "ok")
+            return
+
+    def as_runnable(self) -> RunnableLambda:
+        """Звено цепочки с синхронным и асинхронным (ainvoke) вызовом"""
+        return RunnableLambda(self, afunc=self.acall, name=f"ChainRouter[{self.chain_name}]")
+
+    def _available(self) -> List:
+        """Модели маршрута без сработавшего выключателя (если таких нет - все модели)"""
+        available = [model for model in self.models if not model.resilience.breaker.is_open()]
+        return available or self.models
+
+    def _on_failure(self, model, error: Exception, started_at: float, is_last: bool) -> None:
+        """Учесть ошибку модели и передать ее дальше, если переходить больше некуда"""
+        outcome = "timeout" if isinstance(error, RouteTimeoutError) else "error"
+        self._record(model, started_at, outcome)
+        if is_last:
+            raise error
+        logger.warning(f"Модель {model.llm.model_name} не ответила на запрос цепочки '{self.chain_name}' "
+                       f"({type(error).__name__}: {str(error)}), запрос передан следующей модели маршрута")
+
+    def _on_abandoned(self, model, future: Future) -> None:
+        """Учесть ответ, полученный после перехода к следующей модели: он оплачен, но не использован"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        logger.debug(f"Модель {model.llm.model_name} ответила на запрос цепочки '{self.chain_name}' "
+                     f"после перехода к следующей модели, ответ не использован")
+        llm_metrics.record_route_discarded(self.chain_name, model.llm.model_name)
+
+    def _record(self, model, started_at: float, outcome: str) -> None:
+        llm_metrics.record_route(self.chain_name, model.llm.model_name, time.monotonic() - started_at, outcome)
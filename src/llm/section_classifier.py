@@ -0,0 +1,163 @@
+from typing import Callable, Dict, Optional
+
+import json
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+from src.answer_index import sanitize_text
+from src.app_config import LOCAL_SECTION_CLASSIFIER
+from loguru import logger
+
+
+# ключевые слова вопросов, однозначно указывающие на раздел резюме
+SECTION_KEYWORDS = {
+    "personal_information": [
+        r"e-?mail", r"\bпочт", r"телефон", r"\bphone", r"telegram", r"телеграм", r"linkedin",
+        r"контакт", r"\bвозраст", r"дата рождения", r"\bгде вы живете", r"\bгород прожива",
+    ],
+    "legal_authorization": [
+        r"гражданств", r"citizenship", r"\bвиз[аеуы]?\b", r"\bvisa", r"разрешени[ея] на работу",
+        r"work permit", r"work authori[sz]ation", r"\bвнж\b", r"\bрвп\b", r"sponsorship",
+    ],
+    "work_preferences": [
+        r"удален", r"удалён", r"\bremote", r"\bофис", r"\boffice", r"переезд", r"релокац",
+        r"relocat", r"гибрид", r"hybrid", r"командировк", r"формат работы",
+    ],
+    "education_details": [
+        r"образовани", r"\bвуз", r"университет", r"universit", r"\bdegree", r"диплом",
+        r"факультет", r"специальност",
+    ],
+    "experience_details": [
+        r"\bопыт", r"experience", r"\bстаж", r"\bстек", r"технологи", r"фреймворк", r"framework",
+        r"\bработали\b", r"обязанност",
+    ],
+    "projects": [
+        r"\bпроект", r"\bproject", r"портфолио", r"portfolio", r"репозитори", r"repositor",
+        r"github", r"\bpet\b",
+    ],
+    "availability": [
+        r"когда (вы )?(сможете|готовы|можете)", r"выйти на работу", r"приступить",
+        r"notice period", r"start date", r"отработк", r"как скоро",
+    ],
+    "salary_expectations": [
+        r"зарплат", r"\bзп\b", r"\bоклад", r"\bдоход", r"\bвилк", r"salary", r"compensation",
+        r"на руки", r"денежн",
+    ],
+    "certifications": [
+        r"сертификат", r"certif", r"лицензи", r"\blicen[cs]e",
+    ],
+    "languages": [
+        r"английск", r"english", r"\bязык", r"language", r"немецк", r"german",
+        r"уровень владения",
+    ],
+    "interests": [
+        r"хобби", r"hobb", r"увлечен", r"увлечён", r"\bинтерес", r"interests",
+        r"свободное время",
+    ],
+}
+SECTION_PATTERNS = {section: [re.compile(keyword) for keyword in keywords]
+                    for section, keywords in SECTION_KEYWORDS.items()}
+
+
+class SectionClassifier:
+    """
+    Определение раздела резюме, к которому относится вопрос работодателя.
+    Решения кэшируются по очищенному тексту вопроса и сохраняются между
+    запусками, а вопросы с однозначными ключевыми словами классифицируются
+    локально, без обращения к LLM.
+    """
+    def __init__(self, cache_file: Path, use_local_classifier: bool = LOCAL_SECTION_CLASSIFIER):
+        self.cache_file = Path(cache_file)
+        self.use_local_classifier = use_local_classifier
+        self.lock = threading.Lock()
+        self.cache: Dict[str, str] = self._load_cache()
+        self.cache_hits = 0
+        self.local_hits = 0
+        self.llm_calls = 0
+
+    def classify(self, question: str, llm_classifier: Callable[[str], str]) -> str:
+        """Определить раздел резюме для вопроса, обращаясь к LLM только в неоднозначных случаях"""
+        section_name = self.find_section(question)
+        if section_name is not None:
+            return section_name
+        key = sanitize_text(question)
+        self.llm_calls += 1
+        section_name = llm_classifier(question)
+        self._save_to_cache(key, section_name)
+        return section_name
+
+    def find_section(self, question: str) -> Optional[str]:
+        """Раздел резюме для вопроса из кэша или по ключевым словам, без обращения к LLM"""
+        key = sanitize_text(question)
+        section_name = self.cache.get(key)
+        if section_name is not None:
+            self.cache_hits += 1
+            logger.debug(f"Раздел резюме для вопроса взят из кэша: {section_name}")
+            return section_name
+        if self.use_local_classifier:
+            section_name = self.classify_locally(key)
+            if section_name is not None:
+                self.local_hits += 1
+                logger.debug(f"Раздел резюме для вопроса определен локально: {section_name}")
+                return section_name
+        return None
+
+    @staticmethod
+    def classify_locally(question: str) -> Optional[str]:
+        """
+        Определить раздел по ключевым словам. Возвращает None, если
+        ключевых слов нет или несколько разделов набрали одинаковый счет
+        """
+        scores = {section: sum(1 for pattern in patterns if pattern.search(question))
+                  for section, patterns in SECTION_PATTERNS.items()}
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best_section, best_score), (_, second_score) = ranked[0], ranked[1]
+        if best_score == 0 or best_score == second_score:
+            return None
+        return best_section
+
+    def stats(self) -> str:
+        """Статистика определения разделов резюме"""
+        return (f"из кэша: {self.cache_hits}, локально: {self.local_hits}, "
+                f"запросов к LLM: {self.llm_calls}")
+
+    def _load_cache(self) -> Dict[str, str]:
+        """Загрузить кэш разделов из файла"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("Формат файла JSON неверный, ожидаем словарь")
+                return data
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, ValueError):
+            logger.error(f"Кэш разделов резюме {self.cache_file} поврежден, начинаем с пустого кэша")
+            return {}
+
+    def _save_to_cache(self, key: str, section_name: str) -> None:
+        """
+        Добавить решение в кэш и сохранить кэш в файл. В тот же файл пишут
+        классификаторы других браузеров (WORKERS_NUM > 1), поэтому перед
+        записью их решения из файла добавляются в кэш, а временный файл у
+        каждой записи свой
+        """
+        with self.lock:
+            cache = self._load_cache()
+            cache.update(self.cache)
+            cache[key] = section_name
+            self.cache = cache
+            tmp_file = None
+            try:
+                fd, tmp_file = tempfile.mkstemp(prefix=self.cache_file.name + ".", suffix=".tmp",
+                                                dir=self.cache_file.parent)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(cache, f, ensure_ascii=False)
+                os.replace(tmp_file, self.cache_file)
+            except OSError as e:
+                logger.error(f"Не удалось сохранить кэш разделов резюме: {str(e)}")
+                if tmp_file is not None and os.path.exists(tmp_file):
+                    os.remove(tmp_file)
@@ -0,0 +1,73 @@
+from typing import Iterable, Iterator, List, Optional
+
+import threading
+
+
+def split_paragraphs(chunks: Iterable[str]) -> Iterator[str]:
+    """Собрать фрагменты текста, приходящие от LLM, в абзацы (абзац отдается вместе с пустой строкой после него)"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        while "\n\n" in buffer:
+            paragraph, buffer = buffer.split("\n\n", 1)
+            yield paragraph + "\n\n"
+    if buffer:
+        yield buffer
+
+
+class TextStream:
+    """
+    Текст, который пишется в фоновом потоке по частям. Читатель получает
+    части по мере их появления (итерация) или весь текст сразу (result),
+    поэтому поток можно использовать вместо Future с готовым текстом
+    """
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.finished = False
+        # читателю текст больше не нужен, писатель прекращает запись
+        self.cancelled = False
+        self.exception: Optional[BaseException] = None
+        self.condition = threading.Condition()
+
+    def put(self, chunk: str) -> None:
+        """Добавить часть текста"""
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, exception: Optional[BaseException] = None) -> None:
+        """Отметить, что текст дописан (или что при его написании возникла ошибка)"""
+        with self.condition:
+            self.finished = True
+            self.exception = exception
+            self.condition.notify_all()
+
+    def cancel(self) -> None:
+        """Отменить запись текста: писатель прекращает ее перед следующей частью"""
+        with self.condition:
+            self.cancelled = True
+            self.finished = True
+            self.condition.notify_all()
+
+    def done(self) -> bool:
+        with self.condition:
+            return self.finished
+
+    def __iter__(self) -> Iterator[str]:
+        """Части текста по мере их появления"""
+        position = 0
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.finished or position < len(self.chunks))
+                chunks = self.chunks[position:]
+                finished, exception = self.finished, self.exception
+            position += len(chunks)
+            yield from chunks
+            if finished and position >= len(self.chunks):
+                if exception is not None:
+                    raise exception
+                return
+
+    def result(self) -> str:
+        """Дождаться окончания и вернуть весь текст"""
+        return "".join(self)
@@ -0,0 +1,69 @@
+from typing import Callable
+
+import threading
+import time
+import traceback
+from collections import deque
+
+from src.app_config import PACING_MIN_IDLE_SLICE_SEC
+from loguru import logger
+
+
+class PacingScheduler:
+    """
+    Планировщик пауз, имитирующих поведение пользователя. Паузы задаются
+    как сроки, до которых бот не должен совершать действий на сайте.
+    Пока срок не наступил, выполняется накопившаяся фоновая работа
+    (генерация текстов для следующих вакансий, открытие вкладок,
+    сохранение истории), а оставшееся время бот просто ждет
+    """
+    def __init__(self, min_idle_slice_sec: float = PACING_MIN_IDLE_SLICE_SEC):
+        self.min_idle_slice_sec = min_idle_slice_sec
+        self.tasks = deque()
+        self.lock = threading.Lock()
+        self.tasks_run = 0
+        self.idle_time_used = 0.0
+
+    def submit_idle(self, name: str, task: Callable[[], None]) -> None:
+        """Поставить в очередь работу, которая выполнится во время ближайшей паузы"""
+        with self.lock:
+            self.tasks.append((name, task))
+
+    def pending(self) -> int:
+        """Число задач, ожидающих паузы"""
+        with self.lock:
+            return len(self.tasks)
+
+    def run_idle_tasks(self, deadline: float) -> None:
+        """Выполнять задачи из очереди, пока до срока deadline остается не меньше min_idle_slice_sec"""
+        while time.monotonic() + self.min_idle_slice_sec <= deadline:
+            with self.lock:
+                if not self.tasks:
+                    return
+                name, task = self.tasks.popleft()
+            started_at = time.monotonic()
+            try:
+                task()
+            except Exception:
+                tb_str = traceback.format_exc()
+                logger.error(f"Ошибка в фоновой задаче '{name}': {tb_str}")
+            duration = time.monotonic() - started_at
+            self.tasks_run += 1
+            self.idle_time_used += duration
+            logger.debug(f"Во время паузы выполнена задача '{name}' за {round(duration, 2)} секунд")
+
+    def wait_until(self, deadline: float) -> None:
+        """Дождаться срока deadline (по time.monotonic), выполняя фоновую работу"""
+        self.run_idle_tasks(deadline)
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def pause(self, seconds: float) -> None:
+        """Выдержать паузу длиной seconds секунд"""
+        self.wait_until(time.monotonic() + seconds)
+
+    def stats(self) -> str:
+        """Статистика использования пауз"""
+        return (f"задач выполнено во время пауз: {self.tasks_run}, "
+                f"на это ушло {round(self.idle_time_used, 1)} секунд, в очереди: {self.pending()}")
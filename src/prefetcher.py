@@ -0,0 +1,79 @@
+from typing import List, Tuple, Iterator
+
+from collections import deque
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from src.utils import open_blocked_tab
+from loguru import logger
+
+
+class VacancyPrefetcher:
+    """
+    Заранее открывает вакансии из выдачи в фоновых вкладках браузера.
+    Пока обрабатывается текущая вакансия, следующие lookahead вакансий
+    уже загружаются, поэтому переключение на них не ждет загрузки страницы.
+    Если заданы blocked_url_patterns, во вкладках не загружаются ресурсы по ним
+    """
+    def __init__(self, driver: webdriver.Chrome, urls: List[str], lookahead: int,
+                 blocked_url_patterns: List[str] = ()):
+        self.driver = driver
+        self.urls = deque(urls)
+        self.lookahead = max(lookahead, 0)
+        self.blocked_url_patterns = list(blocked_url_patterns)
+        self.opened: deque = deque()
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """Выдавать пары (ссылка на вакансию, вкладка с уже загружающейся вакансией)"""
+        while True:
+            self.fill()
+            if not self.opened:
+                return
+            yield self.opened.popleft()
+
+    def fill(self) -> None:
+        """
+        Открыть фоновые вкладки: текущую вакансию и lookahead следующих.
+        Можно вызывать заранее, например во время паузы между вакансиями
+        """
+        while self.urls and len(self.opened) < self.lookahead + 1:
+            url = self.urls.popleft()
+            handle = self._open_tab(url)
+            if handle is not None:
+                self.opened.append((url, handle))
+
+    def _open_tab(self, url: str) -> str:
+        """Открыть ссылку в новой вкладке, не переключаясь на нее"""
+        if self.blocked_url_patterns:
+            try:
+                handle = open_blocked_tab(self.driver, url, self.blocked_url_patterns)
+            except WebDriverException as e:
+                logger.error(f"Не удалось открыть вакансию {url} в новой вкладке: {str(e)}")
+                return None
+            logger.debug(f"Заранее открыли вакансию {url}")
+            return handle
+        handles_before = set(self.driver.window_handles)
+        try:
+            self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+        except WebDriverException as e:
+            logger.error(f"Не удалось открыть вакансию {url} в новой вкладке: {str(e)}")
+            return None
+        new_handles = set(self.driver.window_handles) - handles_before
+        if not new_handles:
+            logger.error(f"Вкладка с вакансией {url} не открылась")
+            return None
+        logger.debug(f"Заранее открыли вакансию {url}")
+        return new_handles.pop()
+
+    def close(self) -> None:
+        """Закрыть вкладки, которые так и не были обработаны"""
+        current_handle = self.driver.current_window_handle
+        while self.opened:
+            _, handle = self.opened.popleft()
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except WebDriverException:
+                pass
+        self.urls.clear()
+        self.driver.switch_to.window(current_handle)
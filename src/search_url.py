@@ -0,0 +1,320 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import httpx
+
+from loguru import logger
+
+
+SEARCH_URL = "https://hh.ru/search/vacancy"
+HH_API_URL = "https://api.hh.ru"
+
+# значения параметров поиска hh.ru для настроек из config.yaml.
+# Для некоторых настроек поддерживаются оба написания ключей, встречающиеся в коде и примере конфигурации
+SEARCH_ONLY_FIELDS = {
+    "vacancy_name": "name",
+    "company_name": "company_name",
+    "vacancy_description": "description",
+}
+EXPERIENCE_VALUES = {
+    "no_experience": "noExperience",
+    "between_1_and_3": "between1And3",
+    "between_3_and_6": "between3And6",
+    "6_and_more": "moreThan6",
+    "more_than_6": "moreThan6",
+}
+EDUCATION_VALUES = {
+    "not_needed": "not_required_or_not_specified",
+    "middle": "special_secondary",
+    "higher": "higher",
+}
+EMPLOYMENT_VALUES = {
+    "full_time": "full",
+    "part_time": "part",
+    "project": "project",
+    "volunteer": "volunteer",
+    "volunteering": "volunteer",
+    "probation": "probation",
+    "internship": "probation",
+}
+SCHEDULE_VALUES = {
+    "full_day": "fullDay",
+    "shift": "shift",
+    "flexible": "flexible",
+    "remote": "remote",
+    "fly_in_fly_out": "flyInFlyOut",
+}
+PART_TIME_VALUES = {
+    "project": "employment_project",
+    "part": "employment_part",
+    "from_4_hours_per_day": "from_four_to_six_hours_in_a_day",
+    "weekend": "only_saturday_and_sunday",
+    "evenings": "start_after_sixteen",
+}
+LABEL_VALUES = {
+    "with_address": "with_address",
+    "accept_handicapped": "accept_handicapped",
+    "not_from_agency": "not_from_agency",
+    "accept_kids": "accept_kids",
+    "accredited_it": "accredited_it",
+    "low_performance": "low_performance",
+}
+ORDER_BY_VALUES = {
+    "relevance": "relevance",
+    "publication_time": "publication_time",
+    "salary_desc": "salary_desc",
+    "salary_asc": "salary_asc",
+}
+SEARCH_PERIOD_VALUES = {
+    "all_time": "0",
+    "month": "30",
+    "week": "7",
+    "three_days": "3",
+    "one_day": "1",
+}
+ITEMS_ON_PAGE_VALUES = {
+    "show_20": "20",
+    "show_50": "50",
+    "show_100": "100",
+}
+
+# настройки, которые влияют на ссылку поиска (по ним строится ключ кэша)
+SEARCH_PARAMETER_KEYS = [
+    "job_title", "login", "keywords", "search_only", "words_to_exclude", "specialization", "industry",
+    "regions", "districts", "subway", "income", "education", "experience", "job_type", "work_schedule",
+    "side_job", "other_params", "sort_by", "output_period", "output_size",
+]
+
+
+def search_page_url(search_url: str, page: int) -> str:
+    """Ссылка на страницу выдачи с номером page (нумерация на hh.ru начинается с 0)"""
+    parts = urlsplit(search_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != "page"]
+    query.append(("page", str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _checked(options: Dict[str, bool], values: Dict[str, str]) -> List[str]:
+    """Значения параметра для всех отмеченных в настройках пунктов"""
+    return [values[key] for key, checked in options.items() if checked is True and key in values]
+
+
+def compile_search_params(parameters: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Перевести настройки поиска из config.yaml в параметры ссылки поиска hh.ru.
+    Сюда входят только настройки, не требующие справочников hh.ru
+    (регионы, специализация и т.п. переводятся в идентификаторы в SearchUrlBuilder)
+    """
+    params = []
+    keywords = parameters.get("keywords", [])
+    if keywords:
+        params.append(("text", ", ".join(keywords)))
+    words_to_exclude = parameters.get("words_to_exclude", [])
+    if words_to_exclude:
+        params.append(("excluded_text", ", ".join(words_to_exclude)))
+    params += [("search_field", value)
+               for value in _checked(parameters.get("search_only", {}), SEARCH_ONLY_FIELDS)]
+    # "Не имеет значения" - то же, что не задавать опыт
+    params += [("experience", value)
+               for value in _checked(parameters.get("experience", {}), EXPERIENCE_VALUES)[:1]]
+    params += [("education", value)
+               for value in _checked(parameters.get("education", {}), EDUCATION_VALUES)]
+    job_type = parameters.get("job_type", {})
+    params += [("employment", value) for value in _checked(job_type, EMPLOYMENT_VALUES)]
+    if job_type.get("civil_law_contract") is True:
+        params.append(("accept_temporary", "true"))
+    params += [("schedule", value)
+               for value in _checked(parameters.get("work_schedule", {}), SCHEDULE_VALUES)]
+    params += [("part_time", value)
+               for value in _checked(parameters.get("side_job", {}), PART_TIME_VALUES)]
+    params += [("label", value)
+               for value in _checked(parameters.get("other_params", {}), LABEL_VALUES)]
+    income = parameters.get("income", 0)
+    if income > 0:
+        params.append(("salary", str(income)))
+    params += [("order_by", value)
+               for value in _checked(parameters.get("sort_by", {}), ORDER_BY_VALUES)[:1]]
+    params += [("search_period", value)
+               for value in _checked(parameters.get("output_period", {}), SEARCH_PERIOD_VALUES)[:1]]
+    params += [("items_on_page", value)
+               for value in _checked(parameters.get("output_size", {}), ITEMS_ON_PAGE_VALUES)[:1]]
+    return params
+
+
+class HhDictionaries:
+    """Поиск идентификаторов регионов, специализаций, отраслей и станций метро через API hh.ru"""
+    def __init__(self, client: httpx.Client = None):
+        self.client = client if client is not None else httpx.Client(
+            base_url=HH_API_URL, headers={"User-Agent": "hh-apply-bot/1.0"}, timeout=10)
+
+    def area_id(self, name: str) -> Optional[str]:
+        """Идентификатор региона по названию"""
+        items = self._get("/suggests/areas", params={"text": name}).get("items", [])
+        return self._match(name, [(item["id"], item["text"]) for item in items])
+
+    def professional_role_id(self, name: str) -> Optional[str]:
+        """Идентификатор специализации по названию"""
+        items = self._get("/suggests/professional_roles", params={"text": name}).get("items", [])
+        return self._match(name, [(item["id"], item["text"]) for item in items])
+
+    def industry_id(self, name: str) -> Optional[str]:
+        """Идентификатор отрасли компании по названию"""
+        candidates = []
+        for industry in self._get("/industries"):
+            candidates.append((industry["id"], industry["name"]))
+            candidates += [(sub["id"], sub["name"]) for sub in industry.get("industries", [])]
+        return self._match(name, candidates)
+
+    def metro_id(self, city_id: str, name: str) -> Optional[str]:
+        """Идентификатор станции метро в городе city_id по названию"""
+        lines = self._get(f"/metro/{city_id}").get("lines", [])
+        return self._match(name, [(station["id"], station["name"])
+                                  for line in lines for station in line.get("stations", [])])
+
+    def close(self) -> None:
+        self.client.close()
+
+    def __enter__(self) -> "HhDictionaries":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _get(self, path: str, params: dict = None) -> Any:
+        response = self.client.get(path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _match(name: str, candidates: List[Tuple[str, str]]) -> Optional[str]:
+        """Идентификатор с точно совпадающим названием, иначе первый из названий, содержащих name"""
+        name = name.strip().lower()
+        for candidate_id, candidate_name in candidates:
+            if candidate_name.strip().lower() == name:
+                return str(candidate_id)
+        for candidate_id, candidate_name in candidates:
+            if name in candidate_name.lower():
+                return str(candidate_id)
+        return None
+
+
+class SearchUrlBuilder:
+    """
+    Построение ссылки на выдачу hh.ru по настройкам из config.yaml вместо
+    заполнения формы расширенного поиска. Готовая ссылка кэшируется
+    в файле по ключу из настроек поиска, поэтому при следующих запусках
+    бот сразу переходит к выдаче
+    """
+    def __init__(self, parameters: Dict[str, Any], cache_file: Path, dictionaries: HhDictionaries = None):
+        self.parameters = parameters
+        self.cache_file = Path(cache_file)
+        self.dictionaries = dictionaries
+
+    def cache_key(self) -> str:
+        """Ключ кэша: хэш всех настроек, влияющих на ссылку поиска"""
+        search_parameters = {key: self.parameters.get(key) for key in SEARCH_PARAMETER_KEYS}
+        dump = json.dumps(search_parameters, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(dump.encode("utf-8")).hexdigest()
+
+    def load_cached(self) -> Optional[str]:
+        """Ссылка, построенная при прошлых запусках с такими же настройками"""
+        return self._load_cache().get(self.cache_key())
+
+    def save(self, url: str) -> None:
+        """Сохранить ссылку в кэш (без номера страницы)"""
+        parts = urlsplit(url)
+        query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != "page"]
+        url = urlunsplit(parts._replace(query=urlencode(query)))
+        cache = self._load_cache()
+        cache[self.cache_key()] = url
+        tmp_file = self.cache_file.with_suffix(self.cache_file.suffix + ".tmp")
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_file, self.cache_file)
+            logger.debug(f"Ссылка на выдачу сохранена в кэш: {url}")
+        except OSError as e:
+            logger.error(f"Не удалось сохранить ссылку на выдачу в кэш: {str(e)}")
+
+    def build(self, resume_id: str = None) -> Optional[str]:
+        """
+        Построить ссылку на выдачу. Возвращает None, если какую-то настройку
+        не удалось перевести в параметр поиска - тогда нужно заполнять форму
+        """
+        params = [("resume", resume_id)] if resume_id else []
+        params += compile_search_params(self.parameters)
+        try:
+            resolved_params = self._resolve_dictionary_params()
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            logger.warning(f"Не удалось обратиться к справочникам hh.ru: {str(e)}")
+            return None
+        if resolved_params is None:
+            return None
+        url = f"{SEARCH_URL}?{urlencode(params + resolved_params)}"
+        logger.debug(f"Построена ссылка на выдачу: {url}")
+        return url
+
+    def _resolve_dictionary_params(self) -> Optional[List[Tuple[str, str]]]:
+        """Перевести названия регионов, специализации, отрасли и метро в идентификаторы hh.ru"""
+        if self.parameters.get("districts"):
+            # у районов нет публичного справочника, поэтому в ссылку они не попадают
+            logger.warning(f"Районы {self.parameters['districts']} не учитываются в ссылке на выдачу: "
+                           f"поиск идет по всему региону. Чтобы искать по районам, выключите SEARCH_URL_BUILDER")
+        names = [("area", name) for name in self.parameters.get("regions", [])]
+        if self.parameters.get("specialization"):
+            names.append(("professional_role", self.parameters["specialization"]))
+        if self.parameters.get("industry"):
+            names.append(("industry", self.parameters["industry"]))
+        subway = self.parameters.get("subway", [])
+        if not names and not subway:
+            return []
+        if self.dictionaries is not None:
+            return self._lookup_ids(self.dictionaries, names, subway)
+        # справочники нужны только для построения ссылки, поэтому соединение закрываем сразу
+        with HhDictionaries() as dictionaries:
+            return self._lookup_ids(dictionaries, names, subway)
+
+    @staticmethod
+    def _lookup_ids(dictionaries: HhDictionaries, names: List[Tuple[str, str]],
+                    subway: List[str]) -> Optional[List[Tuple[str, str]]]:
+        """Найти в справочниках идентификаторы для названий names и станций метро subway"""
+        lookups = {
+            "area": dictionaries.area_id,
+            "professional_role": dictionaries.professional_role_id,
+            "industry": dictionaries.industry_id,
+        }
+        params = []
+        for param, name in names:
+            value = lookups[param](name)
+            if value is None:
+                logger.warning(f"Не нашли в справочниках hh.ru значение '{name}' для параметра {param}")
+                return None
+            params.append((param, value))
+        if subway:
+            areas = [value for param, value in params if param == "area"]
+            if not areas:
+                logger.warning("Метро задано без региона, не можем найти станции в справочнике hh.ru")
+                return None
+            for station in subway:
+                value = dictionaries.metro_id(areas[0], station)
+                if value is None:
+                    logger.warning(f"Не нашли станцию метро '{station}' в справочнике hh.ru")
+                    return None
+                params.append(("metro", value))
+        return params
+
+    def _load_cache(self) -> Dict[str, str]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            logger.error(f"Кэш ссылок на выдачу {self.cache_file} поврежден, начинаем с пустого кэша")
+            return {}
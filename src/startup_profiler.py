@@ -0,0 +1,38 @@
+from typing import List, Tuple
+
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    Замер времени этапов запуска бота: проверки настроек, запуска браузера,
+    проверки входа на сайт и создания клиента LLM. Для каждого этапа
+    запоминается и число модулей, импортированных во время него
+    """
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: List[Tuple[str, float, int]] = []
+
+    def record(self, name: str, started_at: float, modules_before: int) -> None:
+        """Записать этап, начавшийся в started_at, когда было загружено modules_before модулей"""
+        self.phases.append((name, time.perf_counter() - started_at, len(sys.modules) - modules_before))
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замерить время выполнения блока кода как этапа запуска"""
+        started_at = time.perf_counter()
+        modules_before = len(sys.modules)
+        try:
+            yield
+        finally:
+            self.record(name, started_at, modules_before)
+
+    def report(self) -> str:
+        """Таблица с длительностью этапов запуска"""
+        lines = [f"{'Этап':<32}{'Время, с':>10}{'Модулей':>10}"]
+        for name, duration, modules in self.phases:
+            lines.append(f"{name:<32}{duration:>10.3f}{modules:>10}")
+        lines.append(f"{'Всего':<32}{time.perf_counter() - self.started_at:>10.3f}{len(sys.modules):>10}")
+        return "\n".join(lines)
@@ -0,0 +1,269 @@
+from typing import List, Dict
+
+import json
+import sqlite3
+import threading
+import traceback
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+
+from src.app_config import STATE_STORE
+from src.companies_journal import CompaniesJournal
+from loguru import logger
+
+
+class StateStore(ABC):
+    """Интерфейс хранилища истории откликов и готовых ответов на вопросы"""
+    @abstractmethod
+    def load_companies(self, login: str, job_title: str) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+        """Загрузить уже просмотренные компании и их вакансии"""
+        pass
+
+    @abstractmethod
+    def save_company(self, login: str, job_title: str, company_name: str, company_job_title: str) -> None:
+        """Сохранить отклик на вакансию компании"""
+        pass
+
+    @abstractmethod
+    def is_company_seen(self, login: str, job_title: str, company_name: str) -> bool:
+        """Проверить, откликались ли мы уже в эту компанию"""
+        pass
+
+    @abstractmethod
+    def is_job_seen(self, login: str, job_title: str, company_name: str, company_job_title: str) -> bool:
+        """Проверить, откликались ли мы уже на эту вакансию компании"""
+        pass
+
+    @abstractmethod
+    def load_questions(self) -> List[dict]:
+        """Загрузить готовые ответы на вопросы"""
+        pass
+
+    @abstractmethod
+    def save_question(self, question_data: dict) -> None:
+        """Сохранить ответ на вопрос"""
+        pass
+
+    def flush(self) -> None:
+        """Выполнить отложенную запись на диск (вызывается во время пауз)"""
+        pass
+
+    def close(self) -> None:
+        """Освободить ресурсы хранилища"""
+        pass
+
+
+class JsonStateStore(StateStore):
+    """Хранилище в JSON файлах: companies.json с журналом companies.jsonl и answers.json"""
+    def __init__(self, output_folder: Path):
+        self.output_folder = Path(output_folder)
+        self.companies_journal = CompaniesJournal(self.output_folder / "companies.json",
+                                                  self.output_folder / "companies.jsonl")
+        # история откликов загружается из файлов при первом обращении
+        self.companies = None
+        self.lock = threading.Lock()
+
+    def load_companies(self, login: str, job_title: str) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+        with self.lock:
+            data = self._companies()
+            data.setdefault(login, {}).setdefault(job_title, {})
+            return data
+
+    def _companies(self) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+        """История откликов в памяти (вызывается под self.lock)"""
+        if self.companies is None:
+            self.companies = self.companies_journal.load()
+            # свернуть журнал, накопленный за прошлые запуски
+            if self.companies_journal.journal_records > 0:
+                self.companies_journal.compact(self.companies)
+        return self.companies
+
+    def save_company(self, login: str, job_title: str, company_name: str, company_job_title: str) -> None:
+        with self.lock:
+            self._companies()
+            my_company = self.companies.setdefault(login, {}).setdefault(job_title, {})
+            titles = my_company.setdefault(company_name, [])
+            if company_job_title not in titles:
+                titles.append(company_job_title)
+            self.companies_journal.append(self.companies, login, job_title,
+                                          company_name, company_job_title)
+
+    def flush(self) -> None:
+        # свернуть журнал в снимок, чтобы не делать этого во время отклика, иначе только сбросить журнал на диск
+        with self.lock:
+            if self.companies_journal.should_compact():
+                self.companies_journal.compact(self._companies())
+            elif self.companies_journal.journal_records > 0:
+                self.companies_journal.sync()
+
+    def is_company_seen(self, login: str, job_title: str, company_name: str) -> bool:
+        with self.lock:
+            return company_name in self._companies().get(login, {}).get(job_title, {})
+
+    def is_job_seen(self, login: str, job_title: str, company_name: str, company_job_title: str) -> bool:
+        with self.lock:
+            return company_job_title in self._companies().get(login, {}).get(job_title, {}).get(company_name, [])
+
+    def load_questions(self) -> List[dict]:
+        output_file = self.output_folder / "answers.json"
+        try:
+            with open(output_file, 'r') as f:
+                try:
+                    data = json.load(f)
+                    if not isinstance(data, list):
+                        raise ValueError("Формат файла JSON неверный, ожидаем список вопросов")
+                except json.JSONDecodeError:
+                    logger.error("Декодирование JSON файла завершено с ошибкой")
+                    data = []
+            return data
+        except FileNotFoundError:
+            logger.warning("JSON файл не найден, возвращаем пустой список")
+            return []
+
+    def save_question(self, question_data: dict) -> None:
+        output_file = self.output_folder / "answers.json"
+        with self.lock:
+            try:
+                with open(output_file, 'r') as f:
+                    try:
+                        data = json.load(f)
+                        if not isinstance(data, list):
+                            raise ValueError("Формат файла JSON неверный, ожидаем список вопросов")
+                    except json.JSONDecodeError:
+                        logger.error("Декодирование JSON файла завершено с ошибкой")
+                        data = []
+            except FileNotFoundError:
+                logger.warning("JSON файл не найден, возвращаем пустой словарь")
+                data = []
+            data.append(question_data)
+            with open(output_file, 'w') as f:
+                json.dump(data, f, indent=4)
+
+
+class SqliteStateStore(StateStore):
+    """
+    Хранилище в базе SQLite в режиме WAL. Несколько процессов бота
+    могут одновременно работать с одной историей откликов: каждая
+    запись - это отдельный upsert, а проверки - поиск по индексу.
+    """
+    def __init__(self, db_file: Path):
+        self.db_file = Path(db_file)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA busy_timeout=30000")
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS companies (
+                    login TEXT NOT NULL,
+                    job_title TEXT NOT NULL,
+                    company TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    applied_at TEXT NOT NULL,
+                    PRIMARY KEY (login, job_title, company, title)
+                ) WITHOUT ROWID""")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS answers (
+                    question TEXT PRIMARY KEY,
+                    answer TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )""")
+        logger.debug(f"Хранилище SQLite открыто: {self.db_file}")
+
+    def load_companies(self, login: str, job_title: str) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+        data = {login: {job_title: {}}}
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT company, title FROM companies WHERE login = ? AND job_title = ?",
+                (login, job_title)).fetchall()
+        my_companies = data[login][job_title]
+        for company, title in rows:
+            my_companies.setdefault(company, []).append(title)
+        return data
+
+    def save_company(self, login: str, job_title: str, company_name: str, company_job_title: str) -> None:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO companies (login, job_title, company, title, applied_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (login, job_title, company_name, company_job_title, now))
+
+    def is_company_seen(self, login: str, job_title: str, company_name: str) -> bool:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM companies WHERE login = ? AND job_title = ? AND company = ? LIMIT 1",
+                (login, job_title, company_name)).fetchone()
+        return row is not None
+
+    def is_job_seen(self, login: str, job_title: str, company_name: str, company_job_title: str) -> bool:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM companies WHERE login = ? AND job_title = ? AND company = ? AND title = ?",
+                (login, job_title, company_name, company_job_title)).fetchone()
+        return row is not None
+
+    def load_questions(self) -> List[dict]:
+        with self.lock:
+            rows = self.connection.execute("SELECT question, answer FROM answers").fetchall()
+        return [{'question': question, 'answer': answer} for question, answer in rows]
+
+    def save_question(self, question_data: dict) -> None:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO answers (question, answer, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(question) DO UPDATE SET answer = excluded.answer, updated_at = excluded.updated_at",
+                (question_data['question'], question_data['answer'], now))
+
+    def import_json(self, json_store: JsonStateStore) -> None:
+        """Перенести историю из JSON файлов в базу (записи, уже имеющиеся в базе, не меняются)"""
+        companies = json_store.companies_journal.load()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [(login, job_title, company, title, now)
+                for login, job_titles in companies.items()
+                for job_title, my_companies in job_titles.items()
+                for company, titles in my_companies.items()
+                for title in titles]
+        answers = [(q['question'], q['answer'], now) for q in json_store.load_questions()
+                   if q.get('question') and q.get('answer') is not None]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO companies (login, job_title, company, title, applied_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO answers (question, answer, updated_at) VALUES (?, ?, ?)", answers)
+        logger.info(f"В базу перенесено откликов: {len(rows)}, ответов на вопросы: {len(answers)}")
+
+    def flush(self) -> None:
+        # перенести накопленный WAL в основной файл базы, не блокируя другие процессы
+        with self.lock:
+            self.connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+
+def create_state_store(output_folder: Path) -> StateStore:
+    """Создать хранилище, заданное в настройке STATE_STORE"""
+    output_folder = Path(output_folder)
+    logger.debug(f"Используем хранилище состояния: {STATE_STORE}")
+    if STATE_STORE == "json":
+        return JsonStateStore(output_folder)
+    elif STATE_STORE == "sqlite":
+        db_file = output_folder / "state.sqlite3"
+        is_new = not db_file.exists()
+        store = SqliteStateStore(db_file)
+        # при первом запуске перенести историю, накопленную в JSON файлах
+        if is_new:
+            try:
+                store.import_json(JsonStateStore(output_folder))
+            except Exception:
+                tb_str = traceback.format_exc()
+                logger.error(f"Не удалось перенести историю из JSON файлов в базу: \nTraceback:\n{tb_str}")
+        return store
+    else:
+        raise ValueError(f"Неподдерживаемый тип хранилища: {STATE_STORE}")
@@ -194,6 +194,107 @@ Interests: {resume_section}
 Question: {question}
 """
 
+# Batched Questions Template
+questions_batch_template = """
+Answer the employer's questions based on the provided resume information.
+
+## Rules
+- Answer questions directly.
+- If it seems likely that you have the experience, even if not explicitly defined, answer as if you have the experience.
+- If unsure, respond with "I have no experience with that, but I learn fast" or "Not yet, but willing to learn."
+- Keep each answer under 140 characters.
+- Answer in the language of the question.
+- Respond only with a JSON object without any other text: the keys are the question numbers, the values are the answers.
+
+## Example
+My resume: 3 years as a Python developer, fluent in English.
+Questions:
+1. Do you have experience with Python?
+2. What is your English level?
+{{"1": "Yes, I have 3 years of experience with Python.", "2": "Fluent."}}
+
+My resume: {resume}
+Questions:
+{questions}
+"""
+
+# Section Classification Template
+section_template = """You are assisting a bot designed to automatically apply for jobs on AIHawk. The bot receives various questions about job applications and needs to determine the most relevant section of the resume to provide an accurate response.
+
+For the following question: '{question}', determine which section of the resume is most relevant. 
+Respond with exactly one of the following options:
+- Personal information
+- Legal Authorization
+- Work Preferences
+- Education Details
+- Experience Details
+- Projects
+- Availability
+- Salary Expectations
+- Certifications
+- Languages
+- Interests
+
+Here are detailed guidelines to help you choose the correct section:
+
+1. **Personal Information**:
+- **Purpose**: Contains your basic contact details and online profiles.
+- **Use When**: The question is about how to contact you or requests links to your professional online presence.
+- **Examples**: Email address, phone number, AIHawk profile, GitHub repository, personal website.
+
+2. **Legal Authorization**:
+- **Purpose**: Details your work authorization status and visa requirements.
+- **Use When**: The question asks about your ability to work in specific countries or if you need sponsorship or visas.
+- **Examples**: Work authorization in EU and US, visa requirements, legally allowed to work.
+
+3. **Work Preferences**:
+- **Purpose**: Specifies your preferences regarding work conditions and job roles.
+- **Use When**: The question is about your preferences for remote work, relocation, and willingness to undergo assessments or background checks.
+- **Examples**: Remote work, in-person work, open to relocation.
+
+4. **Education Details**:
+- **Purpose**: Contains information about your academic qualifications and courses.
+- **Use When**: The question concerns your degrees, universities attended, and relevant coursework.
+- **Examples**: Degree, university, field of study.
+
+5. **Experience Details**:
+- **Purpose**: Details your professional work history and key responsibilities.
+- **Use When**: The question pertains to your job roles, responsibilities, achievements and technoligies that you used in previous positions.
+- **Examples**: Job positions, company names, key responsibilities, skills acquired.
+
+6. **Projects**:
+- **Purpose**: Highlights specific projects you have worked on.
+- **Use When**: The question asks about particular projects, their descriptions, or links to project repositories.
+- **Examples**: Project names, descriptions, links to project repositories.
+
+7. **Availability**:
+- **Purpose**: Provides information on your availability for new roles.
+- **Use When**: The question is about how soon you can start a new job or your notice period.
+- **Examples**: Notice period, availability to start.
+
+8. **Salary Expectations**:
+- **Purpose**: Covers your expected salary range.
+- **Use When**: The question pertains to your salary expectations or compensation requirements.
+- **Examples**: Desired salary range.
+
+9. **Certifications**:
+    - **Purpose**: Lists your professional certifications or licenses.
+    - **Use When**: The question involves your certifications or qualifications from recognized organizations.
+    - **Examples**: Certification names, issuing bodies, dates of validity.
+
+10. **Languages**:
+    - **Purpose**: Describes the languages you can speak and your proficiency levels.
+    - **Use When**: The question asks about your language skills or proficiency in specific languages.
+    - **Examples**: Languages spoken, proficiency levels.
+
+11. **Interests**:
+    - **Purpose**: Details your personal or professional interests.
+    - **Use When**: The question is about your hobbies, interests, or activities outside of work.
+    - **Examples**: Personal hobbies, professional interests.
+
+Provide only the exact name of the section from the list above with no additional text.
+"""
+
 summarize_prompt_template = """
 As a seasoned HR expert, your task is to identify and outline the key skills and requirements necessary for the position of this job. Use the provided job description as input to extract all relevant information. This will involve conducting a thorough analysis of the job's responsibilities and the industry standards. You should consider both the technical and soft skills needed to excel in this role. Additionally, specify any educational qualifications, certifications, or experiences that are essential. Your analysis should also reflect on the evolving nature of this role, considering future trends and how they might affect the required competencies.
 
@@ -241,9 +342,21 @@ coverletter_template = """
 - Если обнаружишь какие-либо вопросы в описании вакансии - ответь на них в сопроводительном письме, используя информацию из резюме.
 - Если в описании вакансии требуют написать в сопроводительном письме какие-либо ключевые слова - напиши их.
 
-Примеры сопроводительных писем:
-## Пример 1:
+{examples}
+
+## Описание работы:
+```
+{job_description}
+```
+## Мое резюме:
+```
+{resume}
 ```
+"""
+
+# Примеры сопроводительных писем, подставляемые в coverletter_template (их число задается COVER_LETTER_EXAMPLES)
+coverletter_examples = [
+"""\
 Здравствуйте!
 Меня привлекла вакансия графического дизайнера, так как я хочу работать в динамичной и творческой компании, занимаясь тем, что люблю.
 
@@ -256,10 +369,8 @@ coverletter_template = """
 Владею английским языком на уровне B1 и продолжаю активно учиться и повышать уровень.
 Подробнее о моём профессиональном опыте можно узнать в резюме.
 Благодарю за внимание к моей кандидатуре.
-```
-
-## Пример 2:
-```
+""",
+"""\
 Добрый день!
 
 Меня заинтересовала вакансия инженера-проектировщика в вашей компании. Обладаю высоким уровнем профессиональных знаний в области проектирования, 
@@ -268,27 +379,16 @@ coverletter_template = """
 Буду рад обсудить возможность сотрудничества.
 
 С уважением, Даниил
-```
-
-## Пример 3:
-```
+""",
+"""\
 Здравствуйте! Я бы хотел пройти стажировку в вашем банке. Я студент 3-го курса факультета информационных технологий в НИУ ВШЭ. 
 Обладаю глубоким пониманием аналитики и креативным подходом к решению задач. 
 Участвовал в создании программных решений для учебных проектов, занимался проверкой и анализом данных. 
 Также успешно прошёл летнюю стажировку в ИТ-компании.
 
 С уважением, Андрей
-```
-
-## Описание работы:
-```
-{job_description}
-```
-## Мое резюме:
-```
-{resume}
-```
-"""
+""",
+]
 
 numeric_question_template = """
 Read the following resume carefully and answer the specific questions regarding the candidate's experience with a number of years. Follow these strategic guidelines when responding:
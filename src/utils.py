@@ -1,9 +1,14 @@
+from typing import List, TYPE_CHECKING
+
 import os
 import sys
 
-from selenium import webdriver
 from loguru import logger
-from src.app_config import MINIMUM_LOG_LEVEL
+from src.app_config import MINIMUM_LOG_LEVEL, BROWSER_MODE, BLOCKED_URL_PATTERNS, BLOCKED_HOSTS
+
+if TYPE_CHECKING:
+    # selenium импортируется только при запуске браузера, чтобы не замедлять старт
+    from selenium import webdriver
 
 
 log_file = "app_log.log"
@@ -18,25 +23,42 @@ else:
 
 chromeProfilePath = os.path.join(os.getcwd(), "chrome_profile", "linkedin_profile")
 
-def ensure_chrome_profile() -> str:
+def ensure_chrome_profile(profile_path: str = chromeProfilePath) -> str:
     """Проверяем, что профиль Chrome существует"""
-    logger.debug(f"Проверяем, что профиль Chrome существует по пути: {chromeProfilePath}")
-    profile_dir = os.path.dirname(chromeProfilePath)
+    logger.debug(f"Проверяем, что профиль Chrome существует по пути: {profile_path}")
+    profile_dir = os.path.dirname(profile_path)
     if not os.path.exists(profile_dir):
         os.makedirs(profile_dir)
         logger.debug(f"Created directory for Chrome profile: {profile_dir}")
-    if not os.path.exists(chromeProfilePath):
-        os.makedirs(chromeProfilePath)
-        logger.debug(f"Created Chrome profile directory: {chromeProfilePath}")
-    return chromeProfilePath
+    if not os.path.exists(profile_path):
+        os.makedirs(profile_path)
+        logger.debug(f"Created Chrome profile directory: {profile_path}")
+    return profile_path
 
 
-def chrome_browser_options() -> webdriver.ChromeOptions:
-    """Задать настройки браузера Chrome, в котором будет работать Selenium"""
-    logger.debug("Задаем настройки Chrome")
-    ensure_chrome_profile()
+def chrome_browser_options(profile_path: str = chromeProfilePath, mode: str = BROWSER_MODE,
+                           blocked_hosts: List[str] = BLOCKED_HOSTS) -> "webdriver.ChromeOptions":
+    """
+    Задать настройки браузера Chrome, в котором будет работать Selenium.
+    У каждого одновременно запущенного браузера должен быть свой профиль.
+    В режиме "performance" браузер запускается без окна, не ждет полной
+    загрузки страницы (достаточно готового DOM) и не обращается к blocked_hosts
+    """
+    from selenium import webdriver
+
+    logger.debug(f"Задаем настройки Chrome, режим {mode}")
+    ensure_chrome_profile(profile_path)
     options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized")
+    if mode == "performance":
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1200,800")
+        options.page_load_strategy = "eager"
+        if blocked_hosts:
+            # правило действует на все вкладки, в отличие от блокировки через DevTools
+            rules = ", ".join(f"MAP {host} ~NOTFOUND" for host in blocked_hosts)
+            options.add_argument(f"--host-resolver-rules={rules}")
+    else:
+        options.add_argument("--start-maximized")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--ignore-certificate-errors")
@@ -62,12 +84,12 @@ def chrome_browser_options() -> webdriver.ChromeOptions:
     }
     options.add_experimental_option("prefs", prefs)
 
-    if len(chromeProfilePath) > 0:
-        initial_path = os.path.dirname(chromeProfilePath)
-        profile_dir = os.path.basename(chromeProfilePath)
+    if len(profile_path) > 0:
+        initial_path = os.path.dirname(profile_path)
+        profile_dir = os.path.basename(profile_path)
         options.add_argument('--user-data-dir=' + initial_path)
         options.add_argument("--profile-directory=" + profile_dir)
-        logger.debug(f"Используем профиль Chrome из папки: {chromeProfilePath}")
+        logger.debug(f"Используем профиль Chrome из папки: {profile_path}")
     else:
         options.add_argument("--incognito")
         logger.debug("Используем Chrome в режиме инкогнито")
@@ -75,6 +97,36 @@ def chrome_browser_options() -> webdriver.ChromeOptions:
     return options
 
 
+def block_network_requests(driver: "webdriver.Chrome", patterns: List[str] = BLOCKED_URL_PATTERNS) -> None:
+    """
+    Заблокировать загрузку ресурсов по шаблонам ссылок через DevTools протокол.
+    Блокировка действует только на текущую вкладку, поэтому новые вкладки
+    открываются через open_blocked_tab
+    """
+    if not patterns:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    logger.debug(f"Заблокирована загрузка ресурсов по шаблонам: {patterns}")
+
+
+def open_blocked_tab(driver: "webdriver.Chrome", url: str, patterns: List[str] = BLOCKED_URL_PATTERNS) -> str:
+    """
+    Открыть ссылку в новой вкладке, заблокировав в ней ресурсы по шаблонам
+    до начала загрузки, и вернуться на текущую вкладку. Вернуть новую вкладку
+    """
+    current_handle = driver.current_window_handle
+    driver.switch_to.new_window("tab")
+    handle = driver.current_window_handle
+    try:
+        block_network_requests(driver, patterns)
+        # переход после возврата из скрипта, чтобы не ждать загрузки страницы
+        driver.execute_script("const url = arguments[0]; setTimeout(() => window.location.assign(url), 0);", url)
+    finally:
+        driver.switch_to.window(current_handle)
+    return handle
+
+
 def printred(text: str) -> None:
     red = "\033[91m"
     reset = "\033[0m"
@@ -0,0 +1,131 @@
+from typing import List, Dict, Optional
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import httpx
+import lxml.html
+
+from src.app_config import HTTP_SCRAPER_MAX_CONNECTIONS
+from loguru import logger
+
+
+# поля вакансии и значения data-qa элементов, из которых они берутся.
+# Если у поля несколько элементов - используется первый найденный
+VACANCY_FIELDS = [
+    ("title", "vacancy-title"),
+    ("salary", "vacancy-salary-compensation-type-net"),
+    ("experience", "vacancy-experience"),
+    ("job_type", "vacancy-view-employment-mode"),
+    ("company_name", "vacancy-company-name"),
+    ("company_address", "vacancy-view-raw-address"),
+    ("company_address", "vacancy-view-location"),
+    ("description", "vacancy-branded"),
+    ("description", "vacancy-description"),
+    ("skills", "skills-element"),
+]
+
+# скрипт, который за один запрос к браузеру собирает все поля вакансии по VACANCY_FIELDS
+VACANCY_EXTRACT_SCRIPT = """
+const fields = arguments[0];
+const job = {};
+const textOf = (element) => (element.innerText || '').trim();
+for (const [key, dataQa] of fields) {
+    const elements = document.querySelectorAll(`[data-qa="${dataQa}"]`);
+    if (key === 'skills') {
+        job.skills = Array.from(elements).map(textOf).join(', ');
+        continue;
+    }
+    if ((key === 'company_address' || key === 'description') && job[key] != null) {
+        continue;
+    }
+    job[key] = elements.length > 0 ? textOf(elements[0]) : null;
+}
+return job;
+"""
+
+# теги, после которых текст переносится на новую строку (как в innerText браузера)
+BLOCK_TAGS = ("br", "p", "div", "li", "ul", "ol", "tr", "h1", "h2", "h3", "h4", "h5", "h6")
+
+
+def _element_text(element: lxml.html.HtmlElement) -> str:
+    """Получить текст элемента с переносами строк на месте блочных тегов"""
+    lines = (" ".join(line.split()) for line in element.text_content().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def parse_vacancy_html(html: str) -> Dict[str, Optional[str]]:
+    """Разобрать HTML страницы вакансии в такой же словарь, как JobManager._scrape_employer_page"""
+    root = lxml.html.fromstring(html)
+    for element in root.xpath("//script|//style|//noscript"):
+        element.drop_tree()
+    for element in root.iter(*BLOCK_TAGS):
+        element.tail = "\n" + (element.tail or "")
+
+    job = {}
+    for key, data_qa in VACANCY_FIELDS:
+        elements = root.xpath(f"//*[@data-qa='{data_qa}']")
+        if key == "skills":
+            job["skills"] = ', '.join(_element_text(skill) for skill in elements)
+            continue
+        if key in ["company_address", "description"] and job.get(key) is not None:
+            continue
+        job[key] = _element_text(elements[0]) if elements else None
+    return job
+
+
+class HttpVacancyScraper:
+    """
+    Чтение страниц вакансий по HTTP без браузера. Использует cookies
+    сессии Selenium и общий пул соединений httpx, поэтому несколько
+    вакансий можно читать одновременно, а браузер нужен только для отклика.
+    """
+    def __init__(self, cookies: List[dict], user_agent: str,
+                 max_connections: int = HTTP_SCRAPER_MAX_CONNECTIONS):
+        self.client = httpx.Client(
+            headers={
+                "User-Agent": user_agent,
+                "Accept": "text/html,application/xhtml+xml",
+                "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+            },
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=15,
+            follow_redirects=True,
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_connections)
+        self.update_cookies(cookies)
+
+    @classmethod
+    def from_driver(cls, driver) -> "HttpVacancyScraper":
+        """Создать скрейпер с cookies и User-Agent текущей сессии браузера"""
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        return cls(driver.get_cookies(), user_agent)
+
+    def update_cookies(self, cookies: List[dict]) -> None:
+        """Обновить cookies сессии (например, после их обновления в браузере)"""
+        for cookie in cookies:
+            self.client.cookies.set(cookie["name"], cookie["value"],
+                                    domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+
+    def scrape(self, url: str) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Скачать и разобрать страницу вакансии. Возвращает None, если
+        вместо вакансии пришла другая страница (например, капча)
+        """
+        response = self.client.get(url)
+        response.raise_for_status()
+        job = parse_vacancy_html(response.text)
+        if not job.get("title"):
+            logger.warning(f"На странице {url} не найдено название вакансии, читаем ее через браузер")
+            return None
+        logger.debug(f"Вакансия {url} прочитана по HTTP")
+        return job
+
+    def submit(self, url: str) -> Future:
+        """Запустить чтение вакансии в фоне"""
+        return self.executor.submit(self.scrape, url)
+
+    def close(self) -> None:
+        """Закрыть пул соединений"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
@@ -0,0 +1,41 @@
+from typing import Dict
+
+from collections import Counter
+
+from loguru import logger
+
+
+class WebDriverCommandCounter:
+    """
+    Счетчик команд, отправленных драйвером браузеру. Каждая команда -
+    это отдельный HTTP запрос к chromedriver, поэтому число команд
+    напрямую определяет накладные расходы на управление браузером.
+    """
+    def __init__(self, driver):
+        self.driver = driver
+        self.counts: Counter = Counter()
+        self._execute = driver.execute
+        # WebElement тоже отправляет команды через driver.execute
+        driver.execute = self._counted_execute
+        logger.debug("Счетчик команд WebDriver установлен")
+
+    def _counted_execute(self, driver_command: str, params: dict = None):
+        self.counts[driver_command] += 1
+        return self._execute(driver_command, params)
+
+    @property
+    def total(self) -> int:
+        """Общее число отправленных команд"""
+        return sum(self.counts.values())
+
+    def snapshot(self) -> Counter:
+        """Запомнить текущие значения счетчиков"""
+        return Counter(self.counts)
+
+    def since(self, snapshot: Counter) -> Dict[str, int]:
+        """Число команд каждого типа, отправленных после snapshot"""
+        return dict(self.counts - snapshot)
+
+    def uninstall(self) -> None:
+        """Вернуть драйверу исходный метод отправки команд"""
+        self.driver.execute = self._execute
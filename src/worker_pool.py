@@ -0,0 +1,198 @@
+from typing import Callable, Dict, List, Optional
+
+import os
+import shutil
+import threading
+import time
+import traceback
+from urllib.parse import urlsplit
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from src.app_config import APPLY_ONCE_AT_COMPANY, WORKERS_MIN_INTERVAL_SEC
+from src.llm.resilience import ResilientCaller
+from src.search_url import search_page_url
+from src.utils import chromeProfilePath
+from loguru import logger
+
+
+# файлы профиля, которые нельзя или не нужно копировать: блокировки запущенного Chrome и кэши
+PROFILE_IGNORE = shutil.ignore_patterns("Singleton*", "*.lock", "lockfile", "Cache", "Code Cache", "GPUCache")
+
+
+def worker_profile_path(worker_id: int) -> str:
+    """Путь к копии профиля Chrome для воркера с номером worker_id"""
+    return os.path.join(os.path.dirname(chromeProfilePath), f"worker_{worker_id}",
+                        os.path.basename(chromeProfilePath))
+
+
+def prepare_worker_profile(worker_id: int) -> str:
+    """
+    Скопировать основной профиль Chrome для воркера. Два браузера не могут
+    работать с одним профилем, поэтому у каждого воркера своя копия
+    """
+    profile_path = worker_profile_path(worker_id)
+    if os.path.exists(chromeProfilePath):
+        try:
+            shutil.copytree(chromeProfilePath, profile_path, ignore=PROFILE_IGNORE, dirs_exist_ok=True)
+            logger.debug(f"Профиль Chrome скопирован для воркера {worker_id}: {profile_path}")
+        except (shutil.Error, OSError) as e:
+            logger.warning(f"Профиль Chrome для воркера {worker_id} скопирован не полностью: {str(e)}")
+    return profile_path
+
+
+class WorkerCoordinator:
+    """
+    Общее состояние воркеров: очередь страниц выдачи, вакансии, на которые
+    сейчас откликаются, общий для всех браузеров темп откликов и общие
+    ограничение одновременных запросов к LLM и выключатели провайдеров
+    """
+    def __init__(self, min_interval_sec: float = WORKERS_MIN_INTERVAL_SEC):
+        self.min_interval_sec = min_interval_sec
+        self.lock = threading.Lock()
+        self.next_page = 0
+        # номер первой пустой страницы выдачи, дальше нее страницы не раздаются
+        self.last_page: Optional[int] = None
+        self.claimed = set()
+        self.next_response_time = 0.0
+        # повторы, ограничение одновременных запросов и выключатель для каждой модели LLM,
+        # передаются в GPTAnswerer всех воркеров (ограничители частоты и так общие для процесса)
+        self.llm_resilience: Dict[str, ResilientCaller] = {}
+
+    def take_page(self) -> Optional[int]:
+        """Взять следующую страницу выдачи. None - страницы закончились"""
+        with self.lock:
+            if self.last_page is not None and self.next_page >= self.last_page:
+                return None
+            page = self.next_page
+            self.next_page += 1
+            return page
+
+    def mark_empty_page(self, page: int) -> None:
+        """Отметить, что на странице нет вакансий, т.е. выдача закончилась"""
+        with self.lock:
+            if self.last_page is None or page < self.last_page:
+                self.last_page = page
+                logger.debug(f"Выдача закончилась на странице {page}")
+
+    def claim_vacancy(self, company_name: str, company_job_title: str) -> bool:
+        """
+        Занять вакансию для отклика. False - на нее (или в ту же компанию,
+        если задан APPLY_ONCE_AT_COMPANY) уже откликается другой воркер
+        """
+        key = self._vacancy_key(company_name, company_job_title)
+        with self.lock:
+            if key in self.claimed:
+                return False
+            self.claimed.add(key)
+            return True
+
+    def is_claimed(self, company_name: str, company_job_title: str) -> bool:
+        """На вакансию (или в ту же компанию) уже откликается какой-то воркер"""
+        with self.lock:
+            return self._vacancy_key(company_name, company_job_title) in self.claimed
+
+    def release_vacancy(self, company_name: str, company_job_title: str) -> None:
+        """Освободить вакансию, если отклик на нее не удался"""
+        with self.lock:
+            self.claimed.discard(self._vacancy_key(company_name, company_job_title))
+
+    def reserve_turn(self) -> float:
+        """
+        Занять очередь на отклик: между откликами всех воркеров не меньше
+        min_interval_sec. Возвращает срок (по time.monotonic), до которого нужно ждать
+        """
+        with self.lock:
+            now = time.monotonic()
+            response_time = max(now, self.next_response_time)
+            self.next_response_time = response_time + self.min_interval_sec
+        if response_time > now:
+            logger.debug(f"Ждем очереди на отклик {round(response_time - now, 1)} секунд")
+        return response_time
+
+    def wait_for_turn(self) -> None:
+        """Дождаться очереди на отклик"""
+        response_time = self.reserve_turn()
+        time_left = response_time - time.monotonic()
+        if time_left > 0:
+            time.sleep(time_left)
+
+    @staticmethod
+    def _vacancy_key(company_name: str, company_job_title: str) -> tuple:
+        return (company_name,) if APPLY_ONCE_AT_COMPANY else (company_name, company_job_title)
+
+
+class WorkerPool:
+    """
+    Несколько браузеров, параллельно откликающихся на вакансии с разных
+    страниц выдачи. Основной браузер уже вошел на сайт и открыл выдачу,
+    остальные получают его cookies и берут страницы из общей очереди
+    """
+    def __init__(self, main_driver: webdriver.Chrome, driver_factory: Callable[[int], webdriver.Chrome],
+                 job_manager_factory: Callable[[webdriver.Chrome, WorkerCoordinator], object],
+                 workers_num: int, coordinator: WorkerCoordinator = None):
+        self.main_driver = main_driver
+        self.driver_factory = driver_factory
+        self.job_manager_factory = job_manager_factory
+        self.workers_num = max(workers_num, 1)
+        self.coordinator = coordinator if coordinator is not None else WorkerCoordinator()
+
+    def run(self) -> None:
+        """Запустить воркеров и дождаться, пока они обработают всю выдачу"""
+        search_url = self.main_driver.current_url
+        cookies = self.main_driver.get_cookies()
+        drivers = [self.main_driver]
+        try:
+            for worker_id in range(1, self.workers_num):
+                try:
+                    driver = self.driver_factory(worker_id)
+                except Exception as e:
+                    logger.error(f"Не удалось запустить браузер для воркера {worker_id}: {str(e)}")
+                    continue
+                drivers.append(driver)
+                self._copy_session(driver, search_url, cookies)
+            logger.info(f"Запускаем воркеров: {len(drivers)}")
+            threads = [threading.Thread(target=self._run_worker, args=(worker_id, driver, search_url),
+                                        name=f"worker-{worker_id}")
+                       for worker_id, driver in enumerate(drivers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            for driver in drivers[1:]:
+                try:
+                    driver.quit()
+                except WebDriverException:
+                    pass
+
+    def _run_worker(self, worker_id: int, driver: webdriver.Chrome, search_url: str) -> None:
+        """Брать страницы выдачи из общей очереди и откликаться на вакансии с них"""
+        try:
+            job_manager = self.job_manager_factory(driver, self.coordinator)
+        except Exception:
+            tb_str = traceback.format_exc()
+            logger.error(f"Не удалось запустить воркера {worker_id}: {tb_str}")
+            return
+        while (page := self.coordinator.take_page()) is not None:
+            logger.debug(f"Воркер {worker_id} переходит на страницу {page}")
+            try:
+                if not job_manager.apply_on_search_page(search_page_url(search_url, page)):
+                    self.coordinator.mark_empty_page(page)
+            except Exception:
+                tb_str = traceback.format_exc()
+                logger.error(f"Воркер {worker_id}, неизвестная ошибка на странице {page}: {tb_str}")
+        logger.debug(f"Воркер {worker_id} завершил работу")
+
+    @staticmethod
+    def _copy_session(driver: webdriver.Chrome, search_url: str, cookies: List[dict]) -> None:
+        """Перенести в браузер воркера cookies основного браузера, чтобы не входить на сайт заново"""
+        parts = urlsplit(search_url)
+        driver.get(f"{parts.scheme}://{parts.netloc}/")
+        driver.delete_all_cookies()
+        for cookie in cookies:
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException as e:
+                logger.debug(f"Не удалось перенести cookie {cookie.get('name')}: {str(e)}")
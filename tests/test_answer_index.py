@@ -0,0 +1,89 @@
+from src.answer_index import AnswerIndex, sanitize_text
+
+
+def test_sanitize_text():
+    """Test question normalization."""
+    assert sanitize_text('  Ваш "Опыт"\n работы?,') == 'ваш опыт работы?'
+
+
+def test_lookup_by_normalized_question():
+    """Test that answers are found regardless of case, quotes and whitespace."""
+    index = AnswerIndex([{"question": "ваш возраст?", "answer": "30"}])
+
+    assert index.get('  Ваш "возраст?"  ') == "30"
+    assert index.get("ваш опыт?") is None
+    assert len(index) == 1
+
+
+def test_add_updates_in_place():
+    """Test that new answers are available without rebuilding the index."""
+    index = AnswerIndex()
+    index.add("Ваш возраст?", "30")
+    index.add("ваш возраст?", "31")
+
+    assert "ВАШ ВОЗРАСТ?" in index
+    assert index.get("ваш возраст?") == "31"
+    assert len(index) == 1
+
+
+def test_empty_answers_are_skipped():
+    """Test that stored entries without an answer are not indexed."""
+    index = AnswerIndex([{"question": "q", "answer": ""}, {"question": "", "answer": "a"}])
+
+    assert len(index) == 0
+
+
+def test_find_similar_question():
+    """Test that a reworded question reuses the stored answer."""
+    index = AnswerIndex([{"question": "какие ваши зарплатные ожидания?", "answer": "200000"},
+                         {"question": "какой у вас опыт работы с python?", "answer": "5 лет"}],
+                        similarity_threshold=0.8)
+
+    assert index.find("Ваши зарплатные ожидания?") == "200000"
+    assert index.find("какой у вас опыт работы с java?") is None
+    assert (index.exact_hits, index.fuzzy_hits, index.misses) == (0, 1, 1)
+
+
+def test_find_reworded_salary_question():
+    """Test the reworded salary question: a synonym and another word form reuse the stored answer."""
+    index = AnswerIndex([{"question": "Какие ваши зарплатные ожидания?", "answer": "200000"}])
+
+    assert index.find("Ваша зарплатная вилка?") == "200000"
+    assert index.find("Укажите ваши ожидания по зарплате") == "200000"
+
+
+def test_different_specifics_are_not_reused():
+    """Test that questions differing in a city or a number never share an answer."""
+    index = AnswerIndex([{"question": "Готовы ли вы к переезду в Москву?", "answer": "Да"},
+                         {"question": "Есть ли у вас опыт работы 3 года?", "answer": "Да"}])
+
+    assert index.find("Готовы ли вы к переезду в Казань?") is None
+    assert index.find("Готовы ли вы к переезду?") is None
+    assert index.find("Есть ли у вас опыт работы 5 лет?") is None
+    assert index.find("Готовы ли вы к переезду в Москву, пожалуйста?") == "Да"
+
+
+def test_find_exact_question_counts_hit():
+    """Test that exact matches are counted separately from similar ones."""
+    index = AnswerIndex([{"question": "ваш возраст?", "answer": "30"}])
+
+    assert index.find("Ваш возраст?") == "30"
+    assert index.exact_hits == 1
+
+
+def test_similarity_disabled():
+    """Test that a zero threshold disables fuzzy matching."""
+    index = AnswerIndex([{"question": "какие ваши зарплатные ожидания?", "answer": "200000"}],
+                        similarity_threshold=0)
+
+    assert index.find("ваши зарплатные ожидания?") is None
+
+
+def test_index_grows_past_rebuilds():
+    """Test that every added question stays searchable as the index grows."""
+    index = AnswerIndex(similarity_threshold=0.99)
+    questions = [f"вопрос номер {i} про опыт работы" for i in range(100)]
+    for i, question in enumerate(questions):
+        index.add(question, str(i))
+
+    assert all(index.vector_index.most_similar(question)[0] == i for i, question in enumerate(questions))
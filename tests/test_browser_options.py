@@ -0,0 +1,43 @@
+from src.utils import chrome_browser_options, block_network_requests, open_blocked_tab
+
+
+def test_default_mode_keeps_headed_browser(tmp_path):
+    """Test that the default mode starts a maximized window with the normal load strategy."""
+    options = chrome_browser_options(str(tmp_path / "profile"), mode="default")
+    assert "--start-maximized" in options.arguments
+    assert not any(arg.startswith("--headless") for arg in options.arguments)
+    assert options.page_load_strategy == "normal"
+
+
+def test_performance_mode(tmp_path):
+    """Test that the performance mode is headless, eager and blocks third-party hosts."""
+    options = chrome_browser_options(str(tmp_path / "profile"), mode="performance",
+                                     blocked_hosts=["mc.yandex.ru", "*.doubleclick.net"])
+    assert "--headless=new" in options.arguments
+    assert options.page_load_strategy == "eager"
+    assert "--host-resolver-rules=MAP mc.yandex.ru ~NOTFOUND, MAP *.doubleclick.net ~NOTFOUND" \
+        in options.arguments
+
+
+def test_block_network_requests(mocker):
+    """Test that URL patterns are blocked through the DevTools protocol."""
+    driver = mocker.Mock()
+    block_network_requests(driver, ["*.woff"])
+    driver.execute_cdp_cmd.assert_called_with("Network.setBlockedURLs", {"urls": ["*.woff"]})
+
+
+def test_open_blocked_tab_blocks_before_navigation(mocker):
+    """Test that a new tab gets the blocking before it starts loading the page."""
+    driver = mocker.Mock()
+    driver.current_window_handle = "search"
+
+    def new_window(kind):
+        driver.current_window_handle = "vacancy"
+
+    driver.switch_to.new_window.side_effect = new_window
+
+    assert open_blocked_tab(driver, "https://hh.ru/vacancy/1", ["*.woff"]) == "vacancy"
+    calls = [name for name, *_ in driver.mock_calls]
+    assert calls.index("execute_cdp_cmd") < calls.index("execute_script")
+    assert "https://hh.ru/vacancy/1" in driver.execute_script.call_args.args
+    driver.switch_to.window.assert_called_once_with("search")
@@ -0,0 +1,57 @@
+import json
+import pytest
+from src.companies_journal import CompaniesJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Fixture to create a CompaniesJournal inside a temporary folder."""
+    return CompaniesJournal(tmp_path / "companies.json", tmp_path / "companies.jsonl", compact_every=3)
+
+
+def test_load_empty(journal):
+    """Test loading when neither snapshot nor journal exist."""
+    assert journal.load() == {}
+    assert journal.journal_records == 0
+
+
+def test_append_and_replay(journal, tmp_path):
+    """Test that appended records are replayed on the next load."""
+    data = journal.load()
+    journal.append(data, "login", "Python", "Company A", "Developer")
+    journal.append(data, "login", "Python", "Company A", "Team lead")
+
+    assert not (tmp_path / "companies.json").exists()
+    reloaded = CompaniesJournal(tmp_path / "companies.json", tmp_path / "companies.jsonl").load()
+    assert reloaded == {"login": {"Python": {"Company A": ["Developer", "Team lead"]}}}
+
+
+def test_compaction(journal, tmp_path):
+    """Test that compaction is due after compact_every records and forced on append after twice as many."""
+    data = {"login": {"Python": {}}}
+    titles = ["A", "B", "C", "D", "E", "F"]
+    for title in titles[:3]:
+        data["login"]["Python"].setdefault("Company", []).append(title)
+        journal.append(data, "login", "Python", "Company", title)
+
+    assert journal.should_compact()
+    assert not (tmp_path / "companies.json").exists()
+
+    for title in titles[3:]:
+        data["login"]["Python"].setdefault("Company", []).append(title)
+        journal.append(data, "login", "Python", "Company", title)
+
+    assert journal.journal_records == 0 and not journal.should_compact()
+    assert (tmp_path / "companies.jsonl").read_text() == ""
+    with open(tmp_path / "companies.json") as f:
+        assert json.load(f) == {"login": {"Python": {"Company": titles}}}
+
+
+def test_truncated_line_is_skipped(journal, tmp_path):
+    """Test that a partially written journal line does not break loading."""
+    with open(tmp_path / "companies.jsonl", "w") as f:
+        f.write('{"login": "l", "job_title": "t", "company": "c", "title": "x"}\n')
+        f.write('{"login": "l", "job_ti')
+
+    assert journal.load() == {"l": {"t": {"c": ["x"]}}}
+    assert journal.journal_records == 1
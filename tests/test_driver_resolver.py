@@ -0,0 +1,45 @@
+import pytest
+from src.driver_resolver import ChromeDriverResolver
+
+
+@pytest.fixture
+def driver_file(tmp_path):
+    """Fixture with an existing chromedriver file."""
+    path = tmp_path / "chromedriver"
+    path.write_text("")
+    return str(path)
+
+
+def test_cached_driver_skips_download(mocker, tmp_path, driver_file):
+    """Test that the driver is downloaded once per Chrome major version."""
+    mocker.patch.object(ChromeDriverResolver, "chrome_major_version", return_value="120")
+    install = mocker.patch("src.driver_resolver.ChromeDriverManager")
+    install.return_value.install.return_value = driver_file
+    cache_file = tmp_path / "chromedriver.json"
+
+    assert ChromeDriverResolver(cache_file, pinned_path="").resolve() == driver_file
+    assert ChromeDriverResolver(cache_file, pinned_path="").resolve() == driver_file
+    assert install.return_value.install.call_count == 1
+
+
+def test_new_chrome_version_downloads_driver(mocker, tmp_path, driver_file):
+    """Test that a Chrome update invalidates the cached driver."""
+    cache_file = tmp_path / "chromedriver.json"
+    cache_file.write_text(f'{{"119": "{driver_file}"}}')
+    mocker.patch.object(ChromeDriverResolver, "chrome_major_version", return_value="120")
+    install = mocker.patch("src.driver_resolver.ChromeDriverManager")
+    install.return_value.install.return_value = driver_file
+
+    ChromeDriverResolver(cache_file, pinned_path="").resolve()
+
+    install.return_value.install.assert_called_once()
+
+
+def test_pinned_driver_path(mocker, tmp_path, driver_file):
+    """Test that a pinned path is used without detecting Chrome or downloading."""
+    detect = mocker.patch.object(ChromeDriverResolver, "chrome_major_version")
+    resolver = ChromeDriverResolver(tmp_path / "chromedriver.json", pinned_path=driver_file)
+    assert resolver.resolve() == driver_file
+    detect.assert_not_called()
+    with pytest.raises(FileNotFoundError):
+        ChromeDriverResolver(tmp_path / "chromedriver.json", pinned_path=str(tmp_path / "missing")).resolve()
@@ -0,0 +1,316 @@
+import threading
+import pytest
+from selenium.common.exceptions import TimeoutException
+from src.job_manager import JobManager
+from src.state_store import JsonStateStore
+
+
+@pytest.fixture
+def job_manager(mocker, tmp_path):
+    """Fixture to create a JobManager with a mocked driver and a temporary state store."""
+    mocker.patch("src.job_manager.time.sleep")
+    mocker.patch.object(JobManager, "_pause")
+    manager = JobManager(mocker.Mock(), state_store=JsonStateStore(tmp_path))
+    manager.set_parameters({
+        'job_title': "Python", 'login': "login", 'experience': {}, 'sort_by': {},
+        'output_period': {}, 'output_size': {},
+    })
+    manager.gpt_answerer = mocker.Mock()
+    return manager
+
+
+def make_question(mocker, text):
+    """Create a mocked task-body element with a textarea."""
+    question = mocker.Mock()
+    question.text = text
+    question.find_elements.return_value = [mocker.Mock()]
+    return question
+
+
+def test_questions_are_answered_concurrently(mocker, job_manager):
+    """Test that all LLM answers are requested before the first one is awaited."""
+    mocker.patch("src.job_manager.BATCH_QUESTIONS", False)
+    questions = [make_question(mocker, "Вопрос один?"), make_question(mocker, "Вопрос два?")]
+    job_manager.driver.find_elements.return_value = questions
+    mocker.patch.object(job_manager.wait, "until")
+    barrier = threading.Barrier(2, timeout=5)
+
+    def answer(question_text):
+        # оба ответа должны генерироваться одновременно, иначе барьер не пройти
+        barrier.wait()
+        return f"ответ на {question_text}"
+
+    job_manager.gpt_answerer.answer_question_textual_wide_range.side_effect = answer
+
+    job_manager._find_and_handle_questions()
+
+    for question in questions:
+        text_field = question.find_elements.return_value[0]
+        text_field.send_keys.assert_called_once_with(f"ответ на {question.text.lower()}")
+    assert job_manager.answer_index.get("вопрос два?") == "ответ на вопрос два?"
+
+
+def test_stored_answer_skips_llm(mocker, job_manager):
+    """Test that stored answers are entered without calling the LLM."""
+    job_manager.answer_index.add("ваш возраст?", "30")
+    question = make_question(mocker, "Ваш возраст?")
+    job_manager.driver.find_elements.return_value = [question]
+    mocker.patch.object(job_manager.wait, "until")
+
+    job_manager._find_and_handle_questions()
+
+    job_manager.gpt_answerer.answer_question_textual_wide_range.assert_not_called()
+    question.find_elements.return_value[0].send_keys.assert_called_once_with("30")
+
+
+def test_questions_answered_in_one_batch(mocker, job_manager):
+    """Test that several new questions are answered with one batched LLM request."""
+    questions = [make_question(mocker, "Вопрос один?"), make_question(mocker, "Вопрос два?")]
+    job_manager.driver.find_elements.return_value = questions
+    mocker.patch.object(job_manager.wait, "until")
+    job_manager.gpt_answerer.answer_questions_batch.return_value = {
+        "вопрос один?": "ответ один", "вопрос два?": "ответ два"}
+
+    job_manager._find_and_handle_questions()
+
+    job_manager.gpt_answerer.answer_questions_batch.assert_called_once_with(["вопрос один?", "вопрос два?"])
+    job_manager.gpt_answerer.answer_question_textual_wide_range.assert_not_called()
+    questions[1].find_elements.return_value[0].send_keys.assert_called_once_with("ответ два")
+    assert job_manager.answer_index.get("вопрос один?") == "ответ один"
+
+
+def test_questions_missing_from_batch_are_asked_separately(mocker, job_manager):
+    """Test that questions without a valid batched answer fall back to the per-question path."""
+    questions = [make_question(mocker, "Вопрос один?"), make_question(mocker, "Вопрос два?")]
+    job_manager.driver.find_elements.return_value = questions
+    mocker.patch.object(job_manager.wait, "until")
+    job_manager.gpt_answerer.answer_questions_batch.return_value = {"вопрос один?": "ответ один"}
+    job_manager.gpt_answerer.answer_question_textual_wide_range.return_value = "отдельный ответ"
+
+    job_manager._find_and_handle_questions()
+
+    job_manager.gpt_answerer.answer_question_textual_wide_range.assert_called_once_with("вопрос два?")
+    questions[0].find_elements.return_value[0].send_keys.assert_called_once_with("ответ один")
+    questions[1].find_elements.return_value[0].send_keys.assert_called_once_with("отдельный ответ")
+
+
+def test_cover_letter_starts_before_response_click(mocker, job_manager):
+    """Test that cover letter generation is submitted before the browser opens the response form."""
+    mocker.patch("src.job_manager.STREAM_COVER_LETTER", False)
+    events = []
+    response_button = mocker.Mock()
+    response_button.click.side_effect = lambda: events.append("click")
+    job_manager.driver.find_elements.return_value = [response_button]
+    job_manager.gpt_answerer.write_cover_letter.return_value = "letter"
+    submit = job_manager.llm_executor.submit
+    mocker.patch.object(job_manager.llm_executor, "submit",
+                        side_effect=lambda *args: events.append("submit") or submit(*args))
+    mocker.patch.object(job_manager, "_find_and_handle_questions")
+    send_letter = mocker.patch.object(job_manager, "_write_and_send_cover_letter")
+
+    job_manager.apply_job({"company_name": "Company", "description": "description"})
+
+    assert events == ["submit", "click"]
+    assert send_letter.call_args.args[0].result() == "letter"
+    job_manager.gpt_answerer.write_cover_letter.assert_called_once_with("description", "Company")
+
+
+def test_employer_page_scraped_in_one_script_call(mocker, job_manager):
+    """Test that vacancy fields are collected with a single execute_script round trip."""
+    mocker.patch.object(job_manager.wait, "until")
+    job_manager.driver.execute_script.return_value = {"title": "Python developer"}
+
+    job = job_manager._scrape_employer_page()
+
+    assert job == {"title": "Python developer"}
+    job_manager.driver.execute_script.assert_called_once()
+    job_manager.driver.find_element.assert_not_called()
+
+
+def test_vacancy_claimed_by_other_worker_is_skipped(mocker, job_manager):
+    """Test that a vacancy claimed by another browser is neither applied to nor saved."""
+    job_manager.coordinator = mocker.Mock()
+    job_manager.coordinator.claim_vacancy.return_value = False
+    apply_job = mocker.patch.object(job_manager, "apply_job")
+
+    job_manager._process_vacancy({"company_name": "Company", "title": "Python"})
+
+    apply_job.assert_not_called()
+    assert not job_manager.state_store.is_company_seen("login", "Python", "company")
+
+
+def test_cached_search_url_skips_advanced_search_form(mocker, job_manager):
+    """Test that a cached search URL opens the results without filling in the form."""
+    mocker.patch("src.job_manager.SearchUrlBuilder.load_cached",
+                 return_value="https://hh.ru/search/vacancy?text=python")
+    enter_menu = mocker.patch.object(job_manager, "_enter_advanced_search_menu")
+
+    job_manager.set_advanced_search_params()
+
+    enter_menu.assert_not_called()
+    job_manager.driver.get.assert_called_once_with("https://hh.ru/search/vacancy?text=python")
+    assert job_manager.search_url == "https://hh.ru/search/vacancy?text=python"
+
+
+def test_first_search_page_is_not_loaded_twice(mocker, job_manager):
+    """Test that the results page opened by the search URL is processed without reloading it."""
+    mocker.patch("src.job_manager.SearchUrlBuilder.load_cached",
+                 return_value="https://hh.ru/search/vacancy?text=python")
+    mocker.patch.object(job_manager, "_send_repsonses")
+    mocker.patch.object(job_manager, "_sleep")
+    mocker.patch.object(job_manager.wait, "until", side_effect=[True, TimeoutException()])
+
+    job_manager.set_advanced_search_params()
+    job_manager.start_applying()
+
+    assert [c.args[0] for c in job_manager.driver.get.call_args_list] == [
+        "https://hh.ru/search/vacancy?text=python",
+        "https://hh.ru/search/vacancy?text=python&page=1",
+    ]
+
+
+def test_cover_letter_started_during_pause_is_reused(mocker, job_manager):
+    """Test that a cover letter generated ahead of time is not requested again."""
+    mocker.patch("src.job_manager.STREAM_COVER_LETTER", False)
+    job_manager.gpt_answerer.write_cover_letter.return_value = "letter"
+    job_manager._start_cover_letter({"description": "description"})
+    job_manager.driver.find_elements.return_value = [mocker.Mock()]
+    mocker.patch.object(job_manager, "_find_and_handle_questions")
+    send_letter = mocker.patch.object(job_manager, "_write_and_send_cover_letter")
+
+    job_manager.apply_job({"company_name": "Company", "description": "description"})
+
+    assert send_letter.call_args.args[0].result() == "letter"
+    job_manager.gpt_answerer.write_cover_letter.assert_called_once_with("description", "")
+    assert job_manager.pending_cover_letters == {}
+
+
+def test_http_scraper_closed_after_page(mocker, job_manager):
+    """Test that the HTTP client used to read the vacancies of a page is closed when the page is done."""
+    mocker.patch("src.job_manager.HTTP_VACANCY_SCRAPER", True)
+    scraper = mocker.patch("src.job_manager.HttpVacancyScraper.from_driver").return_value
+    mocker.patch.object(job_manager, "_read_vacancy_cards", return_value=[
+        {"url": "https://hh.ru/vacancy/1", "company_name": "Company", "title": "Python"}])
+    scraper.submit.return_value.result.side_effect = ValueError("blocked")
+    prefetcher = mocker.patch("src.job_manager.VacancyPrefetcher").return_value
+    prefetcher.__iter__.return_value = iter([("https://hh.ru/vacancy/1", "tab")])
+    mocker.patch.object(job_manager, "_scrape_employer_page", side_effect=RuntimeError("browser closed"))
+
+    with pytest.raises(RuntimeError):
+        job_manager._send_responses_with_prefetch()
+
+    scraper.close.assert_called_once()
+    assert job_manager.http_scraper is None
+
+
+def test_cover_letter_not_started_for_skipped_vacancy(mocker, job_manager):
+    """Test that no paid cover letter is requested ahead of time for a vacancy that will be skipped."""
+    submit = mocker.patch.object(job_manager, "_submit_cover_letter")
+    job_manager._save_company_to_json(job_manager._sanitize_text("Company"), job_manager._sanitize_text("Python"))
+
+    job_manager._start_cover_letter({"company_name": "Company", "title": "Python", "description": "description"})
+
+    submit.assert_not_called()
+
+
+def test_pending_cover_letters_cancelled(mocker, job_manager):
+    """Test that cover letters started ahead of time are cancelled when the page is left."""
+    mocker.patch("src.job_manager.STREAM_COVER_LETTER", True)
+    mocker.patch.object(job_manager.llm_executor, "submit")
+    job_manager._start_cover_letter({"company_name": "Company", "title": "Python", "description": "description"})
+    stream = job_manager.pending_cover_letters["description"]
+
+    job_manager._cancel_pending_cover_letters()
+
+    assert stream.cancelled and job_manager.pending_cover_letters == {}
+    job_manager._stream_cover_letter({"description": "description"}, stream)
+    job_manager.gpt_answerer.stream_cover_letter.assert_not_called()
+
+
+def test_driver_not_patched_without_command_stats(mocker, tmp_path):
+    """Test that WebDriver commands are counted only when WEBDRIVER_COMMAND_STATS is on."""
+    driver = mocker.Mock()
+    execute = driver.execute
+    assert JobManager(driver, state_store=JsonStateStore(tmp_path)).command_counter is None
+    assert driver.execute is execute
+
+    mocker.patch("src.job_manager.WEBDRIVER_COMMAND_STATS", True)
+    assert JobManager(driver, state_store=JsonStateStore(tmp_path)).command_counter is not None
+    assert driver.execute is not execute
+
+
+def test_failed_vacancy_is_not_retried(mocker, job_manager):
+    """Test that a vacancy whose application failed is skipped when the page is opened again."""
+    apply_job = mocker.patch.object(job_manager, "apply_job", side_effect=ValueError("bad request"))
+    job = {"company_name": "Company", "title": "Python", "description": "description"}
+
+    with pytest.raises(ValueError):
+        job_manager._process_vacancy(job)
+    job_manager._process_vacancy(job)
+
+    apply_job.assert_called_once()
+    assert not job_manager.state_store.is_company_seen("login", "Python", job_manager._sanitize_text("Company"))
+
+
+def test_failed_vacancy_tab_is_closed(mocker, job_manager):
+    """Test that the tab of a vacancy whose processing failed is closed and the search tab is restored."""
+    job_manager.driver.current_window_handle = "search"
+    mocker.patch.object(job_manager, "_read_vacancy_cards", return_value=[
+        {"url": "https://hh.ru/vacancy/1", "company_name": "Company", "title": "Python"}])
+    prefetcher = mocker.patch("src.job_manager.VacancyPrefetcher").return_value
+    prefetcher.__iter__.return_value = iter([("https://hh.ru/vacancy/1", "vacancy")])
+    mocker.patch.object(job_manager, "_scrape_employer_page", side_effect=RuntimeError("page changed"))
+
+    with pytest.raises(RuntimeError):
+        job_manager._send_responses_with_prefetch()
+
+    switches = [c.args[0] for c in job_manager.driver.switch_to.window.call_args_list]
+    assert switches == ["vacancy", "vacancy", "search"]
+    job_manager.driver.close.assert_called_once()
+
+
+def test_scroll_is_one_async_script_call(mocker, job_manager):
+    """Test that scrolling to an element is a single browser command returning the final position."""
+    mocker.patch.object(job_manager.pacing, "pause")
+    job_manager.driver.execute_async_script.return_value = 1170
+    element = mocker.Mock()
+
+    position = job_manager._scroll_slow(element, 0)
+
+    assert position == 1170
+    job_manager.driver.execute_async_script.assert_called_once()
+    assert job_manager.driver.execute_async_script.call_args.args[1:] == (element, 2000, 30)
+    job_manager.driver.execute_script.assert_not_called()
+
+
+def test_streamed_cover_letter_typed_by_paragraphs(mocker, job_manager):
+    """Test that a streamed cover letter is typed paragraph by paragraph while it is generated."""
+    typed = []
+    letter_field = mocker.Mock()
+    job_manager.driver.find_elements.return_value = [letter_field]
+    second_paragraph_allowed = threading.Event()
+
+    def stream_cover_letter(description, vacancy):
+        yield "Здравствуйте!\n\n"
+        # второй абзац генерируется только после того, как первый введен
+        assert second_paragraph_allowed.wait(timeout=5)
+        yield "Хочу у вас работать."
+
+    job_manager.gpt_answerer.stream_cover_letter.side_effect = stream_cover_letter
+    letter_field.send_keys.side_effect = lambda text: typed.append(text) or second_paragraph_allowed.set()
+
+    job_manager._write_and_send_cover_letter(job_manager._submit_cover_letter(
+        {"company_name": "Company", "title": "Python", "description": "description"}))
+
+    assert typed == ["Здравствуйте!\n\n", "Хочу у вас работать."]
+    job_manager.gpt_answerer.write_cover_letter.assert_not_called()
+
+
+def test_failed_stream_falls_back_to_full_cover_letter(mocker, job_manager):
+    """Test that the cover letter is requested in full when streaming fails before any text arrives."""
+    job_manager.gpt_answerer.stream_cover_letter.side_effect = RuntimeError("stream is not supported")
+    job_manager.gpt_answerer.write_cover_letter.return_value = "letter"
+
+    stream = job_manager._submit_cover_letter({"company_name": "Company", "description": "description"})
+
+    assert stream.result() == "letter"
@@ -0,0 +1,28 @@
+from src.llm.llm_manager import GPTAnswerer
+
+QUESTIONS = ["ваш опыт с python?", "ваш уровень английского?", "когда сможете выйти?"]
+
+
+def test_valid_answers_are_mapped_to_questions():
+    """Test that numbered JSON answers are mapped back to the question texts."""
+    output = '```json\n{"1": "5 лет", "2": "B2", "3": 2}\n```'
+
+    assert GPTAnswerer.parse_batch_answers(output, QUESTIONS) == {
+        "ваш опыт с python?": "5 лет",
+        "ваш уровень английского?": "B2",
+        "когда сможете выйти?": "2",
+    }
+
+
+def test_invalid_items_are_dropped():
+    """Test that missing, empty, structured and placeholder answers are rejected per item."""
+    output = '{"1": "", "2": {"level": "B2"}, "3": "Через [[weeks]] недели", "4": "лишний"}'
+
+    assert GPTAnswerer.parse_batch_answers(output, QUESTIONS) == {}
+    assert GPTAnswerer.parse_batch_answers('{"1": "PLACEHOLDER"}', QUESTIONS) == {}
+
+
+def test_unparseable_output_returns_no_answers():
+    """Test that a reply without a JSON object leads to the per-question fallback."""
+    assert GPTAnswerer.parse_batch_answers("1. 5 лет\n2. B2", QUESTIONS) == {}
+    assert GPTAnswerer.parse_batch_answers('{"1": "5 лет",', QUESTIONS) == {}
@@ -0,0 +1,69 @@
+import gzip
+import json
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from src.llm.call_log import CallLogWriter
+from src.llm.llm_manager import LLMLogger
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_entries_written_as_jsonl(tmp_path):
+    """Test that queued entries end up in the file as one compact line each."""
+    writer = CallLogWriter(tmp_path / "calls.jsonl")
+    for i in range(5):
+        writer.write({"n": i, "text": "ответ"})
+    writer.flush()
+
+    assert read_jsonl(tmp_path / "calls.jsonl") == [{"n": i, "text": "ответ"} for i in range(5)]
+    assert "ответ" in (tmp_path / "calls.jsonl").read_text(encoding="utf-8")
+    writer.close()
+
+
+def test_close_writes_pending_entries(tmp_path):
+    """Test that closing the writer flushes the queue and later writes are synchronous."""
+    writer = CallLogWriter(tmp_path / "calls.jsonl")
+    writer.write({"n": 1})
+    writer.close()
+    writer.write({"n": 2})
+
+    assert read_jsonl(tmp_path / "calls.jsonl") == [{"n": 1}, {"n": 2}]
+
+
+def test_full_file_is_rotated_and_gzipped(tmp_path):
+    """Test that the log is compressed into a separate segment once it exceeds max_bytes."""
+    writer = CallLogWriter(tmp_path / "calls.jsonl", max_bytes=50)
+    writer.write({"text": "x" * 60})
+    writer.flush()
+    writer.write({"text": "y"})
+    writer.close()
+
+    segments = list(tmp_path.glob("calls.*.jsonl.gz"))
+    assert len(segments) == 1
+    with gzip.open(segments[0], "rt", encoding="utf-8") as f:
+        assert json.loads(f.read()) == {"text": "x" * 60}
+    assert read_jsonl(tmp_path / "calls.jsonl") == [{"text": "y"}]
+
+
+def test_log_request_queues_entry(mocker):
+    """Test that a logged request is handed to the background writer with its cost."""
+    writer = mocker.Mock()
+    mocker.patch.object(LLMLogger, "call_log", writer)
+    prompts = ChatPromptTemplate.from_template("Вопрос: {question}").invoke({"question": "a"})
+    parsed_reply = {
+        "content": "answer",
+        "response_metadata": {"model_name": "gpt-4o-mini"},
+        "usage_metadata": {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+    }
+
+    LLMLogger.log_request(prompts, parsed_reply)
+
+    entry = writer.write.call_args.args[0]
+    assert entry["prompts"] == {"prompt_1": "Вопрос: a"}
+    assert entry["replies"] == "answer"
+    assert entry["total_tokens"] == 15
+    assert entry["total_cost"] > 0
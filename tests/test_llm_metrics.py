@@ -0,0 +1,90 @@
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from src.llm.llm_manager import LoggerChatModel
+from src.llm.metrics import LLMMetrics, vacancy_label
+
+
+def test_requests_aggregated_by_chain_and_vacancy():
+    """Test that tokens, cost and latency are summed per chain and per vacancy."""
+    metrics = LLMMetrics()
+    metrics.record_request("cover_letter", "Company - Python", 1.5, 100, 50, 0.01)
+    metrics.record_request("cover_letter", "Other - Java", 0.7, 10, 5, 0.001)
+    metrics.record_request("section", "Company - Python", 0.2, 20, 2, 0.0001)
+    metrics.record_cache_hit("section", "Company - Python")
+
+    cover_letter = metrics.chains["cover_letter"]
+    assert (cover_letter.requests, cover_letter.input_tokens, cover_letter.output_tokens) == (2, 110, 55)
+    assert cover_letter.latency.count == 2 and cover_letter.latency.max == 1.5
+    vacancy = metrics.vacancies["Company - Python"]
+    assert (vacancy.requests, vacancy.cache_hits) == (2, 1)
+    assert round(vacancy.cost, 6) == 0.0101
+
+
+def test_prometheus_export(tmp_path):
+    """Test the textfile export format of counters and cumulative histogram buckets."""
+    metrics = LLMMetrics()
+    metrics.record_request("cover_letter", "Компания \"А\"", 1.5, 100, 50, 0.01)
+    metrics.record_request("cover_letter", "", 3, 10, 5, 0.001)
+
+    metrics.write_textfile(tmp_path / "llm.prom")
+    text = (tmp_path / "llm.prom").read_text(encoding="utf-8")
+
+    assert "# TYPE llm_requests_total counter" in text
+    assert 'llm_requests_total{chain="cover_letter"} 2' in text
+    assert 'llm_request_duration_seconds_bucket{chain="cover_letter",le="2"} 1' in text
+    assert 'llm_request_duration_seconds_bucket{chain="cover_letter",le="5"} 2' in text
+    assert 'llm_request_duration_seconds_bucket{chain="cover_letter",le="+Inf"} 2' in text
+    assert 'llm_request_duration_seconds_sum{chain="cover_letter"} 4.5' in text
+    assert "vacancy=" not in text
+    assert not (tmp_path / "llm.prom.tmp").exists()
+
+
+def test_route_statistics():
+    """Test that route outcomes are counted and only successful answers feed the latency histogram."""
+    metrics = LLMMetrics()
+    metrics.record_route("section", "ollama/llama3.1", 0.4, "ok")
+    metrics.record_route("section", "ollama/llama3.1", 10.0, "timeout")
+    metrics.record_route("section", "openai/gpt-4o-mini", 1.2, "ok")
+    metrics.record_route_discarded("section", "ollama/llama3.1")
+
+    text = metrics.to_prometheus()
+
+    assert 'llm_route_requests_total{chain="section",model="ollama/llama3.1",outcome="timeout"} 1' in text
+    assert 'llm_route_duration_seconds_count{chain="section",model="ollama/llama3.1"} 1' in text
+    assert 'llm_route_discarded_total{chain="section",model="ollama/llama3.1"} 1' in text
+    assert "section -> ollama/llama3.1: 1 / 0 / 1, 0.40, 0.5, 0.40, 1" in metrics.summary()
+
+
+def test_summary_lists_chains_and_vacancies():
+    """Test that the end-of-run summary includes totals and the most expensive vacancies."""
+    metrics = LLMMetrics()
+    metrics.record_request("cover_letter", "Company - Python", 2, 100, 50, 0.01)
+
+    summary = metrics.summary()
+
+    assert "cover_letter" in summary
+    assert "Всего" in summary
+    assert "Company - Python" in summary
+
+
+def test_vacancy_label():
+    """Test the vacancy label used for metrics."""
+    assert vacancy_label({"company_name": "Company", "title": "Python"}) == "Company - Python"
+    assert vacancy_label(None) == ""
+
+
+def test_chat_model_records_vacancy_from_chain_config(mocker):
+    """Test that the vacancy passed in the chain metadata reaches the metrics."""
+    metrics = LLMMetrics()
+    mocker.patch("src.llm.llm_manager.llm_metrics", metrics)
+    mocker.patch("src.llm.llm_manager.LLMLogger.log_request", return_value=0.5)
+    llm = mocker.Mock()
+    llm.invoke.return_value = AIMessage(content="answer", usage_metadata={
+        "input_tokens": 3, "output_tokens": 4, "total_tokens": 7})
+    chain = ChatPromptTemplate.from_template("{question}") | LoggerChatModel(llm, "projects")
+
+    chain.invoke({"question": "a"}, {"metadata": {"vacancy": "Company - Python"}})
+
+    assert metrics.chains["projects"].output_tokens == 4
+    assert metrics.vacancies["Company - Python"].cost == 0.5
@@ -0,0 +1,86 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+import src.llm.rate_limiter as rate_limiter
+from src.llm.llm_manager import LoggerChatModel
+from src.llm.prompt_compactor import TokenCounter
+from src.llm.rate_limiter import RateLimiter, get_rate_limiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture replacing time.monotonic and time.sleep in the rate limiter."""
+    clock = FakeClock()
+    mocker.patch("src.llm.rate_limiter.time.monotonic", side_effect=clock.monotonic)
+    mocker.patch("src.llm.rate_limiter.time.sleep", side_effect=clock.sleep)
+    return clock
+
+
+def test_requests_per_minute(clock):
+    """Test that requests over the rpm budget wait for the bucket to refill."""
+    limiter = RateLimiter("openai/gpt-4o-mini", rpm=3)
+
+    waits = [limiter.acquire(10) for _ in range(4)]
+
+    assert waits == [0, 0, 0, pytest.approx(20)]
+
+
+def test_tokens_per_minute(clock):
+    """Test that a request waits until enough tokens are refilled."""
+    limiter = RateLimiter("claude", tpm=600)
+    limiter.acquire(500)
+
+    assert limiter.acquire(400) == pytest.approx(30)
+
+
+def test_reconcile_with_actual_usage(clock):
+    """Test that tokens spent above the estimate delay the following requests."""
+    limiter = RateLimiter("claude", tpm=600)
+    limiter.acquire(100)
+    limiter.reconcile(100, 600)
+
+    assert limiter.acquire(60) == pytest.approx(6)
+
+
+def test_limits_by_model_then_provider(mocker):
+    """Test that model limits take precedence over provider limits and limiters are shared."""
+    mocker.patch.object(rate_limiter, "LLM_RATE_LIMITS", {
+        "openai/gpt-4o": {"rpm": 10, "tpm": 1000}, "openai": {"rpm": 3}})
+    mocker.patch.object(rate_limiter, "_rate_limiters", {})
+
+    assert get_rate_limiter("openai/gpt-4o").tokens.capacity == 1000
+    assert get_rate_limiter("openai/gpt-4o-mini").tokens is None
+    assert get_rate_limiter("openai/gpt-4o") is get_rate_limiter("openai/gpt-4o")
+    assert get_rate_limiter("ollama/llama3") is None
+
+
+def test_chat_model_reserves_estimate_and_reconciles(mocker):
+    """Test that the chat model reserves the estimated prompt tokens and reconciles them with the usage."""
+    mocker.patch("src.llm.llm_manager.LLMLogger.log_request", return_value=0.0)
+    limiter = mocker.Mock()
+    mocker.patch("src.llm.llm_manager.get_rate_limiter", return_value=limiter)
+    counter = TokenCounter()
+    counter.loaded = True
+    llm = mocker.Mock(model_name="openai/gpt-4o-mini")
+    llm.invoke.return_value = AIMessage(
+        content="Да", response_metadata={"model_name": "gpt-4o-mini"},
+        usage_metadata={"input_tokens": 40, "output_tokens": 5, "total_tokens": 45})
+
+    LoggerChatModel(llm, "projects", token_counter=counter)("Вопрос о проектах")
+
+    estimated = limiter.acquire.call_args.args[0]
+    assert estimated == counter.count("Вопрос о проектах")
+    limiter.reconcile.assert_called_once_with(estimated, 45)
@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.llm.llm_manager import LoggerChatModel
+from src.llm.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, is_retryable, retry_after
+
+
+def http_error(status: int, headers: dict = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com/v1/chat")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def sleep(mocker):
+    """Fixture replacing time.sleep in the retry loop."""
+    return mocker.patch("src.llm.resilience.time.sleep")
+
+
+def test_retryable_errors():
+    """Test that overload, server and network errors are retried, request and parsing errors are not."""
+    assert is_retryable(http_error(429))
+    assert is_retryable(http_error(503))
+    assert is_retryable(httpx.ConnectError("connection refused"))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(http_error(400))
+    assert not is_retryable(http_error(401))
+    assert not is_retryable(KeyError("usage_metadata"))
+
+
+def test_retry_after_headers():
+    """Test that retry-after-ms takes precedence over retry-after."""
+    assert retry_after(http_error(429, {"retry-after": "7"})) == 7.0
+    assert retry_after(http_error(429, {"retry-after": "7", "retry-after-ms": "1500"})) == 1.5
+    assert retry_after(http_error(500)) is None
+
+
+def test_retries_with_exponential_backoff(mocker, sleep):
+    """Test that failed requests are retried with growing capped delays until they succeed."""
+    mocker.patch("src.llm.resilience.random.uniform", side_effect=lambda low, high: high)
+    func = mocker.Mock(side_effect=[http_error(503), http_error(503), http_error(503), "ответ"])
+    caller = ResilientCaller(max_retries=5, base_delay_sec=1, max_delay_sec=3)
+
+    assert caller.call(func) == "ответ"
+    assert [c.args[0] for c in sleep.call_args_list] == [1, 2, 3]
+
+
+def test_retry_after_is_honoured(mocker, sleep):
+    """Test that the provider's retry-after delay is used instead of the backoff."""
+    mocker.patch("src.llm.resilience.random.uniform", return_value=0)
+    func = mocker.Mock(side_effect=[http_error(429, {"retry-after": "12"}), "ответ"])
+
+    assert ResilientCaller(max_retries=3, base_delay_sec=1).call(func) == "ответ"
+    sleep.assert_called_once_with(12.0)
+
+
+def test_retry_cap(mocker, sleep):
+    """Test that the last error is raised once the retries are exhausted."""
+    func = mocker.Mock(side_effect=http_error(503))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        ResilientCaller(max_retries=2, base_delay_sec=0).call(func)
+    assert func.call_count == 3
+
+
+def test_permanent_error_is_not_retried(mocker, sleep):
+    """Test that a request error is raised immediately."""
+    func = mocker.Mock(side_effect=http_error(400))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        ResilientCaller().call(func)
+    func.assert_called_once()
+    sleep.assert_not_called()
+
+
+def test_circuit_breaker_opens_and_recovers(mocker):
+    """Test that the breaker fails fast after repeated failures and lets one trial request through later."""
+    clock = FakeClock()
+    mocker.patch("src.llm.resilience.time.monotonic", side_effect=clock.monotonic)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_sec=60)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 61
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    breaker.before_call()
+
+
+def test_open_circuit_skips_provider(mocker, sleep):
+    """Test that no request is sent while the provider is considered down."""
+    func = mocker.Mock(side_effect=http_error(503))
+    caller = ResilientCaller(max_retries=10, base_delay_sec=0, breaker=CircuitBreaker(failure_threshold=3))
+
+    with pytest.raises(CircuitOpenError):
+        caller.call(func)
+    assert func.call_count == 3
+
+
+def test_async_calls_are_bounded():
+    """Test that no more than max_concurrency async requests run at once."""
+    caller = ResilientCaller(max_concurrency=2)
+    running, peak = 0, 0
+
+    async def request():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ответ"
+
+    async def run():
+        return await asyncio.gather(*(caller.acall(request) for _ in range(6)))
+
+    assert asyncio.run(run()) == ["ответ"] * 6
+    assert peak == 2
+
+
+def test_sync_async_and_stream_share_one_limit(mocker):
+    """Test that sync, async and streaming requests are counted against the same concurrency limit."""
+    mocker.patch("src.llm.llm_manager.LLMLogger.log_request", return_value=0.0)
+    caller = ResilientCaller(max_concurrency=2)
+    release = threading.Event()
+    llm = mocker.Mock()
+    llm.stream.side_effect = lambda messages: (release.wait(5), iter([AIMessageChunk(content="Да")]))[1]
+    stream = LoggerChatModel(llm, "cover_letter", resilience=caller).stream("prompt")
+    sync_call = threading.Thread(target=caller.call, args=(lambda: release.wait(5),))
+    sync_call.start()
+    streaming = threading.Thread(target=list, args=(stream,))
+    streaming.start()
+    while caller.semaphore._value:
+        time.sleep(0.01)
+
+    async def run():
+        request = asyncio.ensure_future(caller.acall(mocker.AsyncMock(return_value="ответ")))
+        await asyncio.sleep(0.05)
+        assert not request.done()
+        release.set()
+        return await request
+
+    assert asyncio.run(run()) == "ответ"
+    sync_call.join(5)
+    streaming.join(5)
+    assert caller.semaphore._value == 2
+
+
+def test_chat_model_ainvoke(mocker):
+    """Test that the chat model runs through the async adapter call and logs the request."""
+    log_request = mocker.patch("src.llm.llm_manager.LLMLogger.log_request", return_value=0.0)
+    reply = AIMessage(content="Да", response_metadata={"model_name": "gpt"},
+                      usage_metadata={"input_tokens": 3, "output_tokens": 1, "total_tokens": 4})
+    llm = mocker.Mock()
+    llm.ainvoke = mocker.AsyncMock(return_value=reply)
+
+    result = asyncio.run(LoggerChatModel(llm, "projects").as_runnable().ainvoke("prompt"))
+
+    assert result is reply
+    llm.invoke.assert_not_called()
+    assert log_request.call_args.kwargs["parsed_reply"]["content"] == "Да"
+
+
+def half_open_caller() -> ResilientCaller:
+    """Build a caller whose breaker lets the next request through as a trial."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_sec=0)
+    breaker.record_failure()
+    return ResilientCaller(base_delay_sec=0, breaker=breaker)
+
+
+def test_stream_closed_early_releases_trial(mocker):
+    """Test that closing a trial stream mid-way does not keep the breaker locked."""
+    caller = half_open_caller()
+    llm = mocker.Mock()
+    llm.stream.return_value = iter([AIMessageChunk(content="Добрый "), AIMessageChunk(content="день")])
+    stream = LoggerChatModel(llm, "cover_letter", resilience=caller).stream("prompt")
+
+    assert next(stream) == "Добрый "
+    stream.close()
+
+    assert not caller.breaker.trial_in_progress
+    caller.breaker.before_call()
+
+
+def test_stream_permanent_error_releases_trial(mocker):
+    """Test that a non-retryable error of a trial stream closes the breaker instead of locking it."""
+    caller = half_open_caller()
+    llm = mocker.Mock()
+    llm.stream.side_effect = ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        list(LoggerChatModel(llm, "cover_letter", resilience=caller).stream("prompt"))
+
+    assert not caller.breaker.trial_in_progress
+    assert not caller.breaker.is_open()
+
+
+def test_cancelled_async_trial_releases_breaker():
+    """Test that a trial request cancelled by a timeout lets the next request try again."""
+    caller = half_open_caller()
+
+    async def slow():
+        await asyncio.sleep(5)
+
+    async def run():
+        await asyncio.wait_for(caller.acall(slow), 0.01)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert not caller.breaker.trial_in_progress
+    caller.breaker.before_call()
+
+
+def test_rate_limit_wait_does_not_hold_a_slot():
+    """Test that a request waiting for the rate limiter leaves its concurrency slot to others."""
+    caller = ResilientCaller(max_concurrency=1)
+    waiting, release = threading.Event(), threading.Event()
+
+    def acquire():
+        waiting.set()
+        release.wait(5)
+
+    limited = threading.Thread(target=caller.call, args=(lambda: "ответ", acquire))
+    limited.start()
+    waiting.wait(5)
+
+    assert caller.call(lambda: "другой ответ") == "другой ответ"
+    release.set()
+    limited.join(5)
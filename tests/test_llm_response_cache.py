@@ -0,0 +1,97 @@
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from src.llm.llm_manager import GPTAnswerer, LoggerChatModel
+from src.llm.response_cache import LLMResponseCache, cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture to create a response cache inside a temporary folder."""
+    cache = LLMResponseCache(tmp_path / "llm_cache.sqlite3", max_entries=2, ttl_sec=100)
+    yield cache
+    cache.close()
+
+
+def make_reply(content):
+    return AIMessage(content=content, response_metadata={"model_name": "model"}, id="id",
+                     usage_metadata={"input_tokens": 1, "output_tokens": 2, "total_tokens": 3})
+
+
+def test_key_depends_on_model_prompt_and_temperature():
+    """Test that every part of the request changes the cache key."""
+    prompt = ChatPromptTemplate.from_template("Вопрос: {question}")
+    key = cache_key("openai/gpt-4o-mini", prompt.invoke({"question": "a"}), 0.4)
+
+    assert key == cache_key("openai/gpt-4o-mini", prompt.invoke({"question": "a"}), 0.4)
+    assert key != cache_key("openai/gpt-4o-mini", prompt.invoke({"question": "b"}), 0.4)
+    assert key != cache_key("openai/gpt-4o", prompt.invoke({"question": "a"}), 0.4)
+    assert key != cache_key("openai/gpt-4o-mini", prompt.invoke({"question": "a"}), 0.0)
+
+
+def test_reply_roundtrip_and_stats(cache, tmp_path):
+    """Test that a stored reply survives reopening and hits are counted per chain."""
+    assert cache.get("key", "projects") is None
+    cache.put("key", "projects", make_reply("answer"))
+    cache.close()
+
+    reopened = LLMResponseCache(tmp_path / "llm_cache.sqlite3")
+    reply = reopened.get("key", "projects")
+    assert reply.content == "answer"
+    assert reply.usage_metadata["total_tokens"] == 3
+    assert reopened.stats() == "из кэша 1 из 1 (projects 1/1)"
+    reopened.close()
+
+
+def test_least_recently_used_is_evicted(mocker, cache):
+    """Test that the oldest unused reply is evicted when the cache is full."""
+    clock = mocker.patch("src.llm.response_cache.time.time", return_value=10)
+    cache.put("a", "projects", make_reply("a"))
+    clock.return_value = 11
+    cache.put("b", "projects", make_reply("b"))
+    clock.return_value = 12
+    cache.get("a", "projects")
+    clock.return_value = 13
+    cache.put("c", "projects", make_reply("c"))
+
+    assert cache.get("a", "projects") is not None
+    assert cache.get("b", "projects") is None
+    assert cache.get("c", "projects") is not None
+
+
+def test_expired_reply_is_not_used(mocker, cache):
+    """Test that replies older than the TTL are treated as misses."""
+    clock = mocker.patch("src.llm.response_cache.time.time", return_value=10)
+    cache.put("a", "projects", make_reply("a"))
+    clock.return_value = 120
+
+    assert cache.get("a", "projects") is None
+
+
+def test_chat_model_calls_provider_once(mocker, cache):
+    """Test that a cached chain does not call the provider for a repeated prompt."""
+    llm = mocker.Mock(model_name="openai/gpt-4o-mini", temperature=0.4)
+    llm.invoke.return_value = make_reply("answer")
+    mocker.patch("src.llm.llm_manager.LLMLogger.log_request", return_value=0.0)
+    chain = ChatPromptTemplate.from_template("Вопрос: {question}") | LoggerChatModel(llm, "projects", cache)
+
+    assert chain.invoke({"question": "a"}).content == "answer"
+    assert chain.invoke({"question": "a"}).content == "answer"
+    llm.invoke.assert_called_once()
+
+    uncached = ChatPromptTemplate.from_template("Вопрос: {question}") | LoggerChatModel(llm, "projects")
+    uncached.invoke({"question": "a"})
+    assert llm.invoke.call_count == 2
+
+
+def test_section_chain_is_not_cached_twice(mocker):
+    """Test that section decisions are kept only by the section classifier, not in the response cache."""
+    mocker.patch("src.llm.llm_manager.AIAdapter", return_value=mocker.Mock(model_name="openai/gpt-4o-mini"))
+    mocker.patch("src.llm.llm_manager.LLMResponseCache")
+    mocker.patch("src.llm.llm_manager.LLM_CACHE_CHAINS", ["section", "projects"])
+
+    answerer = GPTAnswerer({}, "secret")
+
+    assert answerer._chat_model("section").cache is None
+    assert answerer._chat_model("projects").cache is answerer.response_cache
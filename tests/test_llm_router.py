@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import threading
+import time
+
+import pytest
+
+from src.llm.llm_manager import ChainRouter, GPTAnswerer
+from src.llm.router import RouteTimeoutError, call_with_timeout
+
+
+def route_model(mocker, model_name, reply=None, error=None, breaker_open=False):
+    """Build a chat model stub answering with reply or raising error."""
+    model = mocker.Mock(side_effect=error, return_value=reply)
+    model.llm.model_name = model_name
+    model.resilience.breaker.is_open.return_value = breaker_open
+    return model
+
+
+@pytest.fixture
+def record_route(mocker):
+    """Fixture capturing route outcomes sent to the metrics."""
+    return mocker.patch("src.llm.router.llm_metrics.record_route")
+
+
+def test_falls_back_on_error(mocker, record_route):
+    """Test that the next model answers when the first one fails."""
+    local = route_model(mocker, "ollama/llama3.1", error=ConnectionError("refused"))
+    cloud = route_model(mocker, "openai/gpt-4o-mini", reply="Да")
+
+    assert ChainRouter("section", [local, cloud], 10)("prompt") == "Да"
+    outcomes = [(c.args[1], c.args[3]) for c in record_route.call_args_list]
+    assert outcomes == [("ollama/llama3.1", "error"), ("openai/gpt-4o-mini", "ok")]
+
+
+def test_falls_back_on_slow_model(mocker, record_route):
+    """Test that a model exceeding the latency SLO is abandoned for the next one."""
+    release = threading.Event()
+    slow = route_model(mocker, "openai/gpt-4o")
+    slow.side_effect = lambda messages, config: release.wait(5) and "поздно"
+    fast = route_model(mocker, "openai/gpt-4o-mini", reply="Письмо")
+
+    try:
+        assert ChainRouter("cover_letter", [slow, fast], 0.05)("prompt") == "Письмо"
+    finally:
+        release.set()
+    assert record_route.call_args_list[0].args[3] == "timeout"
+
+
+def test_abandoned_answer_counted_as_discarded(mocker, record_route):
+    """Test that an answer arriving after the fallback is recorded as paid but unused."""
+    discarded = mocker.patch("src.llm.router.llm_metrics.record_route_discarded")
+    release = threading.Event()
+    finished = threading.Event()
+
+    def late(messages, config):
+        release.wait(5)
+        finished.set()
+        return "поздно"
+
+    slow = route_model(mocker, "openai/gpt-4o")
+    slow.side_effect = late
+    fast = route_model(mocker, "openai/gpt-4o-mini", reply="Письмо")
+
+    assert ChainRouter("cover_letter", [slow, fast], 0.05)("prompt") == "Письмо"
+    release.set()
+    finished.wait(5)
+    for _ in range(100):
+        if discarded.called:
+            break
+        time.sleep(0.01)
+    discarded.assert_called_once_with("cover_letter", "openai/gpt-4o")
+
+
+def test_queued_request_cancelled_on_timeout(mocker):
+    """Test that a request still waiting for a free thread is cancelled instead of abandoned."""
+    release = threading.Event()
+    busy = ThreadPoolExecutor(max_workers=1)
+    mocker.patch("src.llm.router._executor", busy)
+    busy.submit(release.wait, 5)
+    func = mocker.Mock(return_value="ответ")
+
+    try:
+        with pytest.raises(RouteTimeoutError):
+            call_with_timeout(func, 0.05)
+    finally:
+        release.set()
+        busy.shutdown(wait=True)
+    func.assert_not_called()
+
+
+def test_skips_model_with_open_circuit(mocker, record_route):
+    """Test that a model whose provider is down is not called."""
+    down = route_model(mocker, "claude/claude-3-5-sonnet", breaker_open=True)
+    up = route_model(mocker, "openai/gpt-4o-mini", reply="Да")
+
+    assert ChainRouter("cover_letter", [down, up], 10)("prompt") == "Да"
+    down.assert_not_called()
+
+
+def test_last_model_error_is_raised(mocker, record_route):
+    """Test that the error of the last model is raised when every model fails."""
+    first = route_model(mocker, "ollama/llama3.1", error=ConnectionError("refused"))
+    last = route_model(mocker, "openai/gpt-4o-mini", error=ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        ChainRouter("section", [first, last], 10)("prompt")
+
+
+def test_stream_falls_back_only_before_first_chunk(mocker, record_route):
+    """Test that streaming switches models before any text is received, but not after."""
+    def broken(messages, vacancy):
+        raise ConnectionError("refused")
+        yield
+
+    def partial(messages, vacancy):
+        yield "Здравствуйте!"
+        raise ConnectionError("connection lost")
+
+    first = route_model(mocker, "openai/gpt-4o")
+    first.stream.side_effect = broken
+    second = route_model(mocker, "openai/gpt-4o-mini")
+    second.stream.side_effect = lambda messages, vacancy: iter(["Добрый ", "день"])
+    assert list(ChainRouter("cover_letter", [first, second]).stream("prompt")) == ["Добрый ", "день"]
+
+    first.stream.side_effect = partial
+    with pytest.raises(ConnectionError):
+        list(ChainRouter("cover_letter", [first, second]).stream("prompt"))
+
+
+def test_route_skips_models_without_api_key(mocker, monkeypatch):
+    """Test that route models without an API key are left out and single-model routes are not wrapped."""
+    def adapter(config, api_key, model_type="openai", llm_model="gpt-4o-mini"):
+        return mocker.Mock(model_name=f"{model_type}/{llm_model}", model_type=model_type, llm_model=llm_model)
+
+    mocker.patch("src.llm.llm_manager.AIAdapter", side_effect=adapter)
+    mocker.patch("src.llm.llm_manager.LLM_CACHE_CHAINS", [])
+    mocker.patch("src.llm.llm_manager.LLM_ROUTES", {
+        "section": ["ollama/llama3.1", "openai/gpt-4o-mini"],
+        "cover_letter": ["claude/claude-3-5-sonnet", "openai/gpt-4o-mini"],
+    })
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+
+    answerer = GPTAnswerer({}, "secret")
+
+    section_model = answerer._chat_model("section")
+    assert isinstance(section_model, ChainRouter)
+    assert [model.llm.model_name for model in section_model.models] == ["ollama/llama3.1", "openai/gpt-4o-mini"]
+    assert answerer._chat_model("cover_letter").llm.model_name == "openai/gpt-4o-mini"
+    assert answerer._chat_model("projects").llm is answerer.ai_adapter
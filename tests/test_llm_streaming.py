@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from src.llm.llm_manager import LoggerChatModel
+from src.llm.streaming import TextStream, split_paragraphs
+
+
+def test_split_paragraphs():
+    """Test that streamed fragments are regrouped into whole paragraphs."""
+    chunks = ["Здрав", "ствуйте!\n", "\nМеня заинтере", "совала вакансия.\n\nС уваж", "ением"]
+
+    assert list(split_paragraphs(chunks)) == [
+        "Здравствуйте!\n\n", "Меня заинтересовала вакансия.\n\n", "С уважением"]
+
+
+def test_text_stream_delivers_chunks_as_they_arrive():
+    """Test that a reader gets each chunk before the writer finishes."""
+    stream = TextStream()
+    received = []
+    first_chunk_read = threading.Event()
+
+    def read():
+        for chunk in stream:
+            received.append(chunk)
+            first_chunk_read.set()
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    stream.put("один ")
+    assert first_chunk_read.wait(timeout=5)
+    stream.put("два")
+    stream.finish()
+    reader.join(timeout=5)
+
+    assert received == ["один ", "два"]
+    assert stream.result() == "один два"
+
+
+def test_text_stream_reraises_writer_error():
+    """Test that an error in the writer is raised to the reader after the received text."""
+    stream = TextStream()
+    stream.put("начало")
+    stream.finish(RuntimeError("connection lost"))
+
+    with pytest.raises(RuntimeError):
+        stream.result()
+
+
+def test_chat_model_stream_logs_usage_once(mocker):
+    """Test that a streamed reply is logged once, with the usage of the completed stream."""
+    log_request = mocker.patch("src.llm.llm_manager.LLMLogger.log_request", return_value=0.0)
+    llm = mocker.Mock()
+    llm.stream.return_value = iter([
+        AIMessageChunk(content="Здравствуйте!", id="run-1"),
+        AIMessageChunk(content=" Спасибо.", usage_metadata={
+            "input_tokens": 10, "output_tokens": 4, "total_tokens": 14}),
+    ])
+
+    chunks = list(LoggerChatModel(llm, "cover_letter").stream("prompt"))
+
+    assert chunks == ["Здравствуйте!", " Спасибо."]
+    parsed_reply = log_request.call_args.kwargs["parsed_reply"]
+    assert parsed_reply["content"] == "Здравствуйте! Спасибо."
+    assert parsed_reply["usage_metadata"]["total_tokens"] == 14
@@ -0,0 +1,61 @@
+import pytest
+from src.pacing import PacingScheduler
+
+
+class FakeClock:
+    """Monotonic clock advanced by sleeps and by the work done in tasks."""
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture replacing time.monotonic and time.sleep in the scheduler."""
+    clock = FakeClock()
+    mocker.patch("src.pacing.time.monotonic", side_effect=clock.monotonic)
+    mocker.patch("src.pacing.time.sleep", side_effect=clock.sleep)
+    return clock
+
+
+def test_pause_runs_idle_tasks_and_keeps_deadline(clock):
+    """Test that queued work runs during a pause and the pause still ends on its deadline."""
+    scheduler = PacingScheduler(min_idle_slice_sec=0.5)
+    done = []
+    scheduler.submit_idle("first", lambda: (done.append("first"), clock.sleep(1)))
+    scheduler.submit_idle("second", lambda: (done.append("second"), clock.sleep(1)))
+
+    scheduler.pause(3)
+
+    assert done == ["first", "second"]
+    assert clock.now == 3
+    assert scheduler.pending() == 0
+
+
+def test_short_pause_leaves_tasks_queued(clock):
+    """Test that tasks are not started when too little of the pause is left."""
+    scheduler = PacingScheduler(min_idle_slice_sec=0.5)
+    scheduler.submit_idle("task", lambda: pytest.fail("task must not run"))
+
+    scheduler.pause(0.3)
+
+    assert clock.now == pytest.approx(0.3)
+    assert scheduler.pending() == 1
+
+
+def test_failing_task_does_not_break_pause(clock):
+    """Test that an exception in background work is logged and the pause continues."""
+    scheduler = PacingScheduler(min_idle_slice_sec=0.5)
+    done = []
+    scheduler.submit_idle("broken", lambda: 1 / 0)
+    scheduler.submit_idle("next", lambda: done.append("next"))
+
+    scheduler.pause(2)
+
+    assert done == ["next"]
+    assert clock.now == 2
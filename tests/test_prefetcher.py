@@ -0,0 +1,63 @@
+import pytest
+from src.prefetcher import VacancyPrefetcher
+
+
+class FakeDriver:
+    """Minimal driver that opens and closes tabs."""
+    def __init__(self):
+        self.window_handles = ["search"]
+        self.current_window_handle = "search"
+        self.opened_urls = []
+
+    def execute_script(self, script, url):
+        self.opened_urls.append(url)
+        self.window_handles.append(f"tab-{len(self.opened_urls)}")
+
+    @property
+    def switch_to(self):
+        driver = self
+
+        class SwitchTo:
+            def window(self, handle):
+                driver.current_window_handle = handle
+        return SwitchTo()
+
+    def close(self):
+        self.window_handles.remove(self.current_window_handle)
+
+
+@pytest.fixture
+def driver():
+    return FakeDriver()
+
+
+def test_lookahead_is_bounded(driver):
+    """Test that no more than lookahead tabs are open ahead of the current vacancy."""
+    urls = [f"https://hh.ru/vacancy/{i}" for i in range(5)]
+    prefetcher = VacancyPrefetcher(driver, urls, lookahead=2)
+    visited = []
+    for url, handle in prefetcher:
+        # открыта текущая вкладка и не более двух следующих
+        assert len(driver.window_handles) - 1 <= 3
+        visited.append(url)
+        driver.switch_to.window(handle)
+        driver.close()
+        driver.switch_to.window("search")
+
+    assert visited == urls
+    assert driver.window_handles == ["search"]
+
+
+def test_close_discards_unprocessed_tabs(driver):
+    """Test that tabs opened ahead are closed when processing stops early."""
+    prefetcher = VacancyPrefetcher(driver, ["a", "b", "c"], lookahead=3)
+    url, handle = next(iter(prefetcher))
+    driver.switch_to.window(handle)
+    driver.close()
+    driver.switch_to.window("search")
+
+    prefetcher.close()
+
+    assert url == "a"
+    assert driver.window_handles == ["search"]
+    assert driver.opened_urls == ["a", "b", "c"]
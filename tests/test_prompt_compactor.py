@@ -0,0 +1,69 @@
+import pytest
+
+from src.llm.prompt_compactor import PromptCompactor, TokenCounter, normalize_whitespace, strip_boilerplate
+
+
+@pytest.fixture
+def counter():
+    """Fixture to count tokens by text length without loading the tiktoken vocabulary."""
+    counter = TokenCounter()
+    counter.loaded = True
+    return counter
+
+
+def test_normalize_whitespace():
+    """Test that repeated spaces and blank lines are collapsed."""
+    assert normalize_whitespace("  Python\xa0 developer  \r\n\r\n\r\n\n  Django \t ") == "Python developer\n\nDjango"
+
+
+def test_strip_boilerplate():
+    """Test that call-to-action, legal text and repeated lines are removed from a description."""
+    description = (
+        "Разработка backend на Python\n"
+        "Опыт работы с PostgreSQL\n"
+        "Опыт работы с PostgreSQL\n"
+        "Ждем ваших откликов!\n"
+        "Откликаясь на вакансию, вы соглашаетесь на обработку персональных данных\n"
+        "#python #django"
+    )
+
+    assert strip_boilerplate(description) == "Разработка backend на Python\nОпыт работы с PostgreSQL"
+
+
+def test_relevant_resume_sections_are_kept(counter):
+    """Test that resume sections matching the vacancy are kept within the budget."""
+    compactor = PromptCompactor(counter=counter)
+    resume = "Иван Иванов, Python разработчик\n\nОпыт: Django, PostgreSQL, Celery\n\nХобби: рыбалка и шахматы"
+
+    selected = compactor.select_resume_sections(resume, "Требуется опыт Django и PostgreSQL", 22)
+
+    assert selected == "Иван Иванов, Python разработчик\n\nОпыт: Django, PostgreSQL, Celery"
+
+
+def test_prompt_fits_budget(mocker, counter):
+    """Test that the compacted inputs fit the chain budget and the saving is reported."""
+    record = mocker.patch("src.llm.prompt_compactor.llm_metrics.record_compaction")
+    compactor = PromptCompactor({"cover_letter": 200}, counter=counter)
+    inputs = {
+        "job_description": "Нужен Python разработчик.   Django.\n\n\n\n" + "Описание задач. " * 100,
+        "resume": "Имя\n\n" + "Опыт Python и Django. " * 20 + "\n\n" + "Хобби. " * 50,
+    }
+
+    compacted = compactor.compact("cover_letter", "{job_description}{resume}", inputs)
+
+    template_tokens = counter.count("{job_description}{resume}")
+    assert template_tokens + sum(counter.count(value) for value in compacted.values()) <= 200
+    assert compacted["job_description"].startswith("Нужен Python разработчик. Django.\n\n")
+    assert "Хобби" not in compacted["resume"]
+    chain_name, before, after = record.call_args.args
+    assert chain_name == "cover_letter" and before > after
+
+
+def test_small_prompt_is_only_normalized(mocker, counter):
+    """Test that prompts within the budget keep all their content."""
+    mocker.patch("src.llm.prompt_compactor.llm_metrics.record_compaction")
+    compactor = PromptCompactor(default_budget=1000, counter=counter)
+
+    compacted = compactor.compact("projects", "{question}", {"question": " Ваш  опыт? ", "resume_section": {"a": 1}})
+
+    assert compacted == {"question": "Ваш опыт?", "resume_section": {"a": 1}}
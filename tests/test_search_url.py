@@ -0,0 +1,110 @@
+import httpx
+import pytest
+from src.search_url import HhDictionaries, SearchUrlBuilder, compile_search_params, search_page_url
+
+
+@pytest.fixture
+def parameters():
+    """Fixture with search settings in the config.yaml format."""
+    return {
+        'job_title': "Программист Python", 'login': "login",
+        'keywords': ["ML инженер"],
+        'search_only': {'vacancy_name': True, 'company_name': False, 'vacancy_description': True},
+        'words_to_exclude': ["Аналитик", "Analyst"],
+        'regions': ["Москва"],
+        'subway': ["Курская"],
+        'specialization': "Программист",
+        'income': 300000,
+        'education': {'not_needed': False, 'middle': False, 'higher': True},
+        'experience': {'doesnt_matter': False, 'no_experience': False, 'between_1_and_3': True,
+                       'between_3_and_6': False, '6_and_more': False},
+        'job_type': {'full_time': True, 'part_time': False, 'civil_law_contract': True},
+        'work_schedule': {'full_day': False, 'flexible': True, 'remote': True},
+        'side_job': {'project': False, 'weekend': True},
+        'other_params': {'with_address': True, 'not_from_agency': True, 'accept_kids': False},
+        'sort_by': {'relevance': False, 'publication_time': True},
+        'output_period': {'all_time': False, 'week': True},
+        'output_size': {'show_20': False, 'show_50': True},
+    }
+
+
+def hh_api_handler(request):
+    """Mocked hh.ru dictionaries API."""
+    if request.url.path == "/suggests/areas":
+        return httpx.Response(200, json={"items": [{"id": "2019", "text": "Московская область"},
+                                                   {"id": "1", "text": "Москва"}]})
+    if request.url.path == "/suggests/professional_roles":
+        return httpx.Response(200, json={"items": [{"id": "96", "text": "Программист, разработчик"}]})
+    if request.url.path == "/metro/1":
+        return httpx.Response(200, json={"lines": [{"stations": [{"id": "5.37", "name": "Курская"}]}]})
+    return httpx.Response(404)
+
+
+@pytest.fixture
+def dictionaries():
+    """Fixture with the dictionaries client talking to the mocked API."""
+    client = httpx.Client(base_url="https://api.hh.ru", transport=httpx.MockTransport(hh_api_handler))
+    return HhDictionaries(client)
+
+
+def test_compile_search_params(parameters):
+    """Test that checked config options become hh.ru query parameters."""
+    params = compile_search_params(parameters)
+    assert params == [
+        ("text", "ML инженер"), ("excluded_text", "Аналитик, Analyst"),
+        ("search_field", "name"), ("search_field", "description"),
+        ("experience", "between1And3"), ("education", "higher"),
+        ("employment", "full"), ("accept_temporary", "true"),
+        ("schedule", "flexible"), ("schedule", "remote"), ("part_time", "only_saturday_and_sunday"),
+        ("label", "with_address"), ("label", "not_from_agency"), ("salary", "300000"),
+        ("order_by", "publication_time"), ("search_period", "7"), ("items_on_page", "50"),
+    ]
+
+
+def test_build_resolves_dictionary_names(parameters, dictionaries, tmp_path):
+    """Test that regions, specialization and subway are resolved to hh.ru identifiers."""
+    builder = SearchUrlBuilder(parameters, tmp_path / "search_url.json", dictionaries)
+    url = builder.build("abc123")
+    assert url.startswith("https://hh.ru/search/vacancy?resume=abc123&text=ML")
+    assert url.endswith("&area=1&professional_role=96&metro=5.37")
+
+
+def test_build_falls_back_to_form_when_name_is_unknown(parameters, dictionaries, tmp_path):
+    """Test that an unresolved setting makes the builder give up instead of dropping it."""
+    parameters['industry'] = "Банк"
+    builder = SearchUrlBuilder(parameters, tmp_path / "search_url.json", dictionaries)
+    assert builder.build() is None
+
+
+def test_build_ignores_districts(parameters, dictionaries, tmp_path):
+    """Test that districts, which have no public dictionary, are left out of the URL instead of disabling it."""
+    parameters['districts'] = ["Замоскворечье"]
+    builder = SearchUrlBuilder(parameters, tmp_path / "search_url.json", dictionaries)
+    url = builder.build()
+    assert url.endswith("&area=1&professional_role=96&metro=5.37")
+    assert "Замоскворечье" not in url
+
+
+def test_cached_url_depends_on_settings(parameters, tmp_path):
+    """Test that the cached URL is reused only with the same search settings."""
+    builder = SearchUrlBuilder(parameters, tmp_path / "search_url.json")
+    builder.save("https://hh.ru/search/vacancy?text=python&page=2")
+    assert SearchUrlBuilder(dict(parameters), tmp_path / "search_url.json").load_cached() == \
+        "https://hh.ru/search/vacancy?text=python"
+    changed = dict(parameters, income=100000)
+    assert SearchUrlBuilder(changed, tmp_path / "search_url.json").load_cached() is None
+
+
+def test_search_page_url_replaces_page():
+    """Test that the page parameter is set and other query parameters are kept."""
+    url = search_page_url("https://hh.ru/search/vacancy?text=python&page=3&area=1", 5)
+    assert url == "https://hh.ru/search/vacancy?text=python&area=1&page=5"
+
+
+def test_build_closes_own_dictionaries_client(mocker, parameters, dictionaries, tmp_path):
+    """Test that the dictionaries client created by the builder is closed once the URL is built."""
+    mocker.patch("src.search_url.HhDictionaries", return_value=dictionaries)
+    builder = SearchUrlBuilder(parameters, tmp_path / "search_url.json")
+
+    assert builder.build().endswith("&area=1&professional_role=96&metro=5.37")
+    assert dictionaries.client.is_closed
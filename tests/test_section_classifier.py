@@ -0,0 +1,64 @@
+import json
+import pytest
+from src.llm.section_classifier import SectionClassifier
+
+
+@pytest.fixture
+def classifier(tmp_path):
+    """Fixture to create a SectionClassifier with a temporary cache file."""
+    return SectionClassifier(tmp_path / "sections.json")
+
+
+@pytest.mark.parametrize("question, section", [
+    ("какие ваши зарплатные ожидания?", "salary_expectations"),
+    ("ваш уровень английского?", "languages"),
+    ("готовы ли вы к переезду?", "work_preferences"),
+    ("укажите ваш telegram", "personal_information"),
+    ("когда вы сможете выйти на работу?", "availability"),
+])
+def test_classify_locally(question, section):
+    """Test keyword classification of unambiguous questions."""
+    assert SectionClassifier.classify_locally(question) == section
+
+
+def test_classify_locally_ambiguous():
+    """Test that ties and unknown questions are left to the LLM."""
+    assert SectionClassifier.classify_locally("расскажите о себе") is None
+    assert SectionClassifier.classify_locally("какой у вас опыт работы в проектах?") is None
+
+
+def test_llm_decision_is_cached(mocker, classifier, tmp_path):
+    """Test that the LLM is asked once per question and its decision is persisted."""
+    llm_classifier = mocker.Mock(return_value="interests")
+
+    assert classifier.classify("Расскажите о себе", llm_classifier) == "interests"
+    assert classifier.classify("расскажите о себе ", llm_classifier) == "interests"
+    llm_classifier.assert_called_once()
+    with open(tmp_path / "sections.json") as f:
+        assert json.load(f) == {"расскажите о себе": "interests"}
+
+    reloaded = SectionClassifier(tmp_path / "sections.json")
+    assert reloaded.classify("расскажите о себе", llm_classifier) == "interests"
+    llm_classifier.assert_called_once()
+
+
+def test_local_classifier_skips_llm(mocker, classifier):
+    """Test that confident local decisions do not call the LLM."""
+    llm_classifier = mocker.Mock()
+
+    assert classifier.classify("Ваша зарплатная вилка?", llm_classifier) == "salary_expectations"
+    llm_classifier.assert_not_called()
+    assert classifier.local_hits == 1
+
+
+def test_concurrent_classifiers_merge_decisions(mocker, tmp_path):
+    """Test that classifiers of different workers sharing one file keep each other's decisions."""
+    first = SectionClassifier(tmp_path / "sections.json")
+    second = SectionClassifier(tmp_path / "sections.json")
+
+    first.classify("Расскажите о себе", mocker.Mock(return_value="interests"))
+    second.classify("Чем вы гордитесь?", mocker.Mock(return_value="projects"))
+
+    with open(tmp_path / "sections.json") as f:
+        assert json.load(f) == {"расскажите о себе": "interests", "чем вы гордитесь?": "projects"}
+    assert list(tmp_path.iterdir()) == [tmp_path / "sections.json"]
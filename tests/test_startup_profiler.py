@@ -0,0 +1,18 @@
+import pytest
+from src.startup_profiler import StartupProfiler
+
+
+def test_phases_are_recorded_in_order(mocker):
+    """Test that each phase records its duration, including phases that raise."""
+    times = iter([0.0, 1.0, 3.0, 3.5, 4.0, 10.0])
+    mocker.patch("src.startup_profiler.time.perf_counter", side_effect=lambda: next(times))
+    profiler = StartupProfiler()
+    with profiler.phase("config"):
+        pass
+    with pytest.raises(ValueError):
+        with profiler.phase("driver"):
+            raise ValueError()
+
+    assert [(name, duration) for name, duration, _ in profiler.phases] == [("config", 2.0), ("driver", 0.5)]
+    report = profiler.report()
+    assert "config" in report and "10.000" in report
@@ -0,0 +1,109 @@
+import json
+import pytest
+from src.state_store import JsonStateStore, SqliteStateStore
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    """Fixture to create each StateStore implementation inside a temporary folder."""
+    if request.param == "json":
+        store = JsonStateStore(tmp_path)
+    else:
+        store = SqliteStateStore(tmp_path / "state.sqlite3")
+    yield store
+    store.close()
+
+
+def test_companies_roundtrip(store):
+    """Test saving companies and checking whether they were already seen."""
+    assert store.load_companies("login", "Python") == {"login": {"Python": {}}}
+    store.save_company("login", "Python", "Company A", "Developer")
+    store.save_company("login", "Python", "Company A", "Developer")
+
+    assert store.is_company_seen("login", "Python", "Company A")
+    assert store.is_job_seen("login", "Python", "Company A", "Developer")
+    assert not store.is_job_seen("login", "Python", "Company A", "Team lead")
+    assert not store.is_company_seen("login", "Java", "Company A")
+    assert store.load_companies("login", "Python") == {"login": {"Python": {"Company A": ["Developer"]}}}
+
+
+def test_flush_keeps_history(store, tmp_path):
+    """Test that flushing deferred writes keeps the saved companies."""
+    store.load_companies("login", "Python")
+    store.save_company("login", "Python", "Company A", "Developer")
+    store.flush()
+
+    assert store.is_job_seen("login", "Python", "Company A", "Developer")
+    if isinstance(store, JsonStateStore):
+        assert not (tmp_path / "companies.json").exists()
+        assert JsonStateStore(tmp_path).load_companies("login", "Python") == \
+            {"login": {"Python": {"Company A": ["Developer"]}}}
+
+
+def test_json_flush_compacts_long_journal(tmp_path):
+    """Test that an idle flush folds the journal once compact_every records have accumulated."""
+    store = JsonStateStore(tmp_path)
+    store.companies_journal.compact_every = 2
+    store.load_companies("login", "Python")
+    store.save_company("login", "Python", "Company A", "Developer")
+    store.save_company("login", "Python", "Company B", "Developer")
+    store.flush()
+
+    assert (tmp_path / "companies.jsonl").read_text() == ""
+    with open(tmp_path / "companies.json", encoding="utf-8") as f:
+        assert json.load(f) == {"login": {"Python": {"Company A": ["Developer"], "Company B": ["Developer"]}}}
+
+
+def test_questions_roundtrip(store):
+    """Test saving and loading stored answers."""
+    assert store.load_questions() == []
+    store.save_question({"question": "ваш возраст?", "answer": "30"})
+
+    assert store.load_questions() == [{"question": "ваш возраст?", "answer": "30"}]
+
+
+def test_sqlite_upsert_answer(tmp_path):
+    """Test that SQLite store keeps one row per question."""
+    store = SqliteStateStore(tmp_path / "state.sqlite3")
+    store.save_question({"question": "q", "answer": "a"})
+    store.save_question({"question": "q", "answer": "b"})
+
+    assert store.load_questions() == [{"question": "q", "answer": "b"}]
+    store.close()
+
+
+def test_sqlite_shared_between_connections(tmp_path):
+    """Test that two SQLite stores on one file see each other's records."""
+    first = SqliteStateStore(tmp_path / "state.sqlite3")
+    second = SqliteStateStore(tmp_path / "state.sqlite3")
+    first.save_company("login", "Python", "Company A", "Developer")
+
+    assert second.is_company_seen("login", "Python", "Company A")
+    first.close()
+    second.close()
+
+
+def test_sqlite_import_json(tmp_path):
+    """Test migrating history from JSON files into SQLite."""
+    with open(tmp_path / "companies.json", "w") as f:
+        json.dump({"login": {"Python": {"Company A": ["Developer"]}}}, f)
+    with open(tmp_path / "answers.json", "w") as f:
+        json.dump([{"question": "q", "answer": "a"}], f)
+    store = SqliteStateStore(tmp_path / "state.sqlite3")
+    store.import_json(JsonStateStore(tmp_path))
+
+    assert store.is_job_seen("login", "Python", "Company A", "Developer")
+    assert store.load_questions() == [{"question": "q", "answer": "a"}]
+    store.close()
+
+
+def test_history_checked_without_loading_all_companies(store):
+    """Test that saved history is visible to a new store without a prior load_companies call."""
+    store.save_company("login", "Python", "Company A", "Developer")
+    store.flush()
+    reopened = JsonStateStore(store.output_folder) if isinstance(store, JsonStateStore) \
+        else SqliteStateStore(store.db_file)
+
+    assert reopened.is_company_seen("login", "Python", "Company A")
+    assert reopened.is_job_seen("login", "Python", "Company A", "Developer")
+    reopened.close()
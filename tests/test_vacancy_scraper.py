@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import httpx
+import pytest
+from src.vacancy_scraper import HttpVacancyScraper, parse_vacancy_html
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "vacancy.html"
+
+EXPECTED_JOB = {
+    "title": "Python-разработчик",
+    "salary": "от 250 000 ₽ на руки",
+    "experience": "3–6 лет",
+    "job_type": "Полная занятость, удаленная работа",
+    "company_name": "ООО Ромашка",
+    "company_address": "Москва",
+    "description": "Обязанности:\nразработка бэкенда на Python;\nкод-ревью.\nТребования:\nопыт с Django от 3 лет",
+    "skills": "Python, Django, PostgreSQL",
+}
+
+
+def test_parse_vacancy_html():
+    """Test that a saved vacancy page is parsed into the same job dict as the browser scraper."""
+    assert parse_vacancy_html(FIXTURE.read_text(encoding="utf-8")) == EXPECTED_JOB
+
+
+def test_parse_missing_fields():
+    """Test that missing fields are None and missing skills are an empty string."""
+    job = parse_vacancy_html('<html><body><h1 data-qa="vacancy-title">Title</h1></body></html>')
+
+    assert job["title"] == "Title"
+    assert job["salary"] is None
+    assert job["company_address"] is None
+    assert job["skills"] == ""
+
+
+@pytest.fixture
+def scraper():
+    """Fixture to create a scraper that serves the saved page through a mock transport."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/vacancy/1":
+            return httpx.Response(200, text=FIXTURE.read_text(encoding="utf-8"))
+        return httpx.Response(200, text="<html><body>captcha</body></html>")
+
+    scraper = HttpVacancyScraper([{"name": "hhtoken", "value": "secret", "domain": ".hh.ru"}], "test-agent")
+    scraper.client = httpx.Client(transport=httpx.MockTransport(handler), cookies=scraper.client.cookies,
+                                  headers=scraper.client.headers)
+    scraper.requests = requests
+    yield scraper
+    scraper.close()
+
+
+def test_scrape_uses_session_cookies(scraper):
+    """Test that pages are fetched with the browser session cookies and parsed."""
+    assert scraper.submit("https://hh.ru/vacancy/1").result() == EXPECTED_JOB
+    request = scraper.requests[0]
+    assert request.headers["cookie"] == "hhtoken=secret"
+    assert request.headers["user-agent"] == "test-agent"
+
+
+def test_scrape_non_vacancy_page(scraper):
+    """Test that a page without a vacancy title is reported as not scraped."""
+    assert scraper.scrape("https://hh.ru/vacancy/2") is None
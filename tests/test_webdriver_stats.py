@@ -0,0 +1,19 @@
+from unittest import mock
+from src.webdriver_stats import WebDriverCommandCounter
+
+
+def test_counter_counts_commands_and_uninstalls():
+    """Test that commands are counted per name and the original execute is restored."""
+    driver = mock.Mock()
+    execute = driver.execute
+    counter = WebDriverCommandCounter(driver)
+    driver.execute("findElement", {})
+    snapshot = counter.snapshot()
+    driver.execute("executeScript", {})
+    driver.execute("executeScript", {})
+
+    assert counter.total == 3
+    assert counter.since(snapshot) == {"executeScript": 2}
+    assert execute.call_count == 3
+    counter.uninstall()
+    assert driver.execute is execute
@@ -0,0 +1,83 @@
+import threading
+import pytest
+from src.worker_pool import WorkerCoordinator, WorkerPool
+
+
+def test_pages_stop_at_first_empty_page():
+    """Test that pages after the first empty one are not handed out."""
+    coordinator = WorkerCoordinator(min_interval_sec=0)
+    assert [coordinator.take_page() for _ in range(3)] == [0, 1, 2]
+    coordinator.mark_empty_page(2)
+    coordinator.mark_empty_page(4)
+    assert coordinator.take_page() is None
+
+
+def test_vacancy_claimed_once(mocker):
+    """Test that a vacancy can be claimed by a single worker until it is released."""
+    mocker.patch("src.worker_pool.APPLY_ONCE_AT_COMPANY", False)
+    coordinator = WorkerCoordinator(min_interval_sec=0)
+    assert coordinator.claim_vacancy("company", "python")
+    assert not coordinator.claim_vacancy("company", "python")
+    assert coordinator.claim_vacancy("company", "java")
+    coordinator.release_vacancy("company", "python")
+    assert coordinator.claim_vacancy("company", "python")
+
+
+def test_responses_are_paced_across_workers(mocker):
+    """Test that consecutive turns are spaced by the global minimum interval."""
+    mocker.patch("src.worker_pool.time.monotonic", return_value=100.0)
+    sleep = mocker.patch("src.worker_pool.time.sleep")
+    coordinator = WorkerCoordinator(min_interval_sec=10)
+    coordinator.wait_for_turn()
+    coordinator.wait_for_turn()
+    coordinator.wait_for_turn()
+    assert [call.args[0] for call in sleep.call_args_list] == [pytest.approx(10), pytest.approx(20)]
+
+
+def test_pool_processes_every_page_once(mocker):
+    """Test that workers share the page queue and stop when the results run out."""
+    main_driver = mocker.Mock()
+    main_driver.current_url = "https://hh.ru/search/vacancy?text=python"
+    main_driver.get_cookies.return_value = [{"name": "hhtoken", "value": "token"}]
+    worker_drivers = [mocker.Mock(), mocker.Mock()]
+    processed_pages = []
+    lock = threading.Lock()
+
+    def create_job_manager(driver, coordinator):
+        job_manager = mocker.Mock()
+
+        def apply_on_search_page(url):
+            page = int(url.rsplit("page=", 1)[1])
+            with lock:
+                processed_pages.append(page)
+            return page < 5
+
+        job_manager.apply_on_search_page.side_effect = apply_on_search_page
+        return job_manager
+
+    pool = WorkerPool(main_driver, lambda worker_id: worker_drivers[worker_id - 1], create_job_manager,
+                      workers_num=3, coordinator=WorkerCoordinator(min_interval_sec=0))
+    pool.run()
+
+    assert sorted(processed_pages)[:6] == [0, 1, 2, 3, 4, 5]
+    assert len(processed_pages) == len(set(processed_pages))
+    for driver in worker_drivers:
+        driver.add_cookie.assert_called_once_with({"name": "hhtoken", "value": "token"})
+        driver.quit.assert_called_once()
+    main_driver.quit.assert_not_called()
+
+
+def test_workers_share_llm_limits(mocker):
+    """Test that answerers of different workers share one concurrency limit, breaker and rate limiter per model."""
+    from src.llm.llm_manager import GPTAnswerer
+
+    mocker.patch("src.llm.llm_manager.AIAdapter", return_value=mocker.Mock(model_name="openai/gpt-4o-mini"))
+    mocker.patch("src.llm.llm_manager.LLM_CACHE_CHAINS", [])
+    coordinator = WorkerCoordinator(min_interval_sec=0)
+
+    first = GPTAnswerer({}, "secret", coordinator.llm_resilience)._chat_model("projects")
+    second = GPTAnswerer({}, "secret", coordinator.llm_resilience)._chat_model("projects")
+
+    assert first.resilience is second.resilience
+    assert first.resilience.breaker is second.resilience.breaker
+    assert first.rate_limiter is second.rate_limiter is not None